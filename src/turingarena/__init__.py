@@ -1,4 +1,4 @@
-from turingarena.evallib.algorithm import run_algorithm
+from turingarena.evallib.algorithm import run_algorithm, run_algorithm_async
 import turingarena.evallib.evaluation as evaluation
 import turingarena.evallib.goals
 import turingarena.evallib.metadata
@@ -0,0 +1,206 @@
+"""
+On-disk cache of compiled interfaces.
+
+For each interface text, the compiled interface is stored together with the trees obtained
+by preprocessing it for the execution (ExecutionPreprocessor) and for the generation of skeletons
+(SkeletonPreprocessor), so that a run loads all of them at once, without parsing and transforming.
+
+Entries are content-addressed, that is, indexed by a hash of the interface text and of the TuringArena version,
+and are shared by all the processes of the same user using the same cache directory.
+Entries are only loaded if they are owned by the current user and not writable by others,
+since loading them may run arbitrary code, and only the most recently used ones are kept (see MAX_CACHE_ENTRIES).
+Set TURINGARENA_CACHE_DIR to change the directory, or to the empty string to disable the cache.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import threading
+from collections import namedtuple
+from functools import lru_cache
+
+import turingarena
+from turingarena.driver.compile.compile import Compiler
+from turingarena.driver.drive.preprocess import ExecutionPreprocessor
+from turingarena.driver.gen.preprocess import SkeletonPreprocessor
+from turingarena.version import VERSION
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_VARIABLE = "TURINGARENA_CACHE_DIR"
+
+# maximum number of interfaces whose preprocessed trees are kept in memory, see preprocessed()
+MAX_LOADED_INTERFACES = 64
+# maximum number of entries in the cache directory, the least recently used ones are removed first
+MAX_CACHE_ENTRIES = 1024
+
+CompiledInterface = namedtuple("CompiledInterface", [
+    "interface",
+    "diagnostics",
+    "execution_main",
+    "skeleton",
+])
+
+# id of the interface -> CompiledInterface, for the interfaces loaded in this process
+_loaded = {}
+# interfaces may be loaded by many threads, e.g., running programs in-memory (see Program.run)
+_loaded_lock = threading.Lock()
+
+
+def cache_dir():
+    path = os.environ.get(CACHE_DIR_VARIABLE)
+    if path is None:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        path = os.path.join(base, "turingarena", "interfaces")
+    return path or None
+
+
+def cache_key(source_text):
+    h = hashlib.sha256()
+    h.update(_code_version().encode())
+    h.update(b"\0")
+    h.update(source_text.encode())
+    return h.hexdigest()
+
+
+@lru_cache()
+def _code_version():
+    if VERSION != "UNKNOWN":
+        return VERSION
+
+    # not an installed version, so the code may change without the version changing:
+    # use the modification times of the modules instead
+    root = os.path.dirname(turingarena.__file__)
+    mtimes = []
+    for directory, _, files in os.walk(os.path.join(root, "driver")):
+        mtimes.extend(
+            f"{name}:{os.stat(os.path.join(directory, name)).st_mtime_ns}"
+            for name in sorted(files)
+            if name.endswith(".py")
+        )
+    return ",".join(mtimes)
+
+
+def compile_interface(source_text):
+    """
+    Like turingarena.driver.compile.compile.compile_interface, but using the cache.
+    The preprocessed trees of the interface returned are then available through preprocessed().
+    """
+    directory = cache_dir()
+    compiled = None
+
+    if directory is not None:
+        path = os.path.join(directory, f"{cache_key(source_text)}.pickle")
+        compiled = _read_entry(path)
+
+    if compiled is None:
+        compiled = _compile(source_text)
+        if directory is not None:
+            _write_entry(directory, path, compiled)
+
+    for msg in compiled.diagnostics:
+        logging.warning(f"interface contains an error: {msg}")
+
+    _register(compiled)
+    return compiled.interface
+
+
+def load_interface(path):
+    with open(path) as f:
+        return compile_interface(f.read())
+
+
+def preprocessed(interface):
+    """
+    Return the CompiledInterface of the given interface, computing its preprocessed trees
+    if it was not loaded from the cache.
+    """
+    compiled = _loaded.get(id(interface))
+    if compiled is None or compiled.interface is not interface:
+        compiled = _preprocess(interface, diagnostics=())
+        _register(compiled)
+    return compiled
+
+
+def _compile(source_text):
+    compiler = Compiler.create()
+    interface = compiler.compile_interface_source(source_text)
+    return _preprocess(interface, diagnostics=tuple(str(msg) for msg in compiler.diagnostics))
+
+
+def _preprocess(interface, diagnostics):
+    return CompiledInterface(
+        interface=interface,
+        diagnostics=diagnostics,
+        execution_main=ExecutionPreprocessor().transform(interface.main),
+        skeleton=SkeletonPreprocessor.create().transform(interface),
+    )
+
+
+def _register(compiled):
+    # the interface is kept in the entry, so that its id is not reused
+    with _loaded_lock:
+        if len(_loaded) >= MAX_LOADED_INTERFACES:
+            del _loaded[next(iter(_loaded))]
+        _loaded[id(compiled.interface)] = compiled
+
+
+def _read_entry(path):
+    try:
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_uid != os.getuid() or stat.st_mode & 0o022:
+                logger.warning(f"ignoring entry {path} of the interface cache, not owned by the current user")
+                return None
+            compiled = pickle.load(f)
+            # used now, so that it is not among the first to be removed
+            os.utime(f.fileno())
+            return compiled
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # e.g., a truncated file, or an entry no longer matching the code
+        logger.warning(f"ignoring invalid entry {path} of the interface cache", exc_info=True)
+        return None
+
+
+def _write_entry(directory, path, compiled):
+    try:
+        # only the current user can add entries
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        # written to a temporary file and then renamed, so concurrent readers never see a partial entry
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        _remove_old_entries(directory)
+    except OSError:
+        logger.warning(f"unable to write the interface cache in {directory}", exc_info=True)
+
+
+def _remove_old_entries(directory):
+    """
+    Remove the least recently used entries, so that at most MAX_CACHE_ENTRIES are kept.
+    """
+    entries = []
+    for name in os.listdir(directory):
+        if not name.endswith(".pickle"):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            entries.append((os.stat(path).st_mtime_ns, path))
+        except FileNotFoundError:
+            pass  # removed concurrently
+
+    entries.sort()
+    for _, path in entries[:max(0, len(entries) - MAX_CACHE_ENTRIES)]:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
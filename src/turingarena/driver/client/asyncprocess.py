@@ -0,0 +1,196 @@
+import inspect
+
+from turingarena.driver.client.commands import DriverState
+from turingarena.driver.client.exceptions import *
+from turingarena.driver.client.process import BaseProcess
+from turingarena.driver.client.protocol import AsyncDriverChannel, LATEST_PROTOCOL_VERSION, ProtocolVersion
+
+
+class AsyncProcess(BaseProcess):
+    """
+    Same as Process, but driven by an asyncio event loop.
+
+    Every method that communicates with the driver is a coroutine,
+    including the calls made through `procedures` and `functions`.
+    Callbacks can be either plain functions or coroutine functions.
+    """
+
+    def __init__(self, reader, writer, protocol_version=LATEST_PROTOCOL_VERSION, sampling_interval=None):
+        super().__init__(
+            AsyncDriverChannel(reader=reader, writer=writer),
+            protocol_version=protocol_version,
+            sampling_interval=sampling_interval,
+        )
+
+    def section(self, time_limit=None, memory_limit=None, wall_time_limit=None, kill_on_time_limit=False):
+        return _AsyncSection(self, time_limit, memory_limit, wall_time_limit, kill_on_time_limit)
+
+    async def _start(self, kill_on_time_limit=True, **kwargs):
+        await self._negotiate_protocol()
+        await self.checkpoint()
+        assert self._latest_resource_usage is not None
+        main_section = self.section(kill_on_time_limit=kill_on_time_limit, **kwargs)
+        self._main_section = await main_section.__aenter__()
+        return main_section
+
+    async def _finish(self, main_section, exc_type, exc_value, traceback):
+        # same as Process._run, and its TODO applies here as well
+        try:
+            if exc_type is None or issubclass(exc_type, InterfaceExit):
+                await main_section.__aexit__(None, None, None)
+                await self._send_exit()
+                return exc_type is not None
+            await main_section.__aexit__(exc_type, exc_value, traceback)
+            return issubclass(exc_type, ProcessStop)
+        finally:
+            await self._send_stop()
+
+    async def limit_memory(self, memory_limit):
+        await self.sample_usage()
+        self.check(
+            self.current_memory_usage <= memory_limit,
+            f"current memory usage: {self.current_memory_usage / 1024} kB > {memory_limit / 1024} kB",
+            exc_type=MemoryLimitExceeded,
+        )
+
+    async def _do_call(self, request):
+        self._send_request_lines(self._call_lines(request))
+        await self._accept_callbacks(request.callbacks)
+
+        if request.has_return_value:
+            await self._wait_ready()
+            return_value = await self._get_response_value()
+        else:
+            return_value = None
+
+        if self._needs_sample():
+            await self.sample_usage()
+
+        return return_value
+
+    async def _negotiate_protocol(self):
+        if self._protocol_version is ProtocolVersion.TEXT:
+            return
+
+        self._send_request_line("protocol")
+        self._send_request_line(self._protocol_version.value)
+        accepted_version = await self._get_response_value()
+        self._channel.switch_protocol(accepted_version)
+
+    async def checkpoint(self):
+        self._send_request_line("checkpoint")
+        await self._wait_ready()
+        await self.sample_usage()
+
+    async def sample_usage(self):
+        if not self._usage_sampled:
+            self._send_request_line("usage")
+            await self._wait_ready()
+            self._usage_sampled = True
+            self._calls_since_sample = 0
+        return self._latest_resource_usage
+
+    def _send_wall_time_budget(self):
+        # sent together with the next request
+        self._send_request_line("wall_time")
+        self._send_request_line(self._wall_time_budget())
+
+    def _send_time_usage_limit(self):
+        # sent together with the next request
+        self._send_request_line("time_limit")
+        self._send_request_line(self._time_usage_limit())
+
+    async def _send_stop(self):
+        if self._driver_terminated:
+            return
+        self._send_request_line("stop")
+        await self._wait_ready()
+
+    async def _send_exit(self):
+        self._send_request_line("exit")
+        await self._wait_ready()
+
+    async def _accept_callbacks(self, callback_list):
+        while True:
+            await self._wait_ready()
+            response = await self._get_response_value()
+            if response == 1:  # has callback
+                index = await self._get_response_value()
+                callback = callback_list[index]
+                args = [
+                    int(await self._get_response_value())
+                    for _ in range(callback.__code__.co_argcount)
+                ]
+                return_value = callback(*args)
+                if inspect.isawaitable(return_value):
+                    return_value = await return_value
+                self._send_request_lines(self._callback_return_lines(return_value))
+            elif response == 0:  # no callbacks
+                break
+            else:  # error
+                await self._raise_error(self._error_type(response))
+
+    async def _get_response_line(self):
+        line = await self._channel.receive()
+        assert line is not None, "no line received from driver"
+        return line
+
+    async def _get_response_value(self):
+        return int(await self._get_response_line())
+
+    async def _raise_error(self, exc_type=AlgorithmRuntimeError):
+        message = await self._get_response_line()
+        self._driver_terminated = True
+        self.fail(message, exc_type=exc_type)
+
+    async def _wait_ready(self):
+        while True:
+            state = DriverState(await self._get_response_value())
+            if state is DriverState.READY:
+                break
+            if state is DriverState.RESOURCE_USAGE:
+                self._on_resource_usage_values(*[await self._get_response_line() for _ in range(3)])
+            if state is DriverState.ERROR or state is DriverState.TIME_LIMIT_EXCEEDED:
+                await self._raise_error(self._error_type(state))
+
+
+class _AsyncSection:
+    # written as a class, as asynccontextmanager is not available in Python 3.6
+
+    def __init__(self, process, time_limit, memory_limit, wall_time_limit, kill_on_time_limit):
+        self.process = process
+        self.time_limit = time_limit
+        self.memory_limit = memory_limit
+        self.wall_time_limit = wall_time_limit
+        self.kill_on_time_limit = kill_on_time_limit
+        self.section = None
+        self.time_usage_before = None
+
+    async def __aenter__(self):
+        process = self.process
+        self.section = process._open_section(self.wall_time_limit)
+
+        await process.sample_usage()
+        process._running_sections.add(self.section)
+        if self.wall_time_limit is not None:
+            process._send_wall_time_budget()
+
+        self.time_usage_before = process._latest_resource_usage.time_usage
+        process._set_time_usage_limit(self.section, self.time_usage_before, self.time_limit, self.kill_on_time_limit)
+        if self.section._time_usage_limit is not None:
+            process._send_time_usage_limit()
+        return self.section
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        process = self.process
+        try:
+            if exc_type is None:
+                await process.sample_usage()
+        finally:
+            process._running_sections.remove(self.section)
+            process._send_limits_of_running_sections(self.section)
+        if exc_type is not None:
+            return False
+
+        process._close_section(self.section, self.time_usage_before, self.time_limit, self.memory_limit)
+        return False
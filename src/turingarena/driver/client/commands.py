@@ -1,6 +1,8 @@
-import collections
+import collections.abc
+import itertools
 import logging
 import numbers
+from array import array
 from enum import IntEnum
 
 logger = logging.getLogger(__name__)
@@ -10,44 +12,114 @@ class DriverState(IntEnum):
     READY = 0
     RESOURCE_USAGE = 1
     ERROR = -1
+    # error, the process was killed because it exceeded its time limit
+    TIME_LIMIT_EXCEEDED = -2
 
 
 class MetaType(IntEnum):
     SCALAR = 0
     ARRAY = 1
+    PACKED_ARRAY = 2
 
 
 def get_meta_type(value):
-    if isinstance(value, collections.Iterable):
+    if isinstance(value, collections.abc.Iterable):
         return MetaType.ARRAY
     if isinstance(value, numbers.Integral):
         return MetaType.SCALAR
     raise AssertionError(f"unsupported type for value: {value}")
 
 
+def pack_array(items):
+    """
+    Flatten a rectangular (possibly nested) array of integers.
+
+    Returns the shape of the array and its items in row-major order, as an array('q'),
+    or None if the array is not rectangular, or does not contain only integers,
+    or contains integers out of the 64-bit range (then it is sent unpacked, see serialize_data).
+    """
+    shape = []
+    rows = [items]
+    while True:
+        sizes = {len(row) for row in rows}
+        if len(sizes) != 1:
+            return None
+        shape.extend(sizes)
+
+        try:
+            return shape, array("q", itertools.chain.from_iterable(rows))
+        except TypeError:
+            pass  # not all integers, try one level deeper
+        except OverflowError:
+            return None  # integers out of the range of array('q')
+
+        inner_rows = []
+        for row in rows:
+            for item in row:
+                if isinstance(item, str) or not isinstance(item, collections.abc.Iterable):
+                    return None
+                inner_rows.append(list(item))
+        rows = inner_rows
+
+
+def unpack_array(shape, flat):
+    if len(shape) == 1:
+        return flat
+    stride = _product(shape[1:])
+    return [
+        unpack_array(shape[1:], flat[i * stride:(i + 1) * stride])
+        for i in range(shape[0])
+    ]
+
+
+def _product(values):
+    result = 1
+    for v in values:
+        result *= v
+    return result
+
+
 def serialize_data(value):
     meta_type = get_meta_type(value)
-    yield meta_type.value
     if meta_type is MetaType.ARRAY:
         items = list(value)
-        yield len(items)
-        for item in items:
-            yield from serialize_data(item)
+        packed = pack_array(items)
+        if packed is not None:
+            shape, flat = packed
+            yield MetaType.PACKED_ARRAY.value
+            yield len(shape)
+            yield from shape
+            # an empty array has no payload, as receive_array(0) reads nothing
+            if flat:
+                yield flat
+        else:
+            yield meta_type.value
+            yield len(items)
+            for item in items:
+                yield from serialize_data(item)
     elif meta_type == MetaType.SCALAR:
+        yield meta_type.value
         yield int(value)
     else:
         raise AssertionError
 
 
-def deserialize_data():
-    meta_type = MetaType(int((yield)))
+def deserialize_data(receive, receive_array):
+    meta_type = MetaType(int(receive()))
     if meta_type is MetaType.ARRAY:
-        size = int((yield))
+        size = int(receive())
         value = [None] * size
         for i in range(size):
-            value[i] = yield from deserialize_data()
+            value[i] = deserialize_data(receive, receive_array)
+    elif meta_type is MetaType.PACKED_ARRAY:
+        dimensions = int(receive())
+        shape = [int(receive()) for _ in range(dimensions)]
+        flat = receive_array(_product(shape))
+        if flat is None:
+            raise ValueError("too few values")
+        value = unpack_array(shape, flat)
     elif meta_type == MetaType.SCALAR:
-        value = int((yield))
+        value = int(receive())
     else:
         raise AssertionError
     return value
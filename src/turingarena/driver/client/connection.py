@@ -1,3 +1,29 @@
 from collections import namedtuple
 
-DriverProcessConnection = namedtuple("DriverProcessConnection", ["downward", "upward"])
+from turingarena.driver.client.objectchannel import ObjectChannel
+from turingarena.driver.client.protocol import DriverChannel
+
+
+class DriverProcessConnection(namedtuple("DriverProcessConnection", ["downward", "upward"])):
+    __slots__ = []
+
+    def client_channel(self):
+        return DriverChannel(input=self.upward, output=self.downward)
+
+    def server_channel(self):
+        return DriverChannel(input=self.downward, output=self.upward)
+
+
+class InMemoryDriverConnection(namedtuple("InMemoryDriverConnection", ["downward", "upward"])):
+    """
+    Connection to a driver running in a thread of the same interpreter.
+    Both directions are ObjectQueue, so values are never encoded.
+    """
+
+    __slots__ = []
+
+    def client_channel(self):
+        return ObjectChannel(input=self.upward, output=self.downward)
+
+    def server_channel(self):
+        return ObjectChannel(input=self.downward, output=self.upward)
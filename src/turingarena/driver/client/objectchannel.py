@@ -0,0 +1,101 @@
+from array import array
+
+try:
+    from queue import SimpleQueue
+except ImportError:  # Python 3.6
+    from queue import Queue as SimpleQueue
+
+
+class ObjectQueue:
+    """
+    One direction of an in-memory connection, between two threads of the same interpreter.
+
+    Values are passed as they are, without encoding them,
+    in batches (lists of values) that are handed over to the reading thread in one step.
+    """
+
+    __slots__ = ["_batches", "_batch", "_position", "_closed"]
+
+    def __init__(self):
+        self._batches = SimpleQueue()
+        self._batch = ()
+        self._position = 0
+        self._closed = False
+
+    def put_all(self, values):
+        # the list is not copied, the caller must not use it anymore
+        self._batches.put(values)
+
+    def get(self):
+        """
+        Return the next value, waiting for it if needed,
+        or None if the queue is closed and there are no more values.
+        """
+
+        while self._position == len(self._batch):
+            if self._closed:
+                return None
+            batch = self._batches.get()
+            if batch is None:
+                self._closed = True
+                return None
+            self._batch = batch
+            self._position = 0
+
+        value = self._batch[self._position]
+        self._position += 1
+        return value
+
+    def close(self):
+        self._batches.put(None)
+
+
+class ObjectChannel:
+    """
+    Same as DriverChannel, over a pair of ObjectQueue.
+
+    Values sent are collected, and passed to the other end in a single batch when flushed.
+    Packed arrays are passed without copying them.
+    """
+
+    __slots__ = ["input", "output", "_pending"]
+
+    def __init__(self, input, output):
+        self.input = input
+        self.output = output
+        self._pending = []
+
+    def switch_protocol(self, version):
+        pass  # values are never encoded
+
+    def send(self, value):
+        self._pending.append(value)
+
+    def send_all(self, values):
+        self._pending.extend(values)
+
+    def receive(self):
+        self.flush()
+        return self.input.get()
+
+    def receive_array(self, size):
+        self.flush()
+        result = array("q")
+        while len(result) < size:
+            value = self.input.get()
+            if value is None:
+                return None
+            if not isinstance(value, array):
+                result.append(value)
+            elif not result and len(value) == size:
+                return value
+            else:
+                result.extend(value)
+        if len(result) > size:
+            raise ValueError(f"expecting {size} integers, got {len(result)}")
+        return result
+
+    def flush(self):
+        if self._pending:
+            self.output.put_all(self._pending)
+            self._pending = []
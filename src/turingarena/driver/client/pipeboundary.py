@@ -1,6 +1,7 @@
 import itertools
 import logging
 import os
+import struct
 from collections import namedtuple
 from contextlib import ExitStack, contextmanager
 from enum import Enum
@@ -19,6 +20,9 @@ PipeSynchronousQueueDescriptor = namedtuple("PipeSynchronousQueueDescriptor", [
     "request_pipes", "response_pipes"
 ])
 
+# header of each payload sent through a persistent queue: index of the pipe, size (-1 for None)
+PAYLOAD_HEADER = struct.Struct("<Hq")
+
 
 class PipeBoundary:
     __slots__ = ["directory"]
@@ -71,6 +75,25 @@ class PipeBoundary:
         ):
             os.mkfifo(self.pipe_path(pipe))
 
+    @contextmanager
+    def open_queue(self, descriptor, side):
+        """
+        Open a queue for many requests, see PersistentQueue.
+
+        Both sides must use the queue in the same way (persistent or not).
+        """
+        request_pipe = next(iter(descriptor.request_pipes.values()))
+        response_pipe = next(iter(descriptor.response_pipes.values()))
+        if side is PipeBoundarySide.CLIENT:
+            request_flags, response_flags = "wb", "rb"
+        else:
+            request_flags, response_flags = "rb", "wb"
+
+        # always opened in the same order, as opening a FIFO waits for the other side
+        with open(self.pipe_path(request_pipe), request_flags, buffering=2 ** 16) as request_file, \
+                open(self.pipe_path(response_pipe), response_flags, buffering=2 ** 16) as response_file:
+            yield PersistentQueue(descriptor, side, request_file, response_file)
+
     def send_empty_request(self, descriptor):
         return self.send_request(descriptor, **{n: None for n in descriptor.request_pipes})
 
@@ -97,3 +120,78 @@ class PipeBoundary:
         for name, pipe in descriptor.response_pipes.items():
             payload = response_payloads.get(name)
             self.sync_write(pipe, PipeBoundarySide.SERVER, payload)
+
+
+class PersistentQueue:
+    """
+    Synchronous queue whose pipes are opened once, and used for many requests.
+
+    The payloads of each request (or response) are sent one after the other,
+    through the first request (or response) pipe, each prefixed with the index of its pipe and its size.
+    """
+
+    __slots__ = ["descriptor", "side", "request_file", "response_file"]
+
+    def __init__(self, descriptor, side, request_file, response_file):
+        self.descriptor = descriptor
+        self.side = side
+        self.request_file = request_file
+        self.response_file = response_file
+
+    def send_empty_request(self):
+        return self.send_request(**{n: None for n in self.descriptor.request_pipes})
+
+    def send_request(self, **request_payloads):
+        assert self.side is PipeBoundarySide.CLIENT
+        assert len(self.descriptor.request_pipes) == len(request_payloads)
+
+        self._write_payloads(self.descriptor.request_pipes, self.request_file, request_payloads)
+        response_payloads = self._read_payloads(self.descriptor.response_pipes, self.response_file)
+        if response_payloads is None:
+            raise EOFError("pipe boundary closed by the server")
+        return response_payloads
+
+    def handle_request(self, handler):
+        """
+        Handle the next request, and return True,
+        or return False if the client closed the queue.
+        """
+        assert self.side is PipeBoundarySide.SERVER
+
+        request_payloads = self._read_payloads(self.descriptor.request_pipes, self.request_file)
+        if request_payloads is None:
+            return False
+        response_payloads = handler(**request_payloads)
+        self._write_payloads(self.descriptor.response_pipes, self.response_file, response_payloads)
+        return True
+
+    def _write_payloads(self, pipes, file, payloads):
+        for index, (name, pipe) in enumerate(pipes.items()):
+            payload = payloads.get(name)
+            if payload is None:
+                file.write(PAYLOAD_HEADER.pack(index, -1))
+                continue
+            if isinstance(payload, str):
+                payload = payload.encode()
+            file.write(PAYLOAD_HEADER.pack(index, len(payload)))
+            file.write(payload)
+        file.flush()
+
+    def _read_payloads(self, pipes, file):
+        pipe_list = list(pipes.items())
+        payloads = {}
+        while len(payloads) < len(pipe_list):
+            header = file.read(PAYLOAD_HEADER.size)
+            if len(header) < PAYLOAD_HEADER.size:
+                return None
+            index, size = PAYLOAD_HEADER.unpack(header)
+            name, pipe = pipe_list[index]
+            if size < 0:
+                payloads[name] = None
+                continue
+            payload = file.read(size)
+            if "b" not in pipe.flags[self.side.value]:
+                payload = payload.decode()
+            # same as sync_read
+            payloads[name] = payload or None
+        return payloads
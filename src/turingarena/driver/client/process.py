@@ -1,18 +1,27 @@
 import logging
 import math
+import time
 from collections import namedtuple
 from contextlib import contextmanager
 
 from turingarena.driver.client.commands import DriverState, serialize_data
 from turingarena.driver.client.exceptions import *
 from turingarena.driver.client.processinfo import SandboxProcessInfo
+from turingarena.driver.client.protocol import LATEST_PROTOCOL_VERSION, ProtocolVersion
 from turingarena.driver.client.proxy import MethodProxy
 
+# maximum number of pipelined calls waiting for completion,
+# must be low enough for their responses to fit in the upward pipe buffer
+MAX_PENDING_CALLS = 256
+
 
 class ProcessSection:
     def __init__(self):
         self._time_usage = None
         self._peak_memory_usage = 0
+        self._wall_time_deadline = None
+        # time usage (of the whole process) at which the driver kills the process, if any
+        self._time_usage_limit = None
 
     @property
     def time_usage(self):
@@ -23,9 +32,22 @@ class ProcessSection:
         return self._peak_memory_usage
 
 
-class Process:
-    def __init__(self, connection):
-        self._connection = connection
+class BaseProcess:
+    """
+    State and logic shared by Process and AsyncProcess,
+    which only differ in the way they wait for the driver.
+    """
+
+    def __init__(self, channel, protocol_version, sampling_interval):
+        self._channel = channel
+        self._protocol_version = ProtocolVersion(protocol_version)
+
+        # resource usage is sampled at section boundaries, at checkpoints,
+        # and, if an interval is given, every `sampling_interval` calls
+        self.sampling_interval = sampling_interval
+        self._calls_since_sample = 0
+        # whether the latest resource usage is still current (no request sent since then)
+        self._usage_sampled = False
 
         self.procedures = MethodProxy(self, has_return_value=False)
         self.functions = MethodProxy(self, has_return_value=True)
@@ -35,22 +57,32 @@ class Process:
         self._main_section = ProcessSection()
         self._running_sections = set()
 
-    @contextmanager
-    def section(self, time_limit=None, memory_limit=None):
+        # the driver terminates after reporting an error, and cannot be stopped anymore
+        self._driver_terminated = False
+
+    def _open_section(self, wall_time_limit):
+        section = ProcessSection()
+        if wall_time_limit is not None:
+            section._wall_time_deadline = time.monotonic() + wall_time_limit
+        return section
+
+    def _send_limits_of_running_sections(self, section):
+        """
+        Once the given section ends, in any way, replace its limits with those of the sections still running.
+        """
+        if self._driver_terminated:
+            return
+        if section._wall_time_deadline is not None:
+            self._send_wall_time_budget()
+        if section._time_usage_limit is not None:
+            self._send_time_usage_limit()
+
+    def _close_section(self, section, time_usage_before, time_limit, memory_limit):
         if time_limit is None:
             time_limit = math.inf
         if memory_limit is None:
             memory_limit = math.inf
 
-        section = ProcessSection()
-
-        self._running_sections.add(section)
-
-        time_usage_before = self._latest_resource_usage.time_usage
-        try:
-            yield section
-        finally:
-            self._running_sections.remove(section)
         time_usage_after = self._latest_resource_usage.time_usage
 
         section._time_usage = time_usage_after - time_usage_before
@@ -88,17 +120,176 @@ class Process:
     def fail(self, message, exc_type=AlgorithmLogicError):
         raise exc_type(message, process=self)
 
+    def exit(self):
+        raise InterfaceExit
+
+    def stop(self):
+        raise ProcessStop
+
+    @property
+    def current_memory_usage(self):
+        return self._latest_resource_usage.current_memory_usage
+
+    @property
+    def peak_memory_usage(self):
+        return self._main_section.peak_memory_usage
+
+    @property
+    def time_usage(self):
+        return self._main_section.time_usage
+
+    def _on_resource_usage_values(self, time_usage, peak_memory_usage, current_memory_usage):
+        resource_usage = SandboxProcessInfo(
+            time_usage=float(time_usage),
+            peak_memory_usage=int(peak_memory_usage),
+            current_memory_usage=int(current_memory_usage),
+            error=None,
+        )
+
+        self._latest_resource_usage = resource_usage
+
+        for section in self._running_sections:
+            section._peak_memory_usage = max(
+                section._peak_memory_usage,
+                resource_usage.peak_memory_usage
+            )
+
+    def _needs_sample(self):
+        self._calls_since_sample += 1
+        return self.sampling_interval is not None and self._calls_since_sample >= self.sampling_interval
+
+    def _wall_time_budget(self):
+        # the driver kills the process if it does not answer before the earliest deadline
+        deadlines = [
+            section._wall_time_deadline
+            for section in self._running_sections
+            if section._wall_time_deadline is not None
+        ]
+        if deadlines:
+            return max(0.0, min(deadlines) - time.monotonic())
+        else:
+            return -1.0
+
+    def _set_time_usage_limit(self, section, time_usage_before, time_limit, kill_on_time_limit):
+        if time_limit is not None and kill_on_time_limit:
+            section._time_usage_limit = time_usage_before + time_limit
+
+    def _time_usage_limit(self):
+        # the driver kills the process as soon as its time usage exceeds the lowest limit
+        limits = [
+            section._time_usage_limit
+            for section in self._running_sections
+            if section._time_usage_limit is not None
+        ]
+        if limits:
+            return min(limits)
+        else:
+            return -1.0
+
+    @staticmethod
+    def _error_type(state):
+        if state == DriverState.TIME_LIMIT_EXCEEDED:
+            return TimeLimitExceeded
+        return AlgorithmRuntimeError
+
+    def _call_lines(self, request):
+        yield "call"
+        yield request.method_name
+        yield len(request.arguments)
+        for a in request.arguments:
+            yield from serialize_data(a)
+        yield int(request.has_return_value)
+        yield len(request.callbacks)
+        for c in request.callbacks:
+            yield c.__code__.co_argcount
+
+    def _callback_return_lines(self, return_value):
+        yield "callback_return"
+        if return_value is not None:
+            yield 1
+            yield int(return_value)
+        else:
+            yield 0
+
+    def _send_request_line(self, line):
+        self._usage_sampled = False
+        self._channel.send(line)
+
+    def _send_request_lines(self, lines):
+        self._usage_sampled = False
+        self._channel.send_all(lines)
+
+
+class Process(BaseProcess):
+    def __init__(self, connection, protocol_version=LATEST_PROTOCOL_VERSION, sampling_interval=None):
+        super().__init__(
+            connection.client_channel(),
+            protocol_version=protocol_version,
+            sampling_interval=sampling_interval,
+        )
+
+        self._in_batch = False
+        self._pending_calls = 0
+
+    @contextmanager
+    def section(self, time_limit=None, memory_limit=None, wall_time_limit=None, kill_on_time_limit=False):
+        """
+        Measure the resource usage of the process in this context, and check it against the given limits.
+
+        If kill_on_time_limit is true, the process is killed as soon as it exceeds the time limit,
+        instead of when the section ends, and cannot be used afterwards.
+        The time limit of the main section (given to run) kills the process, unless specified otherwise.
+        """
+        section = self._open_section(wall_time_limit)
+
+        self.sample_usage()
+        self._running_sections.add(section)
+        if wall_time_limit is not None:
+            self._send_wall_time_budget()
+
+        time_usage_before = self._latest_resource_usage.time_usage
+        self._set_time_usage_limit(section, time_usage_before, time_limit, kill_on_time_limit)
+        if section._time_usage_limit is not None:
+            self._send_time_usage_limit()
+        try:
+            yield section
+            self.sample_usage()
+        finally:
+            self._running_sections.remove(section)
+            self._send_limits_of_running_sections(section)
+
+        self._close_section(section, time_usage_before, time_limit, memory_limit)
+
     @contextmanager
-    def _do_run(self, **kwargs):
+    def batch(self):
+        """
+        Pipeline the procedure calls without callbacks made in this context.
+
+        Such calls are sent to the driver without waiting for them to complete.
+        Their errors and resource usage are received at the end of the batch,
+        or as soon as the process needs a response from the driver
+        (e.g., in a function call, a checkpoint or at the end of a section).
+        """
+        in_batch = self._in_batch
+        self._in_batch = True
+        try:
+            yield self
+        finally:
+            self._in_batch = in_batch
+        self._complete_pending_calls()
+
+    @contextmanager
+    def _do_run(self, kill_on_time_limit=True, **kwargs):
+        self._negotiate_protocol()
         self.checkpoint()
         assert self._latest_resource_usage is not None
-        with self.section(**kwargs) as main_section:
+        with self.section(kill_on_time_limit=kill_on_time_limit, **kwargs) as main_section:
             self._main_section = main_section
             try:
                 yield self
-                self._send_exit()
             except InterfaceExit:
-                self._send_exit()
+                pass
+        self._send_exit()
 
     @contextmanager
     def _run(self, **kwargs):
@@ -113,19 +304,8 @@ class Process:
         finally:
             self._send_stop()
 
-    @property
-    def current_memory_usage(self):
-        return self._latest_resource_usage.current_memory_usage
-
-    @property
-    def peak_memory_usage(self):
-        return self._main_section.peak_memory_usage
-
-    @property
-    def time_usage(self):
-        return self._main_section.time_usage
-
     def limit_memory(self, memory_limit):
+        self.sample_usage()
         self.check(
             self.current_memory_usage <= memory_limit,
             f"current memory usage: {self.current_memory_usage / 1024} kB > {memory_limit / 1024} kB",
@@ -133,53 +313,96 @@ class Process:
         )
 
     def _on_resource_usage(self):
-        time_usage = float(self._get_response_line())
-        peak_memory_usage = int(self._get_response_line())
-        current_memory_usage = int(self._get_response_line())
+        self._on_resource_usage_values(*(self._get_response_line() for _ in range(3)))
 
-        resource_usage = SandboxProcessInfo(
-            time_usage=time_usage,
-            peak_memory_usage=peak_memory_usage,
-            current_memory_usage=current_memory_usage,
-            error=None,
-        )
+    def _do_call(self, request):
+        pipelined = self._in_batch and not request.has_return_value and not request.callbacks
+        if not pipelined:
+            self._complete_pending_calls()
 
-        self._latest_resource_usage = resource_usage
+        self._send_request_lines(self._call_lines(request))
 
-        for section in self._running_sections:
-            section._peak_memory_usage = max(
-                section._peak_memory_usage,
-                resource_usage.peak_memory_usage
-            )
+        if pipelined:
+            self._pending_calls += 1
+            if self._pending_calls > MAX_PENDING_CALLS:
+                self._complete_pending_call()
+            return_value = None
+        else:
+            self._accept_callbacks(request.callbacks)
 
-    def _do_call(self, request):
-        for line in self._call_lines(request):
-            self._send_request_line(line)
+            if request.has_return_value:
+                self._wait_ready()
+                return_value = self._get_response_value()
+            else:
+                return_value = None
 
-        self._accept_callbacks(request.callbacks)
+        if self._needs_sample():
+            self.sample_usage()
 
-        if request.has_return_value:
-            self._wait_ready()
-            return self._get_response_value()
-        else:
-            return None
+        return return_value
 
-    def exit(self):
-        raise InterfaceExit
+    def _negotiate_protocol(self):
+        if self._protocol_version is ProtocolVersion.TEXT:
+            return
 
-    def stop(self):
-        raise ProcessStop
+        self._send_request_line("protocol")
+        self._send_request_line(self._protocol_version.value)
+        accepted_version = self._get_response_value()
+        self._channel.switch_protocol(accepted_version)
 
     def checkpoint(self):
+        self._complete_pending_calls()
         self._send_request_line("checkpoint")
         self._wait_ready()
+        self.sample_usage()
+
+    def sample_usage(self):
+        """
+        Ask the driver for the current resource usage of the process.
+
+        The time and memory usage of the process are updated,
+        and the peak memory usage of every running section as well.
+        """
+        self._complete_pending_calls()
+        if not self._usage_sampled:
+            self._send_request_line("usage")
+            self._wait_ready()
+            self._usage_sampled = True
+            self._calls_since_sample = 0
+        return self._latest_resource_usage
+
+    def _send_wall_time_budget(self):
+        self._send_request_line("wall_time")
+        self._send_request_line(self._wall_time_budget())
+
+    def _send_time_usage_limit(self):
+        self._send_request_line("time_limit")
+        self._send_request_line(self._time_usage_limit())
 
     def _send_stop(self):
+        if self._driver_terminated:
+            return
+        self._complete_pending_calls()
         self._send_request_line("stop")
         self._wait_ready()
 
     def _send_exit(self):
+        self._complete_pending_calls()
         self._send_request_line("exit")
+        self._wait_ready()
+
+    def _complete_pending_call(self):
+        try:
+            self._accept_callbacks([])
+        except AlgorithmError:
+            # the driver stops at the first error, so the other calls will never complete
+            self._pending_calls = 0
+            raise
+        self._pending_calls -= 1
+
+    def _complete_pending_calls(self):
+        while self._pending_calls:
+            self._complete_pending_call()
 
     def _accept_callbacks(self, callback_list):
         while True:
@@ -197,28 +420,23 @@ class Process:
             elif response == 0:  # no callbacks
                 break
             else:  # error
-                self._raise_error()
+                self._raise_error(self._error_type(response))
 
     def _on_callback_return(self, return_value):
-        self._send_request_line("callback_return")
-        if return_value is not None:
-            self._send_request_line(1)
-            self._send_request_line(int(return_value))
-        else:
-            self._send_request_line(0)
+        self._send_request_lines(self._callback_return_lines(return_value))
 
     def _get_response_line(self):
-        self._connection.downward.flush()
-        line = self._connection.upward.readline().strip()
-        assert line, "no line received from driver"
+        line = self._channel.receive()
+        assert line is not None, "no line received from driver"
         return line
 
     def _get_response_value(self):
         return int(self._get_response_line())
 
-    def _raise_error(self):
+    def _raise_error(self, exc_type=AlgorithmRuntimeError):
         message = self._get_response_line()
-        self.fail(message, exc_type=AlgorithmRuntimeError)
+        self._driver_terminated = True
+        self.fail(message, exc_type=exc_type)
 
     def _wait_ready(self):
         while True:
@@ -227,22 +445,8 @@ class Process:
                 break
             if state is DriverState.RESOURCE_USAGE:
                 self._on_resource_usage()
-            if state is DriverState.ERROR:
-                self._raise_error()
-
-    def _call_lines(self, request):
-        yield "call"
-        yield request.method_name
-        yield len(request.arguments)
-        for a in request.arguments:
-            yield from serialize_data(a)
-        yield int(request.has_return_value)
-        yield len(request.callbacks)
-        for c in request.callbacks:
-            yield c.__code__.co_argcount
-
-    def _send_request_line(self, line):
-        print(line, file=self._connection.downward)
+            if state is DriverState.ERROR or state is DriverState.TIME_LIMIT_EXCEEDED:
+                self._raise_error(self._error_type(state))
 
 
 CallRequest = namedtuple("CallRequest", ["method_name", "arguments", "has_return_value", "callbacks"])
@@ -1,13 +1,21 @@
+import asyncio
 import logging
 import os
+import socket
 import subprocess
 import threading
 from collections import namedtuple
 from contextlib import ExitStack, contextmanager
 
-from turingarena.driver.client.connection import DriverProcessConnection
+from turingarena.driver.client.asyncprocess import AsyncProcess
+from turingarena.driver.client.connection import DriverProcessConnection, InMemoryDriverConnection
 from turingarena.driver.client.exceptions import InterfaceExit
+from turingarena.driver.client.objectchannel import ObjectQueue
 from turingarena.driver.client.process import Process
+from turingarena.driver.client.protocol import LATEST_PROTOCOL_VERSION
+
+# if set, runs are served by the driver daemon listening on this socket (see turingarena.driver.daemon)
+DRIVER_SOCKET_VARIABLE = "TURINGARENA_DRIVER_SOCKET"
 
 
 class Program(namedtuple("Program", [
@@ -16,37 +24,56 @@ class Program(namedtuple("Program", [
     def _open_pipes(self, stack: ExitStack):
         return [
             stack.enter_context(open(fd, mode))
-            for fd, mode in zip(os.pipe(), ("r", "w"))
+            for fd, mode in zip(os.pipe(), ("rb", "wb"))
         ]
 
     @contextmanager
-    def _run_server_in_thread(self, downward_tee, upward_tee):
+    def _run_server_in_thread(self, downward_tee, upward_tee, in_memory=True):
         with ExitStack() as stack:
-            client_upward, server_upward = self._open_pipes(stack)
-            server_downward, client_downward = self._open_pipes(stack)
+            if in_memory:
+                # no need to encode values, as both ends are in this interpreter
+                server_connection = client_connection = InMemoryDriverConnection(
+                    upward=ObjectQueue(),
+                    downward=ObjectQueue(),
+                )
+            else:
+                client_upward, server_upward = self._open_pipes(stack)
+                server_downward, client_downward = self._open_pipes(stack)
+                server_connection = DriverProcessConnection(
+                    upward=server_upward,
+                    downward=server_downward,
+                )
+                client_connection = DriverProcessConnection(
+                    upward=client_upward,
+                    downward=client_downward,
+                )
 
             def server_thread():
                 try:
                     from turingarena.driver.server import run_server
-                    run_server(DriverProcessConnection(
-                        upward=server_upward,
-                        downward=server_downward,
-                    ), self.source_path, self.interface_path, downward_tee=downward_tee, upward_tee=upward_tee)
+                    run_server(
+                        server_connection,
+                        self.source_path,
+                        self.interface_path,
+                        downward_tee=downward_tee,
+                        upward_tee=upward_tee,
+                    )
 
                     logging.debug("driver server terminated")
                 except Exception as e:
                     logging.exception(f"server terminated with exception")
                 finally:
-                    server_upward.close()
-                    server_downward.close()
+                    server_connection.upward.close()
+                    server_connection.downward.close()
 
             thread = threading.Thread(target=server_thread)
             thread.start()
 
-            yield DriverProcessConnection(
-                upward=client_upward,
-                downward=client_downward,
-            )
+            try:
+                yield client_connection
+            finally:
+                # let the driver see the end of the requests, in any case
+                client_connection.downward.close()
 
             stack.callback(thread.join)
 
@@ -64,18 +91,173 @@ class Program(namedtuple("Program", [
                 ],
                 stdin=subprocess.PIPE,
                 stdout=subprocess.PIPE,
-                universal_newlines=True,
         ) as p:
             yield DriverProcessConnection(
                 downward=p.stdin,
                 upward=p.stdout,
             )
 
+    def _run_request(self, downward_tee, upward_tee):
+        # first thing sent to the daemon, see turingarena.driver.daemon
+        return "".join(
+            f"{os.path.abspath(path)}\n"
+            for path in [self.source_path, self.interface_path, downward_tee, upward_tee]
+        ).encode()
+
     @contextmanager
-    def run(self, downward_tee="/dev/null", upward_tee="/dev/null", **kwargs):
+    def _run_server_in_daemon(self, socket_path, downward_tee, upward_tee):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.connect(socket_path)
+            with s.makefile("rb") as upward, s.makefile("wb") as downward:
+                # sent together with the first request to the driver
+                downward.write(self._run_request(downward_tee, upward_tee))
+                yield DriverProcessConnection(
+                    upward=upward,
+                    downward=downward,
+                )
+
+    @staticmethod
+    def _get_daemon_socket(daemon_socket):
+        if daemon_socket is None:
+            daemon_socket = os.environ.get(DRIVER_SOCKET_VARIABLE, None)
+        return daemon_socket
+
+    def _run_server(self, downward_tee, upward_tee, daemon_socket, in_memory):
+        daemon_socket = self._get_daemon_socket(daemon_socket)
+        if daemon_socket is not None:
+            return self._run_server_in_daemon(daemon_socket, downward_tee, upward_tee)
+        else:
+            return self._run_server_in_thread(downward_tee, upward_tee, in_memory=in_memory)
+
+    @contextmanager
+    def run(
+            self,
+            downward_tee="/dev/null",
+            upward_tee="/dev/null",
+            protocol_version=None,
+            sampling_interval=None,
+            daemon_socket=None,
+            in_memory=None,
+            **kwargs,
+    ):
+        """
+        Run the program, and yield a Process to drive it.
+
+        The driver runs in the daemon listening on daemon_socket, if given (or configured),
+        and in a thread otherwise. In the latter case, values are passed to the driver
+        without encoding them, unless in_memory is false: then, they are sent through pipes,
+        using protocol_version (the latest one, if not given).
+        By default, in_memory is true unless protocol_version is given, and giving both is an error,
+        as values passed in memory are not encoded with any protocol.
+        """
+        if in_memory is None:
+            in_memory = protocol_version is None
+        elif in_memory and protocol_version is not None:
+            raise ValueError("protocol_version cannot be used with in_memory")
+        if protocol_version is None:
+            protocol_version = LATEST_PROTOCOL_VERSION
+
         with ExitStack() as stack:
-            driver_connection = stack.enter_context(self._run_server_in_thread(downward_tee, upward_tee))
+            driver_connection = stack.enter_context(
+                self._run_server(downward_tee, upward_tee, daemon_socket, in_memory)
+            )
 
-            process = Process(driver_connection)
+            process = Process(
+                driver_connection,
+                protocol_version=protocol_version,
+                sampling_interval=sampling_interval,
+            )
             with process._run(**kwargs):
                 yield process
+
+    def run_async(
+            self,
+            downward_tee="/dev/null",
+            upward_tee="/dev/null",
+            protocol_version=LATEST_PROTOCOL_VERSION,
+            sampling_interval=None,
+            daemon_socket=None,
+            **kwargs,
+    ):
+        """
+        Same as run, but to be used with `async with`, and yields an AsyncProcess.
+
+        The driver still runs in its own thread (or in the daemon),
+        but many processes can be driven concurrently from the same event loop.
+        """
+        return _AsyncProgramRun(
+            program=self,
+            tees=(downward_tee, upward_tee),
+            daemon_socket=self._get_daemon_socket(daemon_socket),
+            process_args=dict(protocol_version=protocol_version, sampling_interval=sampling_interval),
+            section_args=kwargs,
+        )
+
+
+class _AsyncProgramRun:
+    def __init__(self, program, tees, daemon_socket, process_args, section_args):
+        self.program = program
+        self.tees = tees
+        self.daemon_socket = daemon_socket
+        self.process_args = process_args
+        self.section_args = section_args
+
+        self.stack = ExitStack()
+        self.transports = []
+        self.process = None
+        self.main_section = None
+
+    async def __aenter__(self):
+        try:
+            if self.daemon_socket is not None:
+                reader, writer = await asyncio.open_unix_connection(self.daemon_socket)
+                writer.write(self.program._run_request(*self.tees))
+                self.transports = [writer.transport]
+            else:
+                driver_connection = self.stack.enter_context(
+                    self.program._run_server_in_thread(*self.tees, in_memory=False)
+                )
+                reader, writer, self.transports = await _open_streams(driver_connection)
+
+            self.process = AsyncProcess(reader, writer, **self.process_args)
+            try:
+                self.main_section = await self.process._start(**self.section_args)
+            except:
+                await self.process._send_stop()
+                raise
+        except:
+            await self._close()
+            raise
+        return self.process
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        try:
+            return await self.process._finish(self.main_section, exc_type, exc_value, traceback)
+        finally:
+            await self._close()
+
+    async def _close(self):
+        # transports must be closed from the event loop, closing them also closes the pipes
+        for transport in self.transports:
+            transport.close()
+        # waits for the driver thread to terminate
+        await asyncio.get_event_loop().run_in_executor(None, self.stack.close)
+
+
+async def _open_streams(driver_connection):
+    # streams over the pipes of a driver running in a thread
+    loop = asyncio.get_event_loop()
+
+    reader = asyncio.StreamReader()
+    read_transport, _ = await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader),
+        driver_connection.upward,
+    )
+
+    write_transport, protocol = await loop.connect_write_pipe(
+        lambda: asyncio.StreamReaderProtocol(asyncio.StreamReader()),
+        driver_connection.downward,
+    )
+    writer = asyncio.StreamWriter(write_transport, protocol, None, loop)
+
+    return reader, writer, [read_transport, write_transport]
@@ -0,0 +1,326 @@
+import asyncio
+import io
+import struct
+import sys
+from array import array
+from enum import IntEnum
+
+
+class ProtocolVersion(IntEnum):
+    TEXT = 0
+    BINARY = 1
+
+
+LATEST_PROTOCOL_VERSION = ProtocolVersion.BINARY
+
+
+class TextProtocol:
+    """
+    Original line-based protocol: every value is written on its own line, in decimal.
+    Values are always received as strings.
+    """
+
+    __slots__ = []
+
+    def write(self, output, value):
+        output.write(f"{value}\n".encode())
+
+    def write_all(self, output, values):
+        output.write("".join(
+            f"{item}\n"
+            for value in values
+            for item in (value if isinstance(value, array) else (value,))
+        ).encode())
+
+    def read(self, input):
+        return self._decode_line(input.readline())
+
+    def read_array(self, input, size):
+        return self._decode_lines([input.readline() for _ in range(size)])
+
+    async def read_async(self, input):
+        return self._decode_line(await input.readline())
+
+    async def read_array_async(self, input, size):
+        return self._decode_lines([await input.readline() for _ in range(size)])
+
+    @staticmethod
+    def _decode_line(line):
+        if not line:
+            return None
+        return line.decode().strip()
+
+    @staticmethod
+    def _decode_lines(lines):
+        if lines and not lines[-1]:
+            return None
+        return array("q", map(int, lines))
+
+
+# frame tags
+INTS = 0
+FLOAT = 1
+STRING = 2
+# a single integer out of the range of INTS frames, in decimal digits
+DECIMAL = 3
+
+# every frame starts with a fixed-width header: a tag byte, and the payload size,
+# which is a number of integers for INTS frames, and a number of bytes for STRING and DECIMAL frames
+FRAME_HEADER = struct.Struct("<BI")
+FLOAT_PAYLOAD = struct.Struct("<d")
+
+# integers in INTS frames are packed as 8-byte little-endian values
+INT_SIZE = 8
+assert array("q").itemsize == INT_SIZE
+NEEDS_BYTESWAP = sys.byteorder != "little"
+INT_RANGE = range(-2 ** 63, 2 ** 63)
+
+
+class BinaryProtocol:
+    """
+    Length-prefixed binary protocol.
+
+    Consecutive integers are packed together in a single frame,
+    so that a whole request (or response) is usually sent with one write, and parsed with one call.
+    Values are received either one at a time, with their original type, or in bulk as integer arrays.
+    """
+
+    __slots__ = ["_values", "_position"]
+
+    def __init__(self):
+        self._values = ()
+        self._position = 0
+
+    def write(self, output, value):
+        self.write_all(output, (value,))
+
+    def write_all(self, output, values):
+        values = list(values)
+        try:
+            # fast path: only integers
+            ints = array("q", values)
+        except (TypeError, OverflowError):
+            pass
+        else:
+            self._write_ints(output, ints)
+            return
+
+        ints = array("q")
+        for value in values:
+            if isinstance(value, int) and value in INT_RANGE:
+                ints.append(value)
+                continue
+            self._write_ints(output, ints)
+            ints = array("q")
+            if isinstance(value, int):
+                data = str(value).encode()
+                output.write(FRAME_HEADER.pack(DECIMAL, len(data)) + data)
+            elif isinstance(value, array):
+                # packed arrays travel in their own frame, and can be received without copying
+                self._write_ints(output, value)
+            elif isinstance(value, str):
+                data = value.encode()
+                output.write(FRAME_HEADER.pack(STRING, len(data)) + data)
+            elif isinstance(value, float):
+                output.write(FRAME_HEADER.pack(FLOAT, 1) + FLOAT_PAYLOAD.pack(value))
+            else:
+                raise TypeError(f"cannot send value of type {type(value).__name__}")
+        self._write_ints(output, ints)
+
+    @staticmethod
+    def _write_ints(output, ints):
+        if not ints:
+            return
+        if NEEDS_BYTESWAP:
+            ints = array("q", ints)
+            ints.byteswap()
+        output.write(FRAME_HEADER.pack(INTS, len(ints)))
+        output.write(ints)
+
+    def read(self, input):
+        if self._position == len(self._values):
+            if not self._read_frame(input):
+                return None
+        value = self._values[self._position]
+        self._position += 1
+        return value
+
+    def read_array(self, input, size):
+        result = array("q")
+        while len(result) < size:
+            if self._position == len(self._values):
+                if not self._read_frame(input):
+                    return None
+            result = self._take_ints(result, size)
+        return result
+
+    async def read_async(self, input):
+        if self._position == len(self._values):
+            if not await self._read_frame_async(input):
+                return None
+        value = self._values[self._position]
+        self._position += 1
+        return value
+
+    async def read_array_async(self, input, size):
+        result = array("q")
+        while len(result) < size:
+            if self._position == len(self._values):
+                if not await self._read_frame_async(input):
+                    return None
+            result = self._take_ints(result, size)
+        return result
+
+    def _take_ints(self, result, size):
+        values = self._values
+        if not isinstance(values, array):
+            raise ValueError(f"expecting integers, got {values[self._position]!r}")
+
+        missing = size - len(result)
+        if not result and self._position == 0 and len(values) == missing:
+            # the whole frame is the requested array, no need to copy it
+            self._position = len(values)
+            return values
+
+        chunk = values[self._position:self._position + missing]
+        self._position += len(chunk)
+        result.extend(chunk)
+        return result
+
+    def _read_frame(self, input):
+        header = input.read(FRAME_HEADER.size)
+        if len(header) < FRAME_HEADER.size:
+            return False
+
+        tag, size = FRAME_HEADER.unpack(header)
+        self._set_frame(tag, input.read(self._payload_size(tag, size)))
+        return True
+
+    async def _read_frame_async(self, input):
+        try:
+            header = await input.readexactly(FRAME_HEADER.size)
+        except asyncio.IncompleteReadError:
+            return False
+
+        tag, size = FRAME_HEADER.unpack(header)
+        self._set_frame(tag, await input.readexactly(self._payload_size(tag, size)))
+        return True
+
+    @staticmethod
+    def _payload_size(tag, size):
+        if tag == INTS:
+            return INT_SIZE * size
+        if tag == STRING or tag == DECIMAL:
+            return size
+        if tag == FLOAT:
+            return FLOAT_PAYLOAD.size
+        raise ValueError(f"invalid frame tag: {tag}")
+
+    def _set_frame(self, tag, payload):
+        if tag == INTS:
+            values = array("q")
+            values.frombytes(payload)
+            if NEEDS_BYTESWAP:
+                values.byteswap()
+        elif tag == STRING:
+            values = [payload.decode()]
+        elif tag == DECIMAL:
+            values = [int(payload)]
+        else:
+            values = FLOAT_PAYLOAD.unpack(payload)
+
+        self._values = values
+        self._position = 0
+
+
+PROTOCOLS = {
+    ProtocolVersion.TEXT: TextProtocol,
+    ProtocolVersion.BINARY: BinaryProtocol,
+}
+
+
+class DriverChannel:
+    """
+    One end of the communication between driver client and driver server.
+
+    Wraps a pair of binary streams, and encodes values with the protocol currently in use.
+    Every channel starts with the text protocol, and switches protocol after negotiation.
+    """
+
+    __slots__ = ["input", "output", "protocol_version", "protocol", "_pending"]
+
+    def __init__(self, input, output):
+        self.input = input
+        self.output = output
+        self._pending = False
+        self.switch_protocol(ProtocolVersion.TEXT)
+
+    def switch_protocol(self, version):
+        self.protocol_version = ProtocolVersion(version)
+        self.protocol = PROTOCOLS[self.protocol_version]()
+
+    def send(self, value):
+        self.protocol.write(self.output, value)
+        self._pending = True
+
+    def send_all(self, values):
+        self.protocol.write_all(self.output, values)
+        self._pending = True
+
+    def receive(self):
+        self.flush()
+        return self.protocol.read(self.input)
+
+    def receive_array(self, size):
+        self.flush()
+        return self.protocol.read_array(self.input, size)
+
+    def flush(self):
+        # avoid a syscall per received value when nothing was sent in between
+        if self._pending:
+            self.output.flush()
+            self._pending = False
+
+
+class AsyncDriverChannel:
+    """
+    Client end of the communication with the driver, over asyncio streams.
+
+    Same as DriverChannel, except that values are received with coroutines.
+    Values sent are buffered, and written to the stream just before receiving.
+    """
+
+    __slots__ = ["reader", "writer", "protocol_version", "protocol", "_buffer"]
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self._buffer = io.BytesIO()
+        self.switch_protocol(ProtocolVersion.TEXT)
+
+    def switch_protocol(self, version):
+        self.protocol_version = ProtocolVersion(version)
+        self.protocol = PROTOCOLS[self.protocol_version]()
+
+    def send(self, value):
+        self.protocol.write(self._buffer, value)
+
+    def send_all(self, values):
+        self.protocol.write_all(self._buffer, values)
+
+    async def receive(self):
+        await self.flush()
+        return await self.protocol.read_async(self.reader)
+
+    async def receive_array(self, size):
+        await self.flush()
+        return await self.protocol.read_array_async(self.reader, size)
+
+    async def flush(self):
+        data = self._buffer.getvalue()
+        if not data:
+            return
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self.writer.write(data)
+        await self.writer.drain()
@@ -40,6 +40,9 @@ class InterfaceAnalyzer:
                 if isinstance(a, ReferenceResolution):
                     yield a._replace(reference=reference)
 
+    def _get_reference_actions_ReadLoop(self, n):
+        return self.reference_actions(n.loop)
+
     def _get_reference_actions_Call(self, n):
         for p in n.arguments:
             yield ReferenceResolution(p)
@@ -80,6 +83,50 @@ class InterfaceAnalyzer:
     def _create_reference_definition_object(self, e):
         return None
 
+    def read_loop_arguments(self, n):
+        """
+        Return the arguments of the read, if the given for loop is a read loop (see ReadLoop),
+        otherwise None.
+        """
+        return self._indexed_loop_arguments(n, Read)
+
+    def write_loop_arguments(self, n):
+        """
+        Return the arguments of the write, if the given for loop only writes elements
+        indexed by the loop variable (see WriteLoop), otherwise None.
+        """
+        return self._indexed_loop_arguments(n, Write)
+
+    def _indexed_loop_arguments(self, n, statement_type):
+        children = n.body.children
+        if len(children) != 1 or not isinstance(children[0], statement_type):
+            return None
+
+        [statement] = children
+        index = n.index.variable
+        for a in statement.arguments:
+            if not isinstance(a, Subscript) or a.index != index:
+                return None
+            if self.uses_variable(a.array, index):
+                return None
+        return statement.arguments
+
+    @visitormethod
+    def uses_variable(self, e, variable):
+        pass
+
+    def uses_variable_Variable(self, e, variable):
+        return e == variable
+
+    def uses_variable_Subscript(self, e, variable):
+        return self.uses_variable(e.array, variable) or self.uses_variable(e.index, variable)
+
+    def uses_variable_IntLiteral(self, e, variable):
+        return False
+
+    def uses_variable_Operation(self, e, variable):
+        return any(self.uses_variable(o, variable) for o in e.operands)
+
     @visitormethod
     def is_reference(self, e):
         pass
@@ -91,6 +138,9 @@ class InterfaceAnalyzer:
         # FIXME: we should check that the index is the one expected (should we?)
         return self.is_reference(e.array) and isinstance(e.index, Variable)
 
+    def is_reference_Operation(self, e):
+        return False
+
     def variable_declarations(self, n):
         return frozenset(self._get_variable_declarations(n))
 
@@ -1,9 +1,14 @@
+from turingarena.driver.common.nodes import Operation
+from turingarena.driver.common.operations import CONDITION_OPERATORS, LOGICAL_OPERATORS
 from turingarena.util.visitor import Visitor
 
 
 class AbstractExpressionCodeGen(Visitor):
     __slots__ = []
 
+    # code of && and ||, in languages where it is different
+    logical_operators = {}
+
     def visit_Subscript(self, e):
         return f"{self.visit(e.array)}[{self.visit(e.index)}]"
 
@@ -12,3 +17,31 @@ class AbstractExpressionCodeGen(Visitor):
 
     def visit_IntLiteral(self, e):
         return str(e.value)
+
+    def visit_Operation(self, e):
+        if e.operator in CONDITION_OPERATORS:
+            return self.int_from_condition(self.condition(e))
+        if len(e.operands) == 1:
+            [operand] = e.operands
+            return f"({e.operator}{self.visit(operand)})"
+        left, right = e.operands
+        return f"({self.visit(left)} {e.operator} {self.visit(right)})"
+
+    def condition(self, e):
+        """
+        Code of a condition (e.g., of an if) which is true if the given expression is not zero.
+        """
+        if not isinstance(e, Operation) or e.operator not in CONDITION_OPERATORS:
+            return f"{self.visit(e)} != 0"
+
+        left, right = e.operands
+        if e.operator in LOGICAL_OPERATORS:
+            operator = self.logical_operators.get(e.operator, e.operator)
+            return f"({self.condition(left)}) {operator} ({self.condition(right)})"
+        return f"{self.visit(left)} {e.operator} {self.visit(right)}"
+
+    def int_from_condition(self, condition):
+        """
+        Code of the integer value (0 or 1) of a condition, as in C.
+        """
+        return f"({condition})"
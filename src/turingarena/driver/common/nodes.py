@@ -8,6 +8,8 @@ Subscript = namedtuple("Subscript", [
     "array",
     "index",
 ])
+# operator applied to one (negation) or two operands, see turingarena.driver.common.operations
+Operation = namedtuple("Operation", ["operator", "operands"])
 
 # compiled statements
 
@@ -55,3 +57,9 @@ Switch = namedtuple("Switch", ["value", "cases"])
 Case = namedtuple("Case", ["labels", "body"])
 
 Exit = namedtuple("Exit", [])
+
+# statements introduced when preprocessing
+
+# a for loop whose body only reads elements indexed by the loop variable,
+# e.g., `for i to n { read a[i], b[i]; }`, with the arguments of the read
+ReadLoop = namedtuple("ReadLoop", ["loop", "arguments"])
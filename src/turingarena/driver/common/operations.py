@@ -0,0 +1,112 @@
+"""
+Operations in the expressions of an interface (see Operation), with the semantics of C:
+values are integers, conditions are true if not zero, and the result of a comparison
+or of a logical operator is 0 or 1. The second operand of && and || is evaluated only if needed.
+"""
+
+import operator
+
+ARITHMETIC_OPERATORS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+}
+
+COMPARISON_OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+LOGICAL_OPERATORS = {"&&", "||"}
+
+# operators whose result is a condition, that is, a boolean in most languages
+CONDITION_OPERATORS = LOGICAL_OPERATORS | set(COMPARISON_OPERATORS)
+
+
+def evaluate_operation(op, values):
+    """
+    Compute an operation on the given values (e.g., to fold an operation on literals).
+    """
+    return operation_function(op, [_constant(v) for v in values])(None)
+
+
+def _constant(value):
+    return lambda state: value
+
+
+def operation_function(op, functions):
+    """
+    Compile an operation into a function of a state (e.g., the values assigned so far),
+    given the functions computing its operands from the same state.
+
+    An operand whose value is not known yet is None: then, the result is also None.
+    An operation with a single operand is a negation.
+    """
+
+    if len(functions) == 1:
+        [f] = functions
+
+        def negation(state):
+            value = f(state)
+            if value is None:
+                return None
+            return -value
+
+        return negation
+
+    left, right = functions
+
+    if op == "&&":
+        def logical_and(state):
+            a = left(state)
+            if a is None:
+                return None
+            if not a:
+                return 0
+            b = right(state)
+            if b is None:
+                return None
+            return int(b != 0)
+
+        return logical_and
+
+    if op == "||":
+        def logical_or(state):
+            a = left(state)
+            if a is None:
+                return None
+            if a:
+                return 1
+            b = right(state)
+            if b is None:
+                return None
+            return int(b != 0)
+
+        return logical_or
+
+    if op in COMPARISON_OPERATORS:
+        compare = COMPARISON_OPERATORS[op]
+
+        def comparison(state):
+            a = left(state)
+            b = right(state)
+            if a is None or b is None:
+                return None
+            return int(compare(a, b))
+
+        return comparison
+
+    compute = ARITHMETIC_OPERATORS[op]
+
+    def arithmetic(state):
+        a = left(state)
+        b = right(state)
+        if a is None or b is None:
+            return None
+        return compute(a, b)
+
+    return arithmetic
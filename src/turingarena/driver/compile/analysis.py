@@ -1,19 +1,9 @@
-from collections import namedtuple
-
-from turingarena.driver.compile.context import CompilationContext
+from turingarena.driver.compile.context import CompilationContext, ReferenceDefinition, ReferenceResolution
 from turingarena.driver.compile.diagnostics import *
 from turingarena.util.visitor import visitormethod
 
 
 class CompileAnalyzer(CompilationContext):
-    @property
-    def reference_definitions(self):
-        return {
-            a.reference: a
-            for a in self.prev_reference_actions
-            if isinstance(a, ReferenceDefinition)
-        }
-
     @visitormethod
     def dimensions(self, e) -> int:
         pass
@@ -37,6 +27,9 @@ class CompileAnalyzer(CompilationContext):
                 return 0
             return array_dimensions - 1
 
+    def dimensions_Operation(self, e):
+        return 0
+
     @visitormethod
     def is_defined(self, e) -> bool:
         pass
@@ -53,6 +46,5 @@ class CompileAnalyzer(CompilationContext):
                 or self.is_defined(e.array)
         )
 
-
-ReferenceDefinition = namedtuple("ReferenceDefinition", ["reference", "dimensions"])
-ReferenceResolution = namedtuple("ReferenceResolution", ["reference"])
+    def is_defined_Operation(self, e):
+        return all(self.is_defined(o) for o in e.operands)
@@ -4,10 +4,12 @@ from functools import partial
 
 from turingarena.driver.common.analysis import InterfaceAnalyzer
 from turingarena.driver.common.nodes import *
+from turingarena.driver.common.operations import evaluate_operation
 from turingarena.driver.compile.analysis import CompileAnalyzer, ReferenceDefinition, ReferenceResolution
 from turingarena.driver.compile.diagnostics import *
 from turingarena.driver.compile.parser import parse_interface
 from turingarena.driver.compile.postprocess import CompilationPostprocessor
+from turingarena.driver.compile.symbols import SymbolTable
 from turingarena.util.visitor import classvisitormethod
 
 STATEMENT_CLASSES = {
@@ -31,6 +33,11 @@ EXPRESSION_CLASSES = {
     "int_literal": IntLiteral,
     "subscript": Subscript,
     "variable": Variable,
+    "or": Operation,
+    "and": Operation,
+    "comparison": Operation,
+    "sum": Operation,
+    "mul": Operation,
 }
 
 
@@ -69,6 +76,7 @@ class Compiler(CompileAnalyzer, InterfaceAnalyzer, CompilationPostprocessor):
         compiler = self._replace(
             constants=(),
             methods=(),
+            methods_by_name=SymbolTable.create(),
         )
 
         for c in ast.constants_declarations:
@@ -85,7 +93,7 @@ class Compiler(CompileAnalyzer, InterfaceAnalyzer, CompilationPostprocessor):
             constants=compiler.constants,
             methods=compiler.methods,
             main=compiler._replace(
-                prev_reference_actions=(),
+                reference_definitions=SymbolTable.create(),
                 index_variables=(),
                 in_loop=None,
             ).with_reference_actions(
@@ -362,6 +370,8 @@ class Compiler(CompileAnalyzer, InterfaceAnalyzer, CompilationPostprocessor):
             for i in ast.indices:
                 new_ast = SubscriptAst("subscript", new_ast, i)
             ast = new_ast
+        if ast.expression_type == "nested":
+            return self._preprocess_expression_ast(ast.expression)
         return ast
 
     def _on_compile_IntLiteral(self, cls, ast):
@@ -372,6 +382,49 @@ class Compiler(CompileAnalyzer, InterfaceAnalyzer, CompilationPostprocessor):
 
         return cls(value=int(ast.int_literal))
 
+    def _on_compile_Operation(self, cls, ast):
+        self.check(
+            self.expression_type is ExpressionType.VALUE,
+            InvalidReference(expression=Snippet(ast)),
+        )
+
+        operands = [
+            self._replace(expression_type=None).scalar(o)
+            for o in ast.operands
+        ]
+        operators = self._operators(ast)
+
+        # a leading sign, as in `-a + b`
+        if len(operators) == len(operands):
+            sign, *operators = operators
+            if sign == "-":
+                operands[0] = self._fold(cls(sign, (operands[0],)))
+
+        # operators are left-associative
+        [e, *others] = operands
+        for operator, operand in zip(operators, others):
+            e = self._fold(cls(operator, (e, operand)))
+        return e
+
+    def _operators(self, ast):
+        if ast.expression_type == "or":
+            return ["||"] * (len(ast.operands) - 1)
+        if ast.expression_type == "and":
+            return ["&&"] * (len(ast.operands) - 1)
+        if ast.expression_type == "mul":
+            return ["*"] * (len(ast.operands) - 1)
+        if ast.expression_type == "comparison":
+            return list(ast.operators)
+        if isinstance(ast.signs, str):
+            # only one sign
+            return [ast.signs]
+        return list(ast.signs)
+
+    def _fold(self, e):
+        if all(isinstance(o, IntLiteral) for o in e.operands):
+            return IntLiteral(evaluate_operation(e.operator, [o.value for o in e.operands]))
+        return e
+
     def _on_compile_Variable(self, cls, ast):
         return cls(ast.variable_name)
 
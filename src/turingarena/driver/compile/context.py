@@ -1,11 +1,17 @@
 from collections import namedtuple
 
+from turingarena.driver.compile.symbols import SymbolTable
+
+ReferenceDefinition = namedtuple("ReferenceDefinition", ["reference", "dimensions"])
+ReferenceResolution = namedtuple("ReferenceResolution", ["reference"])
+
 
 class CompilationContext(namedtuple("Compiler", [
     "constants",
     "methods",
+    "methods_by_name",
     "in_callback",
-    "prev_reference_actions",
+    "reference_definitions",
     "index_variables",
     "in_loop",
     "expression_type",
@@ -16,18 +22,15 @@ class CompilationContext(namedtuple("Compiler", [
         return cls(
             constants=None,
             methods=None,
+            methods_by_name=None,
             in_callback=False,
-            prev_reference_actions=None,
+            reference_definitions=None,
             index_variables=None,
             in_loop=None,
             expression_type=None,
             diagnostics=[],
         )
 
-    @property
-    def methods_by_name(self):
-        return {m.name: m for m in self.methods}
-
     def with_index_variable(self, variable):
         return self._replace(
             index_variables=self.index_variables + (variable,),
@@ -40,7 +43,10 @@ class CompilationContext(namedtuple("Compiler", [
         return self._replace(constants=self.constants + (declaration,))
 
     def with_method(self, method):
-        return self._replace(methods=self.methods + (method,))
+        return self._replace(
+            methods=self.methods + (method,),
+            methods_by_name=self.methods_by_name.with_item(method.name, method),
+        )
 
     def with_reference_actions(self, actions):
         actions = tuple(actions)
@@ -49,5 +55,9 @@ class CompilationContext(namedtuple("Compiler", [
             for a in actions
         )
         return self._replace(
-            prev_reference_actions=self.prev_reference_actions + actions
+            reference_definitions=self.reference_definitions.with_items(
+                (a.reference, a)
+                for a in actions
+                if isinstance(a, ReferenceDefinition)
+            ),
         )
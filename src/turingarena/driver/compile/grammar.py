@@ -59,7 +59,7 @@ grammar_ebnf = r"""
         | comparison_expression
         ;
     comparison_expression =
-        | expression_type:`comparison` operands:sum_expression { operators+:('=='|'!='|'<'|'<='|'>'|'>=') operands:sum_expression }+
+        | expression_type:`comparison` operands:sum_expression { operators+:('=='|'!='|'<='|'<'|'>='|'>') operands:sum_expression }+
         | sum_expression
         ;
     sum_expression = 
@@ -1,20 +1,453 @@
-import logging
-from functools import lru_cache
+"""
+Parser of interfaces.
+
+Hand-written recursive-descent parser for the grammar in turingarena.driver.compile.grammar,
+producing the same AST that TatSu would produce from it (with asmodel=False and parseinfo=True),
+without compiling the grammar at runtime.
 
-import tatsu
+Each rule is a method of InterfaceParser, with the same name.
+As in a PEG parser, alternatives are tried in order, backtracking if one fails.
+"""
 
-from turingarena.driver.compile.grammar import grammar_ebnf
+import bisect
+import logging
+import re
+from collections import namedtuple
 
 logger = logging.getLogger(__name__)
 
+WHITESPACE_PATTERN = re.compile(r"(?:\s+|/\*(?:(?!\*/).)*\*/|//.*$)*", re.MULTILINE)
+IDENTIFIER_PATTERN = re.compile(r"[a-zA-Z_][0-9a-zA-Z_]*")
+INT_LITERAL_PATTERN = re.compile(r"0|-?[1-9][0-9]*")
+
+LineInfo = namedtuple("LineInfo", ["filename", "line", "col", "start", "end", "text"])
+
+
+class InterfaceSyntaxError(Exception):
+    pass
+
+
+class ParseBuffer:
+    __slots__ = ["text", "_line_starts"]
+
+    def __init__(self, text):
+        self.text = text
+        self._line_starts = None
+
+    def line_info(self, pos):
+        if self._line_starts is None:
+            self._line_starts = [0] + [m.end() for m in re.finditer("\n", self.text)]
+        line = bisect.bisect_right(self._line_starts, pos) - 1
+        start = self._line_starts[line]
+        if line + 1 < len(self._line_starts):
+            end = self._line_starts[line + 1]
+        else:
+            end = len(self.text)
+        return LineInfo(
+            filename="",
+            line=line,
+            col=pos - start,
+            start=start,
+            end=end,
+            text=self.text[start:end],
+        )
+
+
+class ParseInfo(namedtuple("ParseInfo", ["buffer", "rule", "pos", "endpos"])):
+    __slots__ = []
+
+    @property
+    def line(self):
+        return self.buffer.line_info(self.pos).line
+
+    @property
+    def endline(self):
+        return self.buffer.line_info(self.endpos).line
+
+    def text_lines(self):
+        start = self.buffer.line_info(self.pos).start
+        end = self.buffer.line_info(self.endpos).end
+        return self.buffer.text[start:end].splitlines(keepends=True)
+
+
+class Ast(dict):
+    """
+    Node of the AST: a dict whose items are also accessible as attributes (None if missing).
+    """
+
+    __slots__ = []
+
+    def __getattr__(self, name):
+        return self.get(name)
+
+
+class ParseFailed(Exception):
+    """Raised by a rule which does not match, to backtrack."""
+
+
+class InterfaceParser:
+    def __init__(self, text):
+        self.buffer = ParseBuffer(text)
+        self.text = text
+        self.pos = 0
+        # furthest position where a token was expected, and the tokens expected there, for error messages
+        self.error_pos = 0
+        self.expected = set()
+
+    def parse(self):
+        try:
+            return self.interface()
+        except ParseFailed:
+            line_info = self.buffer.line_info(self.error_pos)
+            expected = ", ".join(sorted(self.expected))
+            raise InterfaceSyntaxError(
+                f"line {line_info.line + 1}, column {line_info.col + 1}: expecting {expected}\n"
+                f"{line_info.text.rstrip()}\n"
+                f"{' ' * line_info.col}^"
+            ) from None
+
+    # primitives
+
+    def fail(self, pos, *expected):
+        if pos > self.error_pos:
+            self.error_pos = pos
+            self.expected = set()
+        if pos == self.error_pos:
+            self.expected.update(expected)
+        raise ParseFailed
+
+    def skip(self):
+        self.pos = WHITESPACE_PATTERN.match(self.text, self.pos).end()
+        return self.pos
+
+    def token(self, *tokens):
+        """
+        Match the first of the given tokens found (a keyword must not be followed by other name characters).
+        """
+        pos = self.skip()
+        for token in tokens:
+            end = pos + len(token)
+            if not self.text.startswith(token, pos):
+                continue
+            if token[-1].isalnum() and end < len(self.text) and self._is_name_char(self.text[end]):
+                continue
+            self.pos = end
+            return token
+        self.fail(pos, *map(repr, tokens))
+
+    @staticmethod
+    def _is_name_char(c):
+        return c.isalnum() or c == "_"
+
+    def pattern(self, regex, name):
+        pos = self.skip()
+        match = regex.match(self.text, pos)
+        if match is None:
+            self.fail(pos, name)
+        self.pos = match.end()
+        return match.group()
+
+    def end_of_text(self):
+        pos = self.skip()
+        if pos < len(self.text):
+            self.fail(pos, "end of text")
+
+    def option(self, rule, *args):
+        pos = self.pos
+        try:
+            return rule(*args)
+        except ParseFailed:
+            self.pos = pos
+            return None
+
+    def closure(self, rule, *args):
+        items = []
+        while True:
+            pos = self.pos
+            try:
+                item = rule(*args)
+            except ParseFailed:
+                self.pos = pos
+                return items
+            items.append(item)
+
+    def positive_closure(self, rule, *args):
+        return [rule(*args)] + self.closure(rule, *args)
+
+    def gather(self, rule, separator):
+        first = self.option(rule)
+        if first is None:
+            return []
+        return [first] + self.closure(self._separated, rule, separator)
+
+    def positive_gather(self, rule, separator):
+        return [rule()] + self.closure(self._separated, rule, separator)
+
+    def _separated(self, rule, separator):
+        self.token(separator)
+        return rule()
+
+    def node(self, rule, start, **fields):
+        return Ast(fields, parseinfo=ParseInfo(self.buffer, rule, start, self.pos))
+
+    # rules
+
+    def identifier(self):
+        return self.pattern(IDENTIFIER_PATTERN, "identifier")
+
+    def int_literal(self):
+        return self.pattern(INT_LITERAL_PATTERN, "integer literal")
+
+    def interface(self):
+        start = self.skip()
+        constants_declarations = self.closure(self.constant_declaration)
+        method_declarations = self.closure(self.method_declaration)
+        self.token("main")
+        main = self.block()
+        self.end_of_text()
+        return self.node(
+            "interface", start,
+            constants_declarations=constants_declarations,
+            method_declarations=method_declarations,
+            main=main,
+        )
+
+    def callable_declarator(self):
+        start = self.skip()
+        type = self.token("function", "procedure")
+        name = self.identifier()
+        self.token("(")
+        parameters = self.gather(self.parameter_declaration, ",")
+        self.token(")")
+        return self.node("callable_declarator", start, type=type, name=name, parameters=parameters)
+
+    def parameter_declaration(self):
+        start = self.skip()
+        name = self.identifier()
+        indexes = self.closure(self._index)
+        return self.node("parameter_declaration", start, name=name, indexes=indexes)
+
+    def _index(self):
+        return [self.token("["), self.token("]")]
+
+    def constant_declaration(self):
+        start = self.skip()
+        self.token("const")
+        name = self.identifier()
+        self.token("=")
+        value = self.expression()
+        self.token(";")
+        return self.node("constant_declaration", start, name=name, value=value)
+
+    def method_declaration(self):
+        start = self.skip()
+        declarator = self.callable_declarator()
+        callbacks = self.callback_declarations()
+        return self.node("method_declaration", start, declarator=declarator, callbacks=callbacks)
+
+    def callback_declarations(self):
+        if self.token("callbacks", ";") == ";":
+            return []
+        self.token("{")
+        callbacks = self.closure(self.callback_declaration)
+        self.token("}")
+        return callbacks
+
+    def callback_declaration(self):
+        start = self.skip()
+        declarator = self.callable_declarator()
+        self.token(";")
+        return self.node("callback_declaration", start, declarator=declarator)
+
+    def block(self):
+        start = self.skip()
+        self.token("{")
+        statements = self.closure(self.statement)
+        self.token("}")
+        return self.node("block", start, statements=statements)
+
+    def statement(self):
+        start = self.skip()
+        statement_type = self.token(
+            "read", "write", "checkpoint", "break", "exit", "return", "if", "switch", "for", "loop", "call",
+        )
+        fields = getattr(self, f"_statement_{statement_type}")()
+        return self.node("statement", start, statement_type=statement_type, **fields)
+
+    def _statement_read(self):
+        arguments = self.gather(self.expression, ",")
+        self.token(";")
+        return dict(arguments=arguments)
+
+    _statement_write = _statement_read
+
+    def _statement_checkpoint(self):
+        self.token(";")
+        return dict()
+
+    _statement_break = _statement_checkpoint
+    _statement_exit = _statement_checkpoint
+
+    def _statement_return(self):
+        value = self.expression()
+        self.token(";")
+        return dict(value=value)
+
+    def _statement_if(self):
+        return dict(
+            condition=self.expression(),
+            then_body=self.block(),
+            else_body=self.option(self.else_body),
+        )
+
+    def _statement_switch(self):
+        value = self.expression()
+        self.token("{")
+        cases = self.positive_closure(self.switch_case)
+        self.token("}")
+        return dict(value=value, cases=cases)
+
+    def _statement_for(self):
+        index = self.identifier()
+        self.token("to")
+        return dict(index=index, range=self.expression(), body=self.block())
+
+    def _statement_loop(self):
+        return dict(body=self.block())
+
+    def _statement_call(self):
+        return_value = self.option(self.return_exp)
+        name = self.identifier()
+        self.token("(")
+        arguments = self.gather(self.expression, ",")
+        self.token(")")
+        callbacks = self.callback_implementations()
+        return dict(return_value=return_value, name=name, arguments=arguments, callbacks=callbacks)
+
+    def callback_implementation(self):
+        start = self.skip()
+        declarator = self.callable_declarator()
+        body = self.block()
+        return self.node("callback_implementation", start, declarator=declarator, body=body)
+
+    def callback_implementations(self):
+        if self.token("callbacks", ";") == ";":
+            return []
+        self.token("{")
+        callbacks = self.positive_closure(self.callback_implementation)
+        self.token("}")
+        return callbacks
+
+    def return_exp(self):
+        value = self.expression()
+        self.token("=")
+        return value
+
+    def else_body(self):
+        self.token("else")
+        return self.block()
+
+    def switch_case(self):
+        start = self.skip()
+        self.token("case")
+        labels = self.positive_gather(self.expression, ",")
+        body = self.block()
+        return self.node("switch_case", start, labels=labels, body=body)
+
+    def expression(self):
+        return self.or_expression()
+
+    # Each binary expression rule of the grammar has two alternatives:
+    # one with two or more operands, and one with a single operand (the next rule).
+    # Here, the first operand is parsed only once, and used in either case.
+
+    def _binary_expression(self, rule, expression_type, operand, operators, operators_field=None):
+        start = self.skip()
+        first = operand()
+        rest = self.closure(self._operation, operand, operators)
+        if not rest:
+            return first
+        fields = dict(expression_type=expression_type, operands=[first] + [o for _, o in rest])
+        if operators_field is not None:
+            fields[operators_field] = [op for op, _ in rest]
+        return self.node(rule, start, **fields)
+
+    def _operation(self, operand, operators):
+        op = self.token(*operators)
+        return op, operand()
+
+    def or_expression(self):
+        return self._binary_expression("or_expression", "or", self.and_expression, ["||"])
+
+    def and_expression(self):
+        return self._binary_expression("and_expression", "and", self.comparison_expression, ["&&"])
+
+    def comparison_expression(self):
+        return self._binary_expression(
+            "comparison_expression", "comparison", self.sum_expression,
+            ["==", "!=", "<=", "<", ">=", ">"], operators_field="operators",
+        )
+
+    def sum_expression(self):
+        start = self.skip()
+        try:
+            e = self._binary_expression(
+                "sum_expression", "sum", self.mul_expression, ["+", "-"], operators_field="signs",
+            )
+        except ParseFailed:
+            self.pos = start
+        else:
+            # as in TatSu, a field assigned once (not with +:) is not a list
+            if e.parseinfo.rule == "sum_expression" and len(e.signs) == 1:
+                [e["signs"]] = e.signs
+            return e
+
+        # the alternative with a sign before the first operand,
+        # which can match only if the first operand alone does not
+        first_sign = self.token("+", "-")
+        first = self.mul_expression()
+        rest = self.positive_closure(self._operation, self.mul_expression, ["+", "-"])
+        return self.node(
+            "sum_expression", start,
+            expression_type="sum",
+            signs=[first_sign] + [op for op, _ in rest],
+            operands=[first] + [o for _, o in rest],
+        )
+
+    def mul_expression(self):
+        return self._binary_expression("mul_expression", "mul", self.atomic_expression, ["*"])
+
+    def atomic_expression(self):
+        start = self.skip()
+
+        int_literal = self.option(self.int_literal)
+        if int_literal is not None:
+            return self.node("atomic_expression", start, expression_type="int_literal", int_literal=int_literal)
+
+        variable_name = self.option(self.identifier)
+        if variable_name is not None:
+            indices = self.closure(self.subscript)
+            return self.node(
+                "atomic_expression", start,
+                expression_type="reference_subscript",
+                variable_name=variable_name,
+                indices=indices,
+            )
+
+        self.token("(")
+        expression = self.expression()
+        self.token(")")
+        return self.node("atomic_expression", start, expression_type="nested", expression=expression)
 
-@lru_cache(None)
-def get_grammar():
-    return tatsu.compile(grammar_ebnf)
+    def subscript(self):
+        self.token("[")
+        expression = self.expression()
+        self.token("]")
+        return expression
 
 
 def parse_interface(text):
-    return get_grammar().parse(text, start="interface", asmodel=False, parseinfo=True)
+    return InterfaceParser(text).parse()
 
 
 def get_line(parseinfo):
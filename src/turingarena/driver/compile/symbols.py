@@ -0,0 +1,89 @@
+"""
+Persistent symbol tables, mapping names (or references) to what they are bound to.
+
+Extending a table gives a new table, leaving the original one unchanged, in constant time:
+each table is a node in a tree of bindings, pointing to the node it extends.
+Lookups use an index, shared by all the tables derived from the same empty table,
+containing the bindings of one of them: before a lookup, the index is moved to the table being looked up,
+by undoing and redoing the bindings on the path between the two nodes.
+
+When tables are used as the compiler does, that is, extending the last table used, or an ancestor of it,
+the index moves little, so each operation takes constant amortized time.
+"""
+
+from collections import namedtuple
+
+SymbolNode = namedtuple("SymbolNode", ["parent", "key", "value", "depth"])
+
+
+class SymbolIndex:
+    __slots__ = ["node", "values"]
+
+    def __init__(self, root):
+        self.node = root
+        # key -> values bound to key, in the path from the root to node, last one is visible
+        self.values = {}
+
+    def move_to(self, target):
+        if self.node is target:
+            return
+
+        source = self.node
+        self.node = target
+        redo = []
+        while source.depth > target.depth:
+            self._unbind(source)
+            source = source.parent
+        while target.depth > source.depth:
+            redo.append(target)
+            target = target.parent
+        while source is not target:
+            self._unbind(source)
+            source = source.parent
+            redo.append(target)
+            target = target.parent
+
+        for node in reversed(redo):
+            self.values.setdefault(node.key, []).append(node.value)
+
+    def _unbind(self, node):
+        values = self.values[node.key]
+        values.pop()
+        if not values:
+            del self.values[node.key]
+
+
+class SymbolTable:
+    __slots__ = ["index", "node"]
+
+    def __init__(self, index, node):
+        self.index = index
+        self.node = node
+
+    @classmethod
+    def create(cls):
+        root = SymbolNode(parent=None, key=None, value=None, depth=0)
+        return cls(SymbolIndex(root), root)
+
+    def with_items(self, items):
+        node = self.node
+        for key, value in items:
+            node = SymbolNode(parent=node, key=key, value=value, depth=node.depth + 1)
+        return SymbolTable(self.index, node)
+
+    def with_item(self, key, value):
+        return self.with_items([(key, value)])
+
+    def __getitem__(self, key):
+        self.index.move_to(self.node)
+        return self.index.values[key][-1]
+
+    def __contains__(self, key):
+        self.index.move_to(self.node)
+        return key in self.index.values
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
@@ -0,0 +1,33 @@
+import pytest
+
+from turingarena.driver.cache import CACHE_DIR_VARIABLE
+from turingarena.driver.server import EXECUTORS, EXECUTOR_VARIABLE
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "all_executors: run the test with every executor of the driver")
+
+
+def pytest_generate_tests(metafunc):
+    # only the tests executing interfaces opt in, the others do not depend on the executor
+    if metafunc.definition.get_closest_marker("all_executors") is not None:
+        metafunc.parametrize("driver_executor", list(EXECUTORS), indirect=True)
+
+
+@pytest.fixture(autouse=True)
+def driver_executor(request, monkeypatch):
+    executor = getattr(request, "param", None)
+    if executor is not None:
+        monkeypatch.setenv(EXECUTOR_VARIABLE, executor)
+    return executor
+
+
+@pytest.fixture(scope="session")
+def interface_cache_dir(tmpdir_factory):
+    return tmpdir_factory.mktemp("interfaces")
+
+
+@pytest.fixture(autouse=True)
+def isolated_interface_cache(interface_cache_dir, monkeypatch):
+    # shared by the tests (and the processes they start), but not with the cache of the user
+    monkeypatch.setenv(CACHE_DIR_VARIABLE, str(interface_cache_dir))
@@ -0,0 +1,183 @@
+"""
+Long-lived driver server, serving many runs over a Unix domain socket.
+
+Every connection to the socket is a run.
+The client starts by sending a run request, made of the following lines:
+the source path, the interface path, and the paths of the downward and upward tees.
+The request must be received within RUN_REQUEST_TIMEOUT seconds, otherwise the connection is closed.
+After that, the connection is used as driver connection, exactly as the standard input/output
+of `python -m turingarena.driver.server`.
+
+Each run is served by a worker process forked from the daemon,
+so that modules are already imported, and interfaces already loaded.
+
+Usage: python -m turingarena.driver.daemon SOCKET_PATH
+"""
+
+import logging
+import os
+import signal
+import socket
+import stat
+import sys
+
+from turingarena.driver.client.connection import DriverProcessConnection
+from turingarena.driver.cache import load_interface
+from turingarena.driver.language import Language
+from turingarena.driver.languages.python.runner import Zygote
+from turingarena.driver.server import run_server
+from turingarena.logging_helper import init_logger
+
+logger = logging.getLogger(__name__)
+
+RUN_REQUEST_FIELDS = 4
+# maximum time to receive a run request, as runs are accepted one at a time
+RUN_REQUEST_TIMEOUT = 1.0
+
+
+class InterfaceCache:
+    """
+    Interfaces loaded by the daemon, inherited by the workers.
+    """
+
+    def __init__(self):
+        self._interfaces = {}
+
+    def load(self, path):
+        mtime = os.stat(path).st_mtime_ns
+        cached = self._interfaces.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        interface = load_interface(path)
+        self._interfaces[path] = (mtime, interface)
+        return interface
+
+
+def main():
+    _, socket_path = sys.argv
+
+    init_logger()
+    # each run is served by a new process, which would not reuse the zygote
+    Zygote.enabled = False
+
+    serve(socket_path)
+
+
+def serve(socket_path):
+    interface_cache = InterfaceCache()
+
+    # import all the language modules now, instead of in every worker
+    Language.languages()
+
+    signal.signal(signal.SIGCHLD, _reap_workers)
+    signal.signal(signal.SIGTERM, _terminate)
+
+    _remove_stale_socket(socket_path)
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server_socket:
+        server_socket.bind(socket_path)
+        try:
+            # only the user running the daemon can connect, which is checked before listening
+            os.chmod(socket_path, 0o600)
+            server_socket.listen()
+            logger.info(f"driver daemon listening on {socket_path}")
+            while True:
+                connection, _ = server_socket.accept()
+                with connection:
+                    _start_worker(server_socket, connection, interface_cache)
+        finally:
+            os.unlink(socket_path)
+
+
+def _remove_stale_socket(socket_path):
+    """
+    Remove the socket left by a daemon which did not terminate cleanly, if any.
+    Fails if another daemon is listening on the socket.
+    """
+    try:
+        if not stat.S_ISSOCK(os.lstat(socket_path).st_mode):
+            return  # not ours, bind fails
+    except FileNotFoundError:
+        return
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(socket_path)
+        except ConnectionRefusedError:
+            logger.warning(f"removing stale socket {socket_path}")
+            os.unlink(socket_path)
+        else:
+            raise RuntimeError(f"another daemon is listening on {socket_path}")
+
+
+def _start_worker(server_socket, connection, interface_cache):
+    upward = connection.makefile("wb")
+    # the worker inherits the buffer of this file, which may already contain requests for the driver
+    downward = connection.makefile("rb")
+
+    try:
+        # a client which does not send its request does not block the other ones for long
+        connection.settimeout(RUN_REQUEST_TIMEOUT)
+        source_path, interface_path, downward_tee, upward_tee = [
+            downward.readline().decode().rstrip("\n")
+            for _ in range(RUN_REQUEST_FIELDS)
+        ]
+        connection.settimeout(None)
+        # loaded here, so that the next workers find it already loaded
+        interface = interface_cache.load(interface_path)
+    except Exception:
+        logger.exception(f"invalid run request")
+        downward.close()
+        upward.close()
+        return
+
+    pid = os.fork()
+    if pid:
+        logger.debug(f"started worker {pid} for {source_path}")
+        downward.close()
+        upward.close()
+        return
+
+    # worker process
+    status = 0
+    try:
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        server_socket.close()
+
+        run_server(
+            DriverProcessConnection(downward=downward, upward=upward),
+            source_path,
+            interface_path,
+            downward_tee=downward_tee,
+            upward_tee=upward_tee,
+            interface=interface,
+        )
+        logging.debug("driver server terminated")
+    except:
+        logging.exception(f"server terminated with exception")
+        status = 1
+    finally:
+        try:
+            upward.close()
+            downward.close()
+        finally:
+            os._exit(status)
+
+
+def _reap_workers(signum, frame):
+    while True:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if not pid:
+            break
+
+
+def _terminate(signum, frame):
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -8,13 +8,23 @@ from turingarena.util.visitor import visitormethod
 
 ReferenceDirection = Enum("ReferenceDirection", names=["DOWNWARD", "UPWARD"])
 
+
+class ExecutionPhase(Enum):
+    UPWARD = 1
+    REQUEST = 2
+    DOWNWARD = 3
+
+
 DIRECTION_MAP = {
     ReferenceDirection.DOWNWARD: [
         Read,
+        ReadLoop,
     ],
     ReferenceDirection.UPWARD: [
         CallbackStart,
         CallReturn,
+        Write,
+        WriteLoop,
     ],
 }
 
@@ -68,6 +78,9 @@ class ExecutionAnalyzer(InterfaceAnalyzer):
     def _get_first_requests_object(self, n):
         yield None
 
+    def _get_reference_actions_WriteLoop(self, n):
+        return self.reference_actions(n.loop)
+
     def can_be_grouped(self, n):
         return self._can_be_grouped(n)
 
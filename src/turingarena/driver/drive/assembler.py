@@ -0,0 +1,329 @@
+from turingarena.driver.cache import preprocessed
+from turingarena.driver.common.expressions import AbstractExpressionCodeGen
+from turingarena.driver.common.nodes import *
+from turingarena.driver.common.operations import operation_function
+from turingarena.driver.drive.analysis import ExecutionPhase, ReferenceDirection
+from turingarena.driver.drive.instructions import *
+from turingarena.driver.drive.nodes import *
+from turingarena.driver.drive.preprocess import ExecutionPreprocessor
+from turingarena.driver.drive.resolution import ResolutionAnalyzer
+from turingarena.util.visitor import visitormethod
+
+
+class InstructionAssembler(ExecutionPreprocessor):
+    """
+    Translates an interface into an InstructionProgram.
+
+    Every node is translated into the instructions doing what Executor does when visiting it,
+    so the phases of each step are unrolled here, once, instead of at every execution.
+    Likewise, what can be decided using the ResolutionAnalyzer is not checked at runtime.
+    """
+
+    def __init__(self):
+        self.code = []
+        self.slots = {}
+        self.slot_count = 0
+        # slots assigned in each of the blocks being assembled
+        self.assigned_slots = [set()]
+        self.resolution = None
+
+    def assemble_interface(self, n):
+        main = preprocessed(n).execution_main
+        self.resolution = ResolutionAnalyzer().analyze(main, n.constants)
+
+        for c in n.constants:
+            self.emit(Assign(self.target(c.variable), self.operand(c.value)))
+        self.assemble(main, None)
+
+        return InstructionProgram(code=tuple(self.code), slot_count=self.slot_count)
+
+    def emit(self, instruction):
+        self.code.append(instruction)
+        return len(self.code) - 1
+
+    def position(self):
+        return len(self.code)
+
+    def new_slot(self):
+        self.slot_count += 1
+        return self.slot_count - 1
+
+    def slot(self, reference):
+        try:
+            return self.slots[reference]
+        except KeyError:
+            slot = self.slots[reference] = self.new_slot()
+            return slot
+
+    def target(self, e):
+        if isinstance(e, IntLiteral):
+            return None
+        slot = self.slot(e)
+        self.assigned_slots[-1].add(slot)
+        return slot
+
+    def saved_slots(self, slots):
+        return tuple(
+            (slot, self.new_slot())
+            for slot in sorted(slots)
+        )
+
+    @visitormethod
+    def operand(self, e):
+        pass
+
+    def operand_IntLiteral(self, e):
+        return Literal(e.value)
+
+    def operand_Variable(self, e):
+        return Load(self.slot(e), e.name)
+
+    def operand_Subscript(self, e):
+        return LoadElement(
+            self.slot(e),
+            AbstractExpressionCodeGen().visit(e),
+            self.operand(e.array),
+            self.operand(e.index),
+        )
+
+    def operand_Operation(self, e):
+        return Compute(
+            self.slot(e),
+            AbstractExpressionCodeGen().visit(e),
+            operation_function(e.operator, [self.operand(o).load for o in e.operands]),
+        )
+
+    def assemble(self, n, phase):
+        self._on_assemble(n, phase)
+
+    @visitormethod
+    def _on_assemble(self, n, phase):
+        pass
+
+    def _on_assemble_Block(self, n, phase):
+        for child in n.children:
+            self.assemble(child, phase)
+
+    def _on_assemble_Step(self, n, phase):
+        if phase is not None:
+            self.assemble(n.body, phase)
+            return
+
+        for phase in ExecutionPhase:
+            if phase == ExecutionPhase.UPWARD and n.direction != ReferenceDirection.UPWARD:
+                continue
+            self.assemble(n.body, phase)
+
+    def _on_assemble_Checkpoint(self, n, phase):
+        self.emit(AcceptCheckpoint())
+
+    def _on_assemble_For(self, n, phase):
+        resolution = self.resolution.of(n, phase)
+        if resolution.range is False:
+            # always skipped
+            return
+
+        for_range = self.operand(n.index.range)
+
+        start = self.emit(None)
+        self.assigned_slots.append(set())
+        index = self.target(n.index.variable)
+        self.assemble(n.body, phase)
+        assigned = self.assigned_slots.pop()
+        end = self.emit(None)
+
+        columns = []
+        for r, status in resolution.references:
+            if status:
+                # already resolved before the loop
+                continue
+            element = self.slot(Subscript(r, n.index.variable))
+            columns.append((self.new_slot(), element, self.operand(r)))
+            self.target(r)
+
+        scope = ForScope(
+            index=index,
+            range=for_range,
+            counter=self.new_slot(),
+            size=self.new_slot(),
+            lookahead=self.new_slot(),
+            saved=self.saved_slots(assigned),
+            columns=tuple(columns),
+            start=start + 1,
+            end=end + 1,
+        )
+        self.code[start] = ForStart(scope)
+        self.code[end] = ForEnd(scope)
+
+    def _on_assemble_Loop(self, n, phase):
+        start = self.emit(None)
+        self.assigned_slots.append(set())
+        self.assemble(n.body, phase)
+        assigned = self.assigned_slots.pop()
+        # the values assigned in the last iteration are kept after the loop
+        self.assigned_slots[-1] |= assigned
+        end = self.emit(None)
+
+        scope = LoopScope(
+            breaking=self.new_slot(),
+            saved=self.saved_slots(assigned),
+            start=start + 1,
+        )
+        self.code[start] = LoopStart(scope)
+        self.code[end] = LoopEnd(scope)
+
+    def _on_assemble_Break(self, n, phase):
+        self.emit(SetBreak())
+
+    def _on_assemble_If(self, n, phase):
+        condition = self.operand(n.condition)
+        then_body, else_body = n.branches
+
+        branch = self.emit(None)
+        self.assemble(then_body, phase)
+        if else_body is not None:
+            skip = self.emit(None)
+            self.code[branch] = JumpUnless(condition, self.position())
+            self.assemble(else_body, phase)
+            self.code[skip] = Jump(self.position())
+        else:
+            self.code[branch] = JumpUnless(condition, self.position())
+
+    def _on_assemble_Switch(self, n, phase):
+        dispatch = self.emit(None)
+
+        targets = {}
+        skips = []
+        for c in n.cases:
+            for label in c.labels:
+                targets.setdefault(label.value, self.position())
+            self.assemble(c.body, phase)
+            skips.append(self.emit(None))
+
+        for skip in skips:
+            self.code[skip] = Jump(self.position())
+        self.code[dispatch] = JumpSwitch(self.operand(n.value), targets)
+
+    def _on_assemble_AcceptCallbacks(self, n, phase):
+        dispatch = self.emit(None)
+
+        targets = []
+        for callback in n.callbacks:
+            enter = self.emit(None)
+            targets.append(enter)
+            self.assigned_slots.append(set())
+            self.assemble(callback.body, None)
+            assigned = self.assigned_slots.pop()
+
+            scope = CallbackScope(
+                index=callback.index,
+                lookahead=self.new_slot(),
+                saved=self.saved_slots(assigned),
+                dispatch=dispatch,
+            )
+            self.code[enter] = EnterCallback(scope)
+            self.emit(LeaveCallback(scope))
+
+        self.code[dispatch] = DispatchCallbacks(tuple(targets), self.position())
+
+    def _on_assemble_object(self, n, phase):
+        if phase is not None:
+            getattr(self, f"_on_{phase.name.lower()}")(n)
+
+    @visitormethod
+    def _on_upward(self, n):
+        pass
+
+    def _on_upward_object(self, n):
+        pass
+
+    def _on_upward_Write(self, n):
+        self.emit(ReceiveUpward(tuple(self.target(a) for a in n.arguments)))
+
+    def _on_upward_WriteLoop(self, n):
+        if self.resolution.of(n, ExecutionPhase.UPWARD).range is False:
+            return
+
+        arrays = tuple(self.operand(a.array) for a in n.arguments)
+        for a in n.arguments:
+            self.target(a.array)
+        self.emit(ReceiveUpwardLines(
+            range=self.operand(n.loop.index.range),
+            arrays=arrays,
+        ))
+
+    @visitormethod
+    def _on_request(self, n):
+        pass
+
+    def _on_request_object(self, n):
+        pass
+
+    def _on_request_RequestLookahead(self, n):
+        self.emit(LookaheadRequest())
+
+    def _on_request_CallbackStart(self, n):
+        self.emit(SendCallbackArguments(tuple(
+            self.operand(p.variable)
+            for p in n.prototype.parameters
+        )))
+
+    def _on_request_Return(self, n):
+        self.emit(AcceptCallbackReturn(self.target(n.value)))
+
+    def _on_request_CallbackEnd(self, n):
+        self.emit(AcceptCallbackEnd())
+
+    def _on_request_Exit(self, n):
+        self.emit(AcceptExit())
+
+    def _on_request_ValueResolve(self, n):
+        if self.resolution.of(n, ExecutionPhase.REQUEST):
+            return
+
+        self.emit(ResolveValue(
+            value=self.operand(n.value),
+            target=self.target(n.value),
+            values_by_request=dict(n.map),
+        ))
+
+    def _on_request_CallAccept(self, n):
+        statuses = self.resolution.of(n, ExecutionPhase.REQUEST)
+        self.emit(AcceptCall(
+            method=n.method,
+            # None if never resolved, so never checked
+            arguments=tuple(
+                self.operand(a) if status is not False else None
+                for a, status in zip(n.arguments, statuses)
+            ),
+            # None if always resolved, so never assigned
+            targets=tuple(
+                self.target(a) if not status else None
+                for a, status in zip(n.arguments, statuses)
+            ),
+        ))
+
+    def _on_request_CallReturn(self, n):
+        self.emit(ReturnCall(self.operand(n.return_value)))
+
+    def _on_request_CallCompleted(self, n):
+        self.emit(CompleteCall())
+
+    @visitormethod
+    def _on_downward(self, n):
+        pass
+
+    def _on_downward_object(self, n):
+        pass
+
+    def _on_downward_Read(self, n):
+        self.emit(SendDownward(tuple(self.operand(a) for a in n.arguments)))
+
+    def _on_downward_ReadLoop(self, n):
+        if self.resolution.of(n, ExecutionPhase.DOWNWARD).range is False:
+            return
+
+        self.emit(SendDownwardLines(
+            range=self.operand(n.loop.index.range),
+            arrays=tuple(self.operand(a.array) for a in n.arguments),
+        ))
@@ -0,0 +1,31 @@
+"""
+Buffers collecting the values assigned to a reference by the iterations of a for,
+which become the array assigned to the reference at the end of the for.
+
+Integers are packed in an array of 64-bit integers,
+falling back to a list for anything else (nested arrays, or values not assigned).
+"""
+
+from array import array
+
+
+def new_column(size, value):
+    """
+    Allocate a column of the given size, suitable for values like the given one.
+    """
+    if type(value) is int:
+        return array("q", bytes(8 * size))
+    return [None] * size
+
+
+def store(column, index, value):
+    """
+    Store a value in a column, returning the column itself,
+    or a list with its values, if the value cannot be packed.
+    """
+    try:
+        column[index] = value
+    except (TypeError, OverflowError):
+        column = list(column)
+        column[index] = value
+    return column
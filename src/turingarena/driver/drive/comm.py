@@ -1,13 +1,19 @@
 import logging
-import threading
+import time
+from array import array
 from collections import namedtuple
 from contextlib import contextmanager
 
+from turingarena import InterfaceError
 from turingarena.driver.client.commands import DriverState, deserialize_data, serialize_data
+from turingarena.driver.client.protocol import LATEST_PROTOCOL_VERSION
 from turingarena.driver.drive.context import ExecutionContext
 from turingarena.driver.drive.requests import CallRequestSignature, RequestSignature
 
 UPWARD_TIMEOUT = 3.0
+MAX_LINE_SIZE = 256
+# minimum interval between checks of the time usage of a process with a time limit
+TIME_USAGE_CHECK_INTERVAL = 1e-3
 
 SandboxTee = namedtuple("SandboxTee", ["upward_tee", "downward_tee"])
 
@@ -18,6 +24,12 @@ class CommunicationError(Exception):
     """
 
 
+class TimeLimitReached(CommunicationError):
+    """
+    Raised when the process exceeds the time usage limit given by the client.
+    """
+
+
 class InterfaceExitReached(Exception):
     pass
 
@@ -27,10 +39,10 @@ class DriverStop(Exception):
 
 
 class SandboxCommunicator(ExecutionContext):
-    def _on_timeout(self):
+    def _on_timeout(self, kill_reason):
         try:
-            logging.info(f"process communication timeout expired")
-            self.process.get_status(kill_reason="timeout expired")
+            logging.info(f"killing process: {kill_reason}")
+            self.process.get_status(kill_reason=kill_reason)
         except:
             logging.exception(f"exception while killing for timeout")
 
@@ -46,37 +58,156 @@ class SandboxCommunicator(ExecutionContext):
             print(*values, file=self.sandbox_connection.downward)
         print(*values, file=self.sandbox_tee.downward_tee)
 
-    def receive_upward(self):
+    def send_downward_lines(self, arrays, size):
+        """
+        Send the first elements of the given arrays, one line for each index, with a single write.
+        """
+        for a in arrays:
+            if len(a) < size:
+                raise IndexError(f"array of size {len(a)} read up to index {size - 1}")
+
+        text = format_lines(arrays, size)
+
+        with self._check_downward_pipe():
+            self.sandbox_connection.downward.write(text)
+        self.sandbox_tee.downward_tee.write(text)
+
+    def flush_downward(self):
         with self._check_downward_pipe():
             self.sandbox_connection.downward.flush()
 
-        timer = threading.Timer(UPWARD_TIMEOUT, self._on_timeout)
-        timer.start()
+    def set_wall_time_budget(self, budget):
+        """
+        Limit the wall-clock time the process is allowed to take before sending its output.
+        The budget is a number of seconds from now, or None to remove the limit.
+        """
+        self.sandbox_connection.upward.set_budget(budget)
+
+    def set_time_usage_limit(self, limit):
+        """
+        Kill the process as soon as its time usage exceeds the given limit, or None to remove the limit.
+        """
+        self.process.set_time_usage_limit(limit)
+
+    def receive_upward(self):
+        self.flush_downward()
+
+        upward = self.sandbox_connection.upward
+        deadline = time.monotonic() + UPWARD_TIMEOUT
+        while True:
+            line = upward.readline(MAX_LINE_SIZE, self._upward_timeout(deadline))
+            if line is not None:
+                break
+            now = time.monotonic()
+            if deadline <= now or upward.deadline is not None and upward.deadline <= now:
+                self._on_upward_timeout()
+
+        data = self._parse_upward_line(line)
+        print(*data, file=self.sandbox_tee.upward_tee)
 
-        max_line_size = 256
+        return data
+
+    def receive_upward_lines(self, count, size):
+        """
+        Receive size lines of count values each, as receive_upward,
+        and return the values in count columns (see turingarena.driver.drive.columns).
+
+        All the lines are read and parsed at once, if they are well-formed.
+        """
+        self.flush_downward()
+
+        upward = self.sandbox_connection.upward
+        block = upward.readlines(size, MAX_LINE_SIZE, self._upward_timeout(time.monotonic() + UPWARD_TIMEOUT))
+
+        lines = block.split(b"\n")[:-1]
+        if len(lines) == size:
+            try:
+                if count == 1:
+                    # int() fails on empty lines and lines with more values
+                    values = array("q", map(int, lines))
+                else:
+                    rows = [line.split() for line in lines]
+                    if any(len(row) != count for row in rows):
+                        raise ValueError("wrong number of values in a line")
+                    values = array("q", map(int, (value for row in rows for value in row)))
+            except (ValueError, OverflowError):
+                pass
+            else:
+                columns = [values[k::count] for k in range(count)]
+                self.sandbox_tee.upward_tee.write(format_lines(columns, size))
+                return columns
+
+        # go line by line, to behave exactly as receive_upward
+        rows = []
+        for line in lines:
+            data = self._parse_upward_line(line + b"\n")
+            print(*data, file=self.sandbox_tee.upward_tee)
+            rows.append(data)
+        while len(rows) < size:
+            rows.append(self.receive_upward())
+
+        return [
+            [row[k] if k < len(row) else None for row in rows]
+            for k in range(count)
+        ]
+
+    def _upward_timeout(self, deadline):
+        """
+        Time to wait for the output of the process, before the given deadline,
+        or before its time usage may have exceeded its limit, if any.
+        """
+        timeout = deadline - time.monotonic()
+
+        remaining = self.process.remaining_time_usage()
+        if remaining is not None:
+            if remaining < 0:
+                self._on_timeout("time limit exceeded")
+                raise TimeLimitReached(f"process exceeded the time limit")
+            # the time usage is checked again once the remaining time usage may have run out
+            timeout = min(timeout, max(remaining, TIME_USAGE_CHECK_INTERVAL))
+
+        return timeout
+
+    def _on_upward_timeout(self):
+        deadline = self.sandbox_connection.upward.deadline
+        if deadline is not None and deadline <= time.monotonic():
+            self._on_timeout("wall time limit exceeded")
+        else:
+            self._on_timeout("timeout expired")
+        raise CommunicationError(f"process stopped sending data")
 
-        line = self.sandbox_connection.upward.readline(max_line_size)
+    def _parse_upward_line(self, line):
+        line = line.decode(errors="replace")
         if line and line[-1] != "\n":
             raise CommunicationError(f"line sent by process is too long '{line:50}'...")
 
         line = line.strip()
 
-        timer.cancel()
-        timer.join()
-
         if not line:
+            # e.g., killed by the kernel (see PopenProcessManager.set_time_usage_limit)
+            limit = self.process.time_usage_limit
+            if limit is not None and self.process.get_time_usage() > limit:
+                raise TimeLimitReached(f"process stopped sending data")
             raise CommunicationError(f"process stopped sending data")
 
-        data = tuple(map(int, line.split()))
-
-        print(*data, file=self.sandbox_tee.upward_tee)
-
         try:
-            return data
+            return tuple(map(int, line.split()))
         except ValueError as e:
             raise CommunicationError(f"process sent invalid data '{line:50}'") from e
 
 
+def format_lines(columns, size):
+    """
+    Format the first size elements of the given columns, the elements with the same index on the same line.
+    """
+    if len(columns) == 1:
+        [column] = columns
+        lines = map(str, column[:size])
+    else:
+        lines = map(" ".join, zip(*(map(str, column[:size]) for column in columns)))
+    return "".join(line + "\n" for line in lines)
+
+
 class DriverCommunicator(ExecutionContext):
     def send_driver_state(self, state):
         self.send_driver_upward(state.value)
@@ -84,48 +215,169 @@ class DriverCommunicator(ExecutionContext):
     def send_driver_upward(self, item):
         if isinstance(item, bool):
             item = int(item)
-        print(item, file=self.driver_connection.upward)
+        self.driver_channel.send(item)
+
+    def send_driver_upward_all(self, items):
+        self.driver_channel.send_all(items)
 
     def receive_driver_downward(self):
-        self.driver_connection.upward.flush()
-        return self.driver_connection.downward.readline().strip()
+        return self.driver_channel.receive()
+
+    def receive_driver_downward_array(self, size):
+        return self.driver_channel.receive_array(size)
 
     def report_ready(self):
-        self.send_resource_usage_upward()
         self.send_driver_state(DriverState.READY)
 
     def next_request(self):
         command = self.receive_driver_downward()
         if command == "stop":
             raise DriverStop
+        if command == "protocol":
+            self._negotiate_protocol()
+            return self.next_request()
+        if command == "wall_time":
+            budget = float(self.receive_driver_downward())
+            self.set_wall_time_budget(budget if budget >= 0 else None)
+            return self.next_request()
+        if command == "time_limit":
+            limit = float(self.receive_driver_downward())
+            self.set_time_usage_limit(limit if limit >= 0 else None)
+            return self.next_request()
+        if command == "usage":
+            # resource usage is measured only on demand, as it requires to stop the process
+            self.send_resource_usage_upward()
+            self.report_ready()
+            return self.next_request()
         if command == "call":
             method_name = self.receive_driver_downward()
             return CallRequestSignature(command, method_name)
         else:
             return RequestSignature(command)
 
+    def _negotiate_protocol(self):
+        requested_version = int(self.receive_driver_downward())
+        accepted_version = min(requested_version, LATEST_PROTOCOL_VERSION)
+        # the answer is still sent with the old protocol
+        self.send_driver_upward(int(accepted_version))
+        self.driver_channel.switch_protocol(accepted_version)
+
     def send_resource_usage_upward(self):
+        # make sure the process received everything sent so far
+        self.flush_downward()
         info = self.process.get_status()
-        self.send_driver_state(DriverState.RESOURCE_USAGE)
-        self.send_driver_upward(info.time_usage)
-        self.send_driver_upward(info.peak_memory_usage)
-        self.send_driver_upward(info.current_memory_usage)
+        self.send_driver_upward_all([
+            DriverState.RESOURCE_USAGE.value,
+            info.time_usage,
+            info.peak_memory_usage,
+            info.current_memory_usage,
+        ])
         return info
 
+    def accept_checkpoint(self, request):
+        values = self.receive_upward()
+        if values != (0,):
+            raise CommunicationError(f"expecting checkpoint, got {values}")
+
+        command = request.command
+        if not command == "checkpoint":
+            raise InterfaceError(f"expecting 'checkpoint', got '{command}'")
+        self.report_ready()
+
+    def accept_exit(self, request):
+        command = request.command
+        if command != "exit":
+            raise InterfaceError(f"Expecting exit, got {command}")
+        raise InterfaceExitReached
+
+    def accept_call(self, request, method):
+        """
+        Receive a call to the given method, whose request was already received,
+        and return the values of the arguments.
+        """
+
+        command = request.command
+        if not command == "call":
+            raise InterfaceError(f"expected call to '{method.name}', got {command}")
+
+        method_name = request.method_name
+        if not method_name == method.name:
+            raise InterfaceError(f"expected call to '{method.name}', got call to '{method_name}'")
+
+        parameter_count = int(self.receive_driver_downward())
+        if parameter_count != len(method.parameters):
+            raise InterfaceError(
+                f"'{method.name}' expects {len(method.parameters)} arguments, "
+                f"got {parameter_count}"
+            )
+
+        values = [
+            self.deserialize_request_data()
+            for _ in method.parameters
+        ]
+
+        actual_has_return_value = bool(int(self.receive_driver_downward()))
+        expected_has_return_value = method.has_return_value
+        if not actual_has_return_value == expected_has_return_value:
+            names = ["procedure", "function"]
+            raise InterfaceError(
+                f"'{method.name}' is a {names[expected_has_return_value]}, "
+                f"got call to {names[actual_has_return_value]}"
+            )
+
+        callback_count = int(self.receive_driver_downward())
+        expected_callback_count = len(method.callbacks)
+        if not callback_count == expected_callback_count:
+            raise InterfaceError(
+                f"'{method.name}' has a {expected_callback_count} callbacks, "
+                f"got {callback_count}"
+            )
+
+        for c in method.callbacks:
+            parameter_count = int(self.receive_driver_downward())
+            expected_parameter_count = len(c.parameters)
+            if not parameter_count == expected_parameter_count:
+                raise InterfaceError(
+                    f"'{c.name}' has {expected_parameter_count} parameters, "
+                    f"got {parameter_count}"
+                )
+
+        return values
+
+    def accept_callback_return(self, request, has_return_value):
+        """
+        Receive the end of a callback, returning the value returned by the callback, if any.
+        """
+
+        command = request.command
+        if not command == "callback_return":
+            raise InterfaceError(f"expecting 'callback_return', got '{command}'")
+        actual_has_return_value = bool(int(self.receive_driver_downward()))
+
+        if has_return_value and not actual_has_return_value:
+            raise InterfaceError(
+                f"callback is a function, "
+                f"but the provided implementation did not return anything"
+            )
+        if actual_has_return_value and not has_return_value:
+            raise InterfaceError(
+                f"callback is a procedure, "
+                f"but the provided implementation returned something"
+            )
+
+        if has_return_value:
+            return int(self.receive_driver_downward())
+
     def deserialize_request_data(self):
-        deserializer = deserialize_data()
-        next(deserializer)
-        lines_it = iter(self.receive_driver_downward, None)
-        try:
-            for line in lines_it:
-                deserializer.send(line)
-        except StopIteration as e:
-            result = e.value
-        else:
-            raise ValueError(f"too few lines")
-        return result
+        return deserialize_data(self.receive_driver_downward, self.receive_driver_downward_array)
 
     def serialize_response_data(self, value):
-        lines = serialize_data(value)
-        for line in lines:
-            self.send_driver_upward(int(line))
+        self.send_driver_upward_all(serialize_data(value))
+
+
+def check_argument(parameter, expected_value, actual_value):
+    if isinstance(expected_value, int) and actual_value != expected_value:
+        raise InterfaceError(
+            f"parameter {parameter.variable.name}: expecting {expected_value}, "
+            f"got {actual_value}"
+        )
@@ -1,23 +1,51 @@
 from collections import namedtuple
 
 
+class Frame(dict):
+    """
+    Values of the references assigned in a block.
+    Other references are looked up in the frame of the enclosing block.
+    """
+
+    __slots__ = ["parent"]
+
+    def __init__(self, parent):
+        super().__init__()
+        self.parent = parent
+
+    def __missing__(self, key):
+        return self.parent[key]
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or key in self.parent
+
+
 class ExecutionContext(namedtuple("Executor", [
     "bindings",
     "phase",
+    "resolution",
     "process",
     "request_lookahead",
-    "driver_connection",
+    "driver_channel",
     "sandbox_connection",
     "sandbox_tee",
 ])):
-    def with_assigments(self, assignments):
-        return self._replace(bindings={
-            **self.bindings,
-            **dict(assignments),
-        })
+    def with_frame(self, assignments=()):
+        """
+        Context with a new frame, containing the given assignments,
+        which are discarded at the end of the block.
+        """
+        bindings = Frame(self.bindings)
+        bindings.update(assignments)
+        return self._replace(bindings=bindings)
 
     def extend(self, execution_result):
-        return self.with_assigments(execution_result.assignments)._replace(
+        """
+        Context with the assignments of the given result,
+        stored in place in the current frame, which must be owned by the caller (see with_frame).
+        """
+        self.bindings.update(execution_result.assignments)
+        return self._replace(
             request_lookahead=execution_result.request_lookahead,
         )
 
@@ -38,8 +66,10 @@ class ExecutionResult(namedtuple("ExecutionResult", [
         if other is None:
             return self
 
+        # results are merged into a new one, so its list of assignments can be extended in place
+        self.assignments.extend(other.assignments)
         return ExecutionResult(
-            self.assignments + other.assignments,
+            self.assignments,
             request_lookahead=other.request_lookahead,
             does_break=other.does_break,
         )
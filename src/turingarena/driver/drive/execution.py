@@ -1,68 +1,101 @@
 import logging
-from enum import Enum
+from functools import lru_cache
 
 from turingarena.driver.common.nodes import Subscript
+from turingarena.driver.common.operations import operation_function
 
 from turingarena import InterfaceError
+from turingarena.driver.cache import preprocessed
 from turingarena.driver.common.description import TreeDumper
-from turingarena.driver.compile.analysis import ReferenceResolution
-from turingarena.driver.drive.analysis import ReferenceDirection
-from turingarena.driver.drive.comm import CommunicationError, InterfaceExitReached, SandboxCommunicator, \
-    DriverCommunicator
+from turingarena.driver.drive.analysis import ExecutionPhase, ReferenceDirection
+from turingarena.driver.drive.columns import new_column, store
+from turingarena.driver.drive.comm import SandboxCommunicator, DriverCommunicator, check_argument
 from turingarena.driver.drive.preprocess import ExecutionPreprocessor
+from turingarena.driver.drive.resolution import ResolutionAnalyzer
 from turingarena.util.visitor import visitormethod
 
 
-class ExecutionPhase(Enum):
-    UPWARD = 1
-    REQUEST = 2
-    DOWNWARD = 3
+class ExpressionCompiler:
+    """
+    Compiles expressions into functions of the bindings, returning None if the value is not resolved,
+    so that evaluating an expression takes a single call, instead of a visit of its tree.
+    """
 
+    __slots__ = []
 
-class NotResolved(Exception):
-    """Expression evaluation failed because some values are not resolved"""
+    @visitormethod
+    def compile(self, e):
+        pass
 
+    def compile_IntLiteral(self, e):
+        value = e.value
+        return lambda bindings: value
 
-class Executor(SandboxCommunicator, DriverCommunicator, ExecutionPreprocessor):
-    __slots__ = []
+    def compile_Variable(self, e):
+        def variable(bindings):
+            try:
+                return bindings[e]
+            except KeyError:
+                return None
 
-    def evaluate(self, e):
-        try:
-            return self.try_evaluate(e)
-        except NotResolved:
-            raise ValueError(f"unable to evaluate expression {e}")
+        return variable
 
-    @visitormethod
-    def try_evaluate(self, e):
-        pass
+    def compile_Subscript(self, e):
+        array = self.compile(e.array)
+        index = self.compile(e.index)
 
-    def try_evaluate_IntLiteral(self, e):
-        return e.value
+        def subscript(bindings):
+            try:
+                return bindings[e]
+            except KeyError:
+                pass
 
-    def try_evaluate_Variable(self, e):
-        try:
-            return self.bindings[e]
-        except KeyError:
-            raise NotResolved
+            array_value = array(bindings)
+            index_value = index(bindings)
+            if array_value is None or index_value is None:
+                return None
+            return array_value[index_value]
 
-    def try_evaluate_Subscript(self, e):
-        try:
-            return self.bindings[e]
-        except KeyError:
-            pass
+        return subscript
+
+    def compile_Operation(self, e):
+        function = operation_function(e.operator, [self.compile(o) for o in e.operands])
 
-        array = self.try_evaluate(e.array)
-        index = self.evaluate(e.index)
+        def operation(bindings):
+            # resolved as a whole, e.g., the condition of an if (see ValueResolve)
+            try:
+                return bindings[e]
+            except KeyError:
+                return function(bindings)
 
-        return array[index]
+        return operation
+
+
+@lru_cache(maxsize=4096)
+def compile_expression(e):
+    return ExpressionCompiler().compile(e)
+
+
+class Executor(SandboxCommunicator, DriverCommunicator, ExecutionPreprocessor):
+    __slots__ = []
+
+    def evaluate(self, e):
+        value = compile_expression(e)(self.bindings)
+        if value is None:
+            raise ValueError(f"unable to evaluate expression {e}")
+        return value
 
     def is_resolved(self, e):
-        try:
-            self.try_evaluate(e)
-        except NotResolved:
-            return False
-        else:
-            return True
+        return compile_expression(e)(self.bindings) is not None
+
+    def check_resolved(self, status, e):
+        """
+        Whether the given expression is resolved, according to its status in the ResolutionAnalyzer,
+        which is checked at runtime only if it depends on the execution.
+        """
+        if status is not None:
+            return status
+        return self.is_resolved(e)
 
     def execute(self, n):
         return self._on_execute(n)
@@ -72,25 +105,33 @@ class Executor(SandboxCommunicator, DriverCommunicator, ExecutionPreprocessor):
         pass
 
     def _on_execute_Interface(self, n):
-        main = self.transform(n.main)
+        main = preprocessed(n).execution_main
 
         logging.debug(f"transformed main block: {TreeDumper().dump(main)}")
 
-        self.with_assigments({
+        resolution = ResolutionAnalyzer().analyze(main, n.constants)
+
+        self._replace(resolution=resolution).with_frame({
             c.variable: self.evaluate(c.value)
             for c in n.constants
         }).execute(main)
 
     def _on_execute_Block(self, n):
+        # the assignments of the children are visible to the following ones, through a frame of the block
+        context = self.with_frame()
         result = self.result()
         for n in n.children:
-            result = result.merge(self.extend(result).execute(n))
+            child_result = context.execute(n)
+            if child_result is not None:
+                context = context.extend(child_result)
+            result = result.merge(child_result)
         return result
 
     def _on_execute_Step(self, n):
         if self.phase is not None:
             return self.execute(n.body)
         else:
+            context = self.with_frame()
             result = self.result()
             for phase in ExecutionPhase:
                 direction = n.direction
@@ -98,21 +139,14 @@ class Executor(SandboxCommunicator, DriverCommunicator, ExecutionPreprocessor):
                 if phase == ExecutionPhase.UPWARD and direction != ReferenceDirection.UPWARD:
                     continue
 
-                result = result.merge(self.extend(result)._replace(
-                    phase=phase,
-                ).execute(n.body))
+                phase_result = context._replace(phase=phase).execute(n.body)
+                context = context.extend(phase_result)
+                result = result.merge(phase_result)
 
             return result
 
     def _on_execute_Checkpoint(self, n):
-        values = self.receive_upward()
-        if values != (0,):
-            raise CommunicationError(f"expecting checkpoint, got {values}")
-
-        command = self.request_lookahead.command
-        if not command == "checkpoint":
-            raise InterfaceError(f"expecting 'checkpoint', got '{command}'")
-        self.report_ready()
+        self.accept_checkpoint(self.request_lookahead)
         return self.result().with_request_processed()
 
     def _on_execute_Callback(self, n):
@@ -120,34 +154,54 @@ class Executor(SandboxCommunicator, DriverCommunicator, ExecutionPreprocessor):
         self.report_ready()
         self.send_driver_upward(1)  # has callbacks
         self.send_driver_upward(n.index)
-        self.execute(n.body)
+        self.with_frame().execute(n.body)
 
     def _on_execute_For(self, n):
         if self.phase is None:
             assert self.request_lookahead is None
 
-        if not self.is_resolved(n.index.range):
+        resolution = self.resolution.of(n, self.phase)
+
+        if not self.check_resolved(resolution.range, n.index.range):
             # we assume that if the range is not resolved, then the cycle should be skipped
-            # FIXME: determine this situation statically
             return
 
         for_range = self.evaluate(n.index.range)
 
-        results_by_iteration = [
-            self.with_assigments(
-                [(n.index.variable, i)]
-            ).execute(n.body)
-            for i in range(for_range)
+        references = [
+            r
+            for r, status in resolution.references
+            if not self.check_resolved(status, r)
         ]
+        positions = {
+            Subscript(r, n.index.variable): k
+            for k, r in enumerate(references)
+        }
+        columns = [None] * len(references)
+        values = [None] * len(references)
+
+        # the frame of the loop only holds the index, as the body has its own frame
+        context = self.with_frame()
+        for i in range(for_range):
+            context.bindings[n.index.variable] = i
+            iteration_result = context.execute(n.body)
+
+            # only the values assigned in this iteration, not in the enclosing frames
+            if iteration_result is not None:
+                for reference, value in iteration_result.assignments:
+                    k = positions.get(reference)
+                    if k is not None:
+                        values[k] = value
+
+            for k, value in enumerate(values):
+                if columns[k] is None:
+                    columns[k] = new_column(for_range, value)
+                columns[k] = store(columns[k], i, value)
+                values[k] = None
 
         assignments = [
-            (a.reference, [
-                dict(result.assignments)[Subscript(a.reference, n.index.variable)]
-                for result in results_by_iteration
-            ])
-            for a in self.reference_actions(n)
-            if isinstance(a, ReferenceResolution)
-            if not self.is_resolved(a.reference)
+            (r, column if column is not None else [])
+            for r, column in zip(references, columns)
         ]
 
         return self.result()._replace(assignments=assignments)
@@ -155,7 +209,7 @@ class Executor(SandboxCommunicator, DriverCommunicator, ExecutionPreprocessor):
     def _on_execute_Loop(self, n):
         context = self
         while True:
-            result = context.execute(n.body)
+            result = context.with_frame().execute(n.body)
             context = context._replace(
                 request_lookahead=result.request_lookahead,
             )
@@ -203,6 +257,24 @@ class Executor(SandboxCommunicator, DriverCommunicator, ExecutionPreprocessor):
 
         return self.result()._replace(assignments=assignments)
 
+    def _on_upward_WriteLoop(self, n):
+        resolution = self.resolution.of(n, self.phase)
+
+        if not self.check_resolved(resolution.range, n.loop.index.range):
+            # as in For
+            return
+
+        columns = self.receive_upward_lines(len(n.arguments), self.evaluate(n.loop.index.range))
+
+        # as in For, only the arrays not resolved yet are assigned
+        assignments = [
+            (r, column)
+            for (r, status), column in zip(resolution.references, columns)
+            if not self.check_resolved(status, r)
+        ]
+
+        return self.result()._replace(assignments=assignments)
+
     @visitormethod
     def _on_request(self, n):
         pass
@@ -224,41 +296,17 @@ class Executor(SandboxCommunicator, DriverCommunicator, ExecutionPreprocessor):
             self.send_driver_upward(value)
 
     def _on_request_Return(self, n):
-        has_return_value = self._expect_callback_return()
-
-        if not has_return_value:
-            raise InterfaceError(
-                f"callback is a function, "
-                f"but the provided implementation did not return anything"
-            )
-
-        value = int(self.receive_driver_downward())
+        value = self.accept_callback_return(self.request_lookahead, has_return_value=True)
         return self.result()._replace(assignments=[(n.value, value)])
 
     def _on_request_CallbackEnd(self, n):
-        has_return_value = self._expect_callback_return()
-        if has_return_value:
-            raise InterfaceError(
-                f"callback is a procedure, "
-                f"but the provided implementation returned something"
-            )
-
-    def _expect_callback_return(self):
-        request = self.request_lookahead
-        command = request.command
-        if not command == "callback_return":
-            raise InterfaceError(f"expecting 'callback_return', got '{command}'")
-        has_return_value = bool(int(self.receive_driver_downward()))
-        return has_return_value
+        self.accept_callback_return(self.request_lookahead, has_return_value=False)
 
     def _on_request_Exit(self, n):
-        command = self.request_lookahead.command
-        if command != "exit":
-            raise InterfaceError(f"Expecting exit, got {command}")
-        raise InterfaceExitReached
+        self.accept_exit(self.request_lookahead)
 
     def _on_request_ValueResolve(self, n):
-        if self.is_resolved(n.value):
+        if self.check_resolved(self.resolution.of(n, self.phase), n.value):
             return
 
         assert self.request_lookahead is not None
@@ -272,61 +320,17 @@ class Executor(SandboxCommunicator, DriverCommunicator, ExecutionPreprocessor):
         )
 
     def _on_request_CallAccept(self, n):
-        command = self.request_lookahead.command
-        if not command == "call":
-            raise InterfaceError(f"expected call to '{n.method.name}', got {command}")
-
-        method_name = self.request_lookahead.method_name
-        if not method_name == n.method.name:
-            raise InterfaceError(f"expected call to '{n.method.name}', got call to '{method_name}'")
-
-        parameter_count = int(self.receive_driver_downward())
-        if parameter_count != len(n.method.parameters):
-            raise InterfaceError(
-                f"'{n.method.name}' expects {len(n.method.parameters)} arguments, "
-                f"got {parameter_count}"
-            )
+        values = self.accept_call(self.request_lookahead, n.method)
+
+        statuses = self.resolution.of(n, self.phase)
 
         assignments = []
-        for p, a in zip(n.method.parameters, n.arguments):
-            actual_value = self.deserialize_request_data()
-
-            if self.is_resolved(a):
-                expected_value = self.evaluate(a)
-                if isinstance(expected_value, int) and actual_value != expected_value:
-                    raise InterfaceError(
-                        f"parameter {p.variable.name}: expecting {expected_value}, "
-                        f"got {actual_value}"
-                    )
+        for p, a, status, actual_value in zip(n.method.parameters, n.arguments, statuses, values):
+            if self.check_resolved(status, a):
+                check_argument(p, self.evaluate(a), actual_value)
             else:
                 assignments.append((a, actual_value))
 
-        actual_has_return_value = bool(int(self.receive_driver_downward()))
-        expected_has_return_value = n.method.has_return_value
-        if not actual_has_return_value == expected_has_return_value:
-            names = ["procedure", "function"]
-            raise InterfaceError(
-                f"'{n.method.name}' is a {names[expected_has_return_value]}, "
-                f"got call to {names[actual_has_return_value]}"
-            )
-
-        callback_count = int(self.receive_driver_downward())
-        expected_callback_count = len(n.method.callbacks)
-        if not callback_count == expected_callback_count:
-            raise InterfaceError(
-                f"'{n.method.name}' has a {expected_callback_count} callbacks, "
-                f"got {callback_count}"
-            )
-
-        for c in n.method.callbacks:
-            parameter_count = int(self.receive_driver_downward())
-            expected_parameter_count = len(c.parameters)
-            if not parameter_count == expected_parameter_count:
-                raise InterfaceError(
-                    f"'{c.name}' has {expected_parameter_count} parameters, "
-                    f"got {parameter_count}"
-                )
-
         return self.result().with_request_processed()._replace(
             assignments=assignments,
         )
@@ -362,3 +366,13 @@ class Executor(SandboxCommunicator, DriverCommunicator, ExecutionPreprocessor):
             self.evaluate(a)
             for a in n.arguments
         ])
+
+    def _on_downward_ReadLoop(self, n):
+        if not self.check_resolved(self.resolution.of(n, self.phase).range, n.loop.index.range):
+            # as in For
+            return
+
+        self.send_downward_lines([
+            self.evaluate(a.array)
+            for a in n.arguments
+        ], self.evaluate(n.loop.index.range))
@@ -0,0 +1,114 @@
+"""
+Instructions of the flat programs run by InstructionExecutor.
+
+Values are kept in a list of slots, indexed by numbers assigned when the program is assembled.
+A slot containing None holds a value which is not resolved (yet).
+Jump targets are positions in the list of instructions.
+"""
+
+from collections import namedtuple
+
+InstructionProgram = namedtuple("InstructionProgram", ["code", "slot_count"])
+
+
+# operands
+
+
+class Literal(namedtuple("Literal", ["value"])):
+    __slots__ = []
+
+    def load(self, slots):
+        return self.value
+
+
+class Load(namedtuple("Load", ["slot", "expression"])):
+    __slots__ = []
+
+    def load(self, slots):
+        return slots[self.slot]
+
+
+class LoadElement(namedtuple("LoadElement", ["slot", "expression", "array", "index"])):
+    """
+    Load a subscript, either from its own slot, if it was assigned directly, or from the array.
+    """
+
+    __slots__ = []
+
+    def load(self, slots):
+        value = slots[self.slot]
+        if value is None:
+            array = self.array.load(slots)
+            index = self.index.load(slots)
+            if array is not None and index is not None:
+                value = array[index]
+        return value
+
+
+class Compute(namedtuple("Compute", ["slot", "expression", "function"])):
+    """
+    Load an operation, either from its own slot, if it was assigned directly (see ResolveValue),
+    or computing it from its operands, with a function of the slots.
+    """
+
+    __slots__ = []
+
+    def load(self, slots):
+        value = slots[self.slot]
+        if value is None:
+            value = self.function(slots)
+        return value
+
+
+# scopes, that is, the static information shared by the instructions starting and ending a block
+
+# saved: pairs (slot, slot where its value is saved), for the slots assigned in the block
+# columns: triples (slot of the column, slot of the element, reference which is assigned the column),
+# see turingarena.driver.drive.columns
+ForScope = namedtuple("ForScope", [
+    "index",
+    "range",
+    "counter",
+    "size",
+    "lookahead",
+    "saved",
+    "columns",
+    "start",
+    "end",
+])
+LoopScope = namedtuple("LoopScope", ["breaking", "saved", "start"])
+CallbackScope = namedtuple("CallbackScope", ["index", "lookahead", "saved", "dispatch"])
+
+# instructions
+
+Assign = namedtuple("Assign", ["target", "value"])
+
+ReceiveUpward = namedtuple("ReceiveUpward", ["targets"])
+ReceiveUpwardLines = namedtuple("ReceiveUpwardLines", ["range", "arrays"])
+SendDownward = namedtuple("SendDownward", ["values"])
+SendDownwardLines = namedtuple("SendDownwardLines", ["range", "arrays"])
+AcceptCheckpoint = namedtuple("AcceptCheckpoint", [])
+
+LookaheadRequest = namedtuple("LookaheadRequest", [])
+ResolveValue = namedtuple("ResolveValue", ["value", "target", "values_by_request"])
+AcceptCall = namedtuple("AcceptCall", ["method", "arguments", "targets"])
+CompleteCall = namedtuple("CompleteCall", [])
+ReturnCall = namedtuple("ReturnCall", ["value"])
+SendCallbackArguments = namedtuple("SendCallbackArguments", ["values"])
+AcceptCallbackReturn = namedtuple("AcceptCallbackReturn", ["target"])
+AcceptCallbackEnd = namedtuple("AcceptCallbackEnd", [])
+AcceptExit = namedtuple("AcceptExit", [])
+
+Jump = namedtuple("Jump", ["target"])
+JumpUnless = namedtuple("JumpUnless", ["condition", "target"])
+JumpSwitch = namedtuple("JumpSwitch", ["value", "targets"])
+
+ForStart = namedtuple("ForStart", ["scope"])
+ForEnd = namedtuple("ForEnd", ["scope"])
+LoopStart = namedtuple("LoopStart", ["scope"])
+LoopEnd = namedtuple("LoopEnd", ["scope"])
+SetBreak = namedtuple("SetBreak", [])
+
+DispatchCallbacks = namedtuple("DispatchCallbacks", ["targets", "end"])
+EnterCallback = namedtuple("EnterCallback", ["scope"])
+LeaveCallback = namedtuple("LeaveCallback", ["scope"])
@@ -0,0 +1,299 @@
+import logging
+
+from turingarena import InterfaceError
+from turingarena.driver.common.description import TreeDumper
+from turingarena.driver.drive.assembler import InstructionAssembler
+from turingarena.driver.drive.columns import new_column, store
+from turingarena.driver.drive.comm import SandboxCommunicator, DriverCommunicator, check_argument
+
+
+class InstructionExecutor(SandboxCommunicator, DriverCommunicator):
+    """
+    Executes an interface by assembling it into a flat list of instructions,
+    run by an InstructionInterpreter.
+
+    Behaves like Executor, which is kept as reference implementation.
+    """
+
+    __slots__ = []
+
+    def execute(self, n):
+        program = InstructionAssembler().assemble_interface(n)
+
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug(f"assembled program: {TreeDumper().dump(program)}")
+
+        InstructionInterpreter(self, program.slot_count).run(program.code)
+
+
+class InstructionInterpreter:
+    """
+    Runs instructions, keeping the state of the execution:
+    the slots, the request received but not processed yet (if any),
+    and whether the innermost loop must be interrupted.
+
+    Each instruction is run by the method _run_<name of the instruction>,
+    which returns the position of the next instruction to run.
+    """
+
+    __slots__ = ["context", "slots", "lookahead", "breaking"]
+
+    def __init__(self, context, slot_count):
+        self.context = context
+        self.slots = [None] * slot_count
+        self.lookahead = None
+        self.breaking = False
+
+    def run(self, code):
+        handlers = {}
+        for instruction in code:
+            cls = type(instruction)
+            if cls not in handlers:
+                handlers[cls] = getattr(self, f"_run_{cls.__name__}")
+        program = [(handlers[type(instruction)], instruction) for instruction in code]
+
+        position = 0
+        end = len(program)
+        while position < end:
+            handler, instruction = program[position]
+            position = handler(instruction, position)
+
+    def evaluate(self, operand):
+        value = operand.load(self.slots)
+        if value is None:
+            raise ValueError(f"unable to evaluate expression {operand.expression}")
+        return value
+
+    def _save(self, saved):
+        slots = self.slots
+        for slot, save in saved:
+            slots[save] = slots[slot]
+
+    def _restore(self, saved):
+        slots = self.slots
+        for slot, save in saved:
+            slots[slot] = slots[save]
+
+    def _run_Assign(self, instruction, position):
+        self.slots[instruction.target] = self.evaluate(instruction.value)
+        return position + 1
+
+    def _run_ReceiveUpward(self, instruction, position):
+        values = self.context.receive_upward()
+        slots = self.slots
+        for target, value in zip(instruction.targets, values):
+            slots[target] = value
+        return position + 1
+
+    def _run_ReceiveUpwardLines(self, instruction, position):
+        slots = self.slots
+        size = instruction.range.load(slots)
+        if size is not None:
+            # as in ForStart, the loop is skipped if the range is not resolved
+            columns = self.context.receive_upward_lines(len(instruction.arrays), size)
+            for array, column in zip(instruction.arrays, columns):
+                # as in ForEnd, only the arrays not resolved yet are assigned
+                if array.load(slots) is None:
+                    slots[array.slot] = column
+        return position + 1
+
+    def _run_SendDownward(self, instruction, position):
+        self.context.send_downward([
+            self.evaluate(a)
+            for a in instruction.values
+        ])
+        return position + 1
+
+    def _run_SendDownwardLines(self, instruction, position):
+        size = instruction.range.load(self.slots)
+        if size is not None:
+            # as in ForStart, the loop is skipped if the range is not resolved
+            self.context.send_downward_lines([
+                self.evaluate(a)
+                for a in instruction.arrays
+            ], size)
+        return position + 1
+
+    def _run_AcceptCheckpoint(self, instruction, position):
+        self.context.accept_checkpoint(self.lookahead)
+        self.lookahead = None
+        return position + 1
+
+    def _run_LookaheadRequest(self, instruction, position):
+        if self.lookahead is None:
+            self.lookahead = self.context.next_request()
+        return position + 1
+
+    def _run_ResolveValue(self, instruction, position):
+        if instruction.value.load(self.slots) is None:
+            assert self.lookahead is not None
+            values = instruction.values_by_request
+            try:
+                value = values[self.lookahead]
+            except KeyError:
+                value = values[None]  # default
+            self.slots[instruction.target] = value
+        return position + 1
+
+    def _run_AcceptCall(self, instruction, position):
+        method = instruction.method
+        values = self.context.accept_call(self.lookahead, method)
+
+        slots = self.slots
+        for p, a, target, actual_value in zip(method.parameters, instruction.arguments, instruction.targets, values):
+            expected_value = a.load(slots) if a is not None else None
+            if expected_value is not None:
+                check_argument(p, expected_value, actual_value)
+            else:
+                slots[target] = actual_value
+
+        self.lookahead = None
+        return position + 1
+
+    def _run_CompleteCall(self, instruction, position):
+        self.context.report_ready()
+        self.context.send_driver_upward(0)  # no more callbacks
+        return position + 1
+
+    def _run_ReturnCall(self, instruction, position):
+        return_value = self.evaluate(instruction.value)
+        self.context.report_ready()
+        self.context.send_driver_upward(return_value)
+        return position + 1
+
+    def _run_SendCallbackArguments(self, instruction, position):
+        for a in instruction.values:
+            self.context.send_driver_upward(self.evaluate(a))
+        return position + 1
+
+    def _run_AcceptCallbackReturn(self, instruction, position):
+        value = self.context.accept_callback_return(self.lookahead, has_return_value=True)
+        self.slots[instruction.target] = value
+        return position + 1
+
+    def _run_AcceptCallbackEnd(self, instruction, position):
+        self.context.accept_callback_return(self.lookahead, has_return_value=False)
+        return position + 1
+
+    def _run_AcceptExit(self, instruction, position):
+        # the interface terminates here, accept_exit always raises
+        self.context.accept_exit(self.lookahead)
+        assert False, "This should not be reached"
+
+    def _run_Jump(self, instruction, position):
+        return instruction.target
+
+    def _run_JumpUnless(self, instruction, position):
+        if self.evaluate(instruction.condition):
+            return position + 1
+        else:
+            return instruction.target
+
+    def _run_JumpSwitch(self, instruction, position):
+        value = self.evaluate(instruction.value)
+        try:
+            return instruction.targets[value]
+        except KeyError:
+            raise InterfaceError(f"no case matches in switch")
+
+    def _run_ForStart(self, instruction, position):
+        scope = instruction.scope
+        slots = self.slots
+
+        size = scope.range.load(slots)
+        if size is None:
+            # we assume that if the range is not resolved, then the cycle should be skipped
+            return scope.end
+
+        self._save(scope.saved)
+        slots[scope.lookahead] = self.lookahead
+        for column, element, reference in scope.columns:
+            # allocated at the end of the first iteration, when the kind of values is known
+            slots[column] = None
+
+        if size <= 0:
+            self._assign_columns(scope)
+            return scope.end
+
+        slots[scope.size] = size
+        slots[scope.counter] = 0
+        slots[scope.index] = 0
+        return position + 1
+
+    def _run_ForEnd(self, instruction, position):
+        scope = instruction.scope
+        slots = self.slots
+
+        i = slots[scope.counter]
+        for column, element, reference in scope.columns:
+            value = slots[element]
+            values = slots[column]
+            if values is None:
+                values = new_column(slots[scope.size], value)
+            slots[column] = store(values, i, value)
+
+        # every iteration starts from the state before the loop
+        self._restore(scope.saved)
+        self.lookahead = slots[scope.lookahead]
+
+        i += 1
+        if i < slots[scope.size]:
+            slots[scope.counter] = i
+            slots[scope.index] = i
+            return scope.start
+
+        self._assign_columns(scope)
+        return position + 1
+
+    def _assign_columns(self, scope):
+        slots = self.slots
+        for column, element, reference in scope.columns:
+            values = slots[column]
+            slots[column] = None
+            if reference.load(slots) is None:
+                slots[reference.slot] = values if values is not None else []
+
+    def _run_LoopStart(self, instruction, position):
+        scope = instruction.scope
+        self._save(scope.saved)
+        self.slots[scope.breaking] = self.breaking
+        self.breaking = False
+        return position + 1
+
+    def _run_LoopEnd(self, instruction, position):
+        scope = instruction.scope
+        if self.breaking:
+            self.breaking = self.slots[scope.breaking]
+            return position + 1
+
+        # every iteration starts from the state before the loop, except for the request
+        self._restore(scope.saved)
+        return scope.start
+
+    def _run_SetBreak(self, instruction, position):
+        # as in Executor, the iteration is completed before leaving the loop
+        self.breaking = True
+        return position + 1
+
+    def _run_DispatchCallbacks(self, instruction, position):
+        [has_callback, callback_index] = self.context.receive_upward()
+        if has_callback:
+            return instruction.targets[callback_index]
+        else:
+            return instruction.end
+
+    def _run_EnterCallback(self, instruction, position):
+        scope = instruction.scope
+        self._save(scope.saved)
+        self.slots[scope.lookahead] = self.lookahead
+
+        self.context.report_ready()
+        self.context.send_driver_upward(1)  # has callbacks
+        self.context.send_driver_upward(scope.index)
+        return position + 1
+
+    def _run_LeaveCallback(self, instruction, position):
+        scope = instruction.scope
+        self._restore(scope.saved)
+        self.lookahead = self.slots[scope.lookahead]
+        return scope.dispatch
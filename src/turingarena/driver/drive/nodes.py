@@ -9,3 +9,5 @@ CallReturn = namedtuple("CallReturn", ["return_value"])
 CallCompleted = namedtuple("CallCompleted", [])
 AcceptCallbacks = namedtuple("AcceptCallbacks", ["callbacks"])
 ValueResolve = namedtuple("ValueResolve", ["value", "map"])
+# a for loop whose body only writes elements indexed by the loop variable (see ReadLoop)
+WriteLoop = namedtuple("WriteLoop", ["loop", "arguments"])
@@ -41,6 +41,18 @@ class ExecutionPreprocessor(
     def node_replacement_object(self, n):
         yield self.transform(n)
 
+    def node_replacement_For(self, n):
+        read_arguments = self.read_loop_arguments(n)
+        write_arguments = self.write_loop_arguments(n)
+        if read_arguments is not None:
+            # the whole loop is sent with a single write
+            yield ReadLoop(loop=n, arguments=read_arguments)
+        elif write_arguments is not None:
+            # the whole loop is received and parsed at once
+            yield WriteLoop(loop=n, arguments=write_arguments)
+        else:
+            yield self.transform(n)
+
     def node_replacement_Checkpoint(self, n):
         yield RequestLookahead()
         yield self.transform(n)
@@ -0,0 +1,267 @@
+"""
+Static analysis of the references resolved, that is, whose value is known to the driver,
+at each point of the execution of an interface.
+
+The analysis follows what Executor does, phase by phase, and records, for the nodes which need it,
+whether each relevant expression is resolved: True or False, if this is always the case,
+or None, if it depends on the execution (e.g., the reference is resolved only in a branch of an if),
+so that it has to be checked at runtime.
+"""
+
+from collections import namedtuple
+
+from turingarena.driver.common.nodes import *
+from turingarena.driver.common.operations import LOGICAL_OPERATORS
+from turingarena.driver.compile.analysis import ReferenceResolution
+from turingarena.driver.drive.analysis import ExecutionAnalyzer, ExecutionPhase, ReferenceDirection
+from turingarena.driver.drive.nodes import *
+from turingarena.util.visitor import visitormethod
+
+# range: whether the range is resolved (if not, the loop is skipped)
+# references: pairs (reference, whether it is resolved before the loop),
+# for the references resolved by the loop
+LoopResolution = namedtuple("LoopResolution", ["range", "references"])
+
+
+class Resolution(namedtuple("Resolution", ["annotations", "tree"])):
+    """
+    Result of the analysis of a (preprocessed) tree.
+
+    Annotations are indexed by the identity of the node, and the phase in which it is executed,
+    so the tree is kept here, to make sure that identities are not reused.
+    """
+
+    __slots__ = []
+
+    def of(self, n, phase):
+        return self.annotations[id(n), phase]
+
+
+class ResolutionState(namedtuple("ResolutionState", ["known", "maybe"])):
+    """
+    References which are resolved (known) and which may be resolved (maybe, a superset of known)
+    at a point of the execution.
+    """
+
+    __slots__ = []
+
+    def assign(self, references):
+        return ResolutionState(self.known | references, self.maybe | references)
+
+    def assign_maybe(self, references):
+        return self._replace(maybe=self.maybe | references)
+
+    def merge(self, other):
+        return ResolutionState(self.known & other.known, self.maybe | other.maybe)
+
+    @visitormethod
+    def status(self, e):
+        pass
+
+    def status_IntLiteral(self, e):
+        return True
+
+    def status_Variable(self, e):
+        if e in self.known:
+            return True
+        if e in self.maybe:
+            return None
+        return False
+
+    def status_Subscript(self, e):
+        if e in self.known:
+            return True
+
+        array = self.status(e.array)
+        index = self.status(e.index)
+        if array and index:
+            return True
+        if e in self.maybe or (array is not False and index is not False):
+            return None
+        return False
+
+    def status_Operation(self, e):
+        # an operation may also be resolved as a whole (e.g., the condition of an if, see ValueResolve)
+        if e in self.known:
+            return True
+
+        statuses = [self.status(o) for o in e.operands]
+        if all(statuses):
+            return True
+        if e in self.maybe:
+            return None
+        # the second operand of && and || may not be evaluated at all
+        if statuses[0] is False or (e.operator not in LOGICAL_OPERATORS and False in statuses):
+            return False
+        return None
+
+
+def merge_annotations(a, b):
+    if a == b:
+        return a
+    if isinstance(a, tuple) and type(a) is type(b) and len(a) == len(b):
+        values = [merge_annotations(x, y) for x, y in zip(a, b)]
+        if hasattr(a, "_make"):
+            return a._make(values)
+        return tuple(values)
+    # flags differing, so it depends on the execution
+    return None
+
+
+class ResolutionAnalyzer(ExecutionAnalyzer):
+    def __init__(self):
+        self.annotations = {}
+
+    def analyze(self, main, constants):
+        """
+        Analyze the preprocessed main block of an interface, with the given constants.
+        """
+        variables = frozenset(c.variable for c in constants)
+        self.resolve(main, None, ResolutionState(variables, variables))
+        return Resolution(self.annotations, main)
+
+    def annotate(self, n, phase, annotation):
+        key = (id(n), phase)
+        if key in self.annotations:
+            # reached again, maybe in a different state
+            annotation = merge_annotations(self.annotations[key], annotation)
+        self.annotations[key] = annotation
+
+    def resolve(self, n, phase, state):
+        return self._resolve(n, phase, state)
+
+    @visitormethod
+    def _resolve(self, n, phase, state):
+        pass
+
+    def _resolve_Block(self, n, phase, state):
+        for child in n.children:
+            state = self.resolve(child, phase, state)
+        return state
+
+    def _resolve_Step(self, n, phase, state):
+        if phase is not None:
+            return self.resolve(n.body, phase, state)
+
+        for phase in ExecutionPhase:
+            if phase == ExecutionPhase.UPWARD and n.direction != ReferenceDirection.UPWARD:
+                continue
+            state = self.resolve(n.body, phase, state)
+        return state
+
+    def _resolve_For(self, n, phase, state):
+        references = []
+        for a in self.reference_actions(n):
+            if isinstance(a, ReferenceResolution) and a.reference not in references:
+                references.append(a.reference)
+
+        range_status = state.status(n.index.range)
+        self.annotate(n, phase, LoopResolution(
+            range=range_status,
+            references=tuple((r, state.status(r)) for r in references),
+        ))
+
+        if range_status is False:
+            return state
+
+        # assignments in the body are discarded, except the arrays resolved by the loop
+        self.resolve(n.body, phase, state.assign({n.index.variable}))
+        return self._resolve_loop_arrays(state, range_status, references)
+
+    def _resolve_loop_arrays(self, state, range_status, references):
+        if range_status:
+            return state.assign(frozenset(references))
+        else:
+            return state.assign_maybe(frozenset(references))
+
+    def _resolve_Loop(self, n, phase, state):
+        # every iteration starts from the same state,
+        # and the assignments of the last one (the one breaking the loop) are kept
+        return self.resolve(n.body, phase, state)
+
+    def _resolve_If(self, n, phase, state):
+        then_body, else_body = n.branches
+        then_state = self.resolve(then_body, phase, state)
+        if else_body is not None:
+            else_state = self.resolve(else_body, phase, state)
+        else:
+            else_state = state
+        return then_state.merge(else_state)
+
+    def _resolve_Switch(self, n, phase, state):
+        [first, *others] = [
+            self.resolve(c.body, phase, state)
+            for c in n.cases
+        ]
+        for other in others:
+            first = first.merge(other)
+        return first
+
+    def _resolve_AcceptCallbacks(self, n, phase, state):
+        # assignments in callbacks are discarded
+        for callback in n.callbacks:
+            self.resolve(callback.body, None, state)
+        return state
+
+    def _resolve_object(self, n, phase, state):
+        if phase is None:
+            return state
+        return getattr(self, f"_resolve_{phase.name.lower()}")(n, state)
+
+    @visitormethod
+    def _resolve_upward(self, n, state):
+        pass
+
+    def _resolve_upward_object(self, n, state):
+        return state
+
+    def _resolve_upward_Write(self, n, state):
+        return state.assign(frozenset(n.arguments))
+
+    def _resolve_upward_WriteLoop(self, n, state):
+        references = [a.array for a in n.arguments]
+        range_status = state.status(n.loop.index.range)
+        self.annotate(n, ExecutionPhase.UPWARD, LoopResolution(
+            range=range_status,
+            references=tuple((r, state.status(r)) for r in references),
+        ))
+
+        if range_status is False:
+            return state
+        return self._resolve_loop_arrays(state, range_status, references)
+
+    @visitormethod
+    def _resolve_request(self, n, state):
+        pass
+
+    def _resolve_request_object(self, n, state):
+        return state
+
+    def _resolve_request_Return(self, n, state):
+        return state.assign({n.value})
+
+    def _resolve_request_ValueResolve(self, n, state):
+        self.annotate(n, ExecutionPhase.REQUEST, state.status(n.value))
+        return state.assign({n.value})
+
+    def _resolve_request_CallAccept(self, n, state):
+        self.annotate(n, ExecutionPhase.REQUEST, tuple(state.status(a) for a in n.arguments))
+        return state.assign(frozenset(
+            a
+            for a in n.arguments
+            if not isinstance(a, IntLiteral)
+        ))
+
+    @visitormethod
+    def _resolve_downward(self, n, state):
+        pass
+
+    def _resolve_downward_object(self, n, state):
+        return state
+
+    def _resolve_downward_ReadLoop(self, n, state):
+        self.annotate(n, ExecutionPhase.DOWNWARD, LoopResolution(
+            range=state.status(n.loop.index.range),
+            references=(),
+        ))
+        return state
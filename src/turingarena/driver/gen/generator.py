@@ -1,10 +1,10 @@
 import logging
 from abc import ABC, abstractmethod
 
+from turingarena.driver.cache import preprocessed
 from turingarena.driver.common.description import TreeDumper
 from turingarena.driver.common.expressions import AbstractExpressionCodeGen
 from turingarena.driver.common.genutils import LinesGenerator
-from turingarena.driver.gen.preprocess import SkeletonPreprocessor
 from turingarena.driver.gen.template import interface_template
 
 
@@ -13,7 +13,7 @@ class InterfaceCodeGen(ABC, LinesGenerator, AbstractExpressionCodeGen):
 
     def generate_to_file(self, interface, file):
         with self.collect_lines() as lines:
-            interface = SkeletonPreprocessor.create().transform(interface)
+            interface = preprocessed(interface).skeleton
             logging.debug(f"preprocessed interface: {TreeDumper().dump(interface)}")
             self.visit(interface)
 
@@ -57,6 +57,10 @@ class InterfaceCodeGen(ABC, LinesGenerator, AbstractExpressionCodeGen):
     def visit_Call(self, n):
         pass
 
+    def visit_ReadLoop(self, n):
+        # by default, the loop reads one line at a time
+        self.visit(n.loop)
+
     @abstractmethod
     def visit_If(self, n):
         pass
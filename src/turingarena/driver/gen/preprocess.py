@@ -21,6 +21,19 @@ class SkeletonPreprocessor(namedtuple("SkeletonPreprocessor", [
     def transform_Checkpoint(self, s):
         return Print([IntLiteral(0)])
 
+    def transform_For(self, n):
+        arguments = self.read_loop_arguments(n)
+        loop = super().transform_For(n)
+        if arguments is not None:
+            # the whole loop is flushed once (see replacement_nodes_ReadLoop)
+            loop = loop._replace(
+                body=loop.body._replace(
+                    children=tuple(c for c in loop.body.children if not isinstance(c, Flush)),
+                ),
+            )
+            return ReadLoop(loop=loop, arguments=arguments)
+        return loop
+
     def transform_Callback(self, n):
         n = super().transform_Callback(n)
         prepend_nodes = (
@@ -60,6 +73,11 @@ class SkeletonPreprocessor(namedtuple("SkeletonPreprocessor", [
         yield Flush()
         yield n
 
+    def replacement_nodes_ReadLoop(self, n):
+        # flush once, before the whole loop
+        yield Flush()
+        yield n
+
     def replacement_nodes_Call(self, n):
         yield n
         if n.method.callbacks:
@@ -100,7 +100,7 @@ class CppCodeGen(InterfaceCodeGen):
         self.line(f"""scanf("{format_string}", {scanf_args});""")
 
     def visit_If(self, n):
-        condition = self.visit(n.condition)
+        condition = self.condition(n.condition)
         headers = [
             f"if ({condition}) {{",
             f"}} else {{",
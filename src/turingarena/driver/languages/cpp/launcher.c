@@ -0,0 +1,114 @@
+/*
+ * Launcher of sandboxed executables: installs the seccomp filter and executes the program,
+ * without starting a Python interpreter at every run.
+ *
+ * Usage: launcher <executable>
+ *
+ * The system calls allowed, or failing with EACCES, are listed below, any other one raises SIGSYS.
+ * Some are only used by recent versions of the C library (e.g., newfstatat instead of fstat).
+ * The list is the one of x86_64: on other architectures the launcher is not compiled,
+ * and C/C++ programs cannot be run.
+ */
+
+#include <errno.h>
+#include <stddef.h>
+#include <stdio.h>
+#include <unistd.h>
+#include <linux/audit.h>
+#include <linux/fcntl.h>
+#include <linux/filter.h>
+#include <linux/seccomp.h>
+#include <sys/prctl.h>
+#include <sys/syscall.h>
+
+#ifndef __x86_64__
+#error "architecture not supported by the launcher"
+#endif
+
+#define LOAD_FIELD(field) \
+    BPF_STMT(BPF_LD | BPF_W | BPF_ABS, offsetof(struct seccomp_data, field))
+/* the lower 32 bits (little-endian), enough for int arguments */
+#define LOAD_ARG(i) LOAD_FIELD(args[i])
+#define RETURN(action) \
+    BPF_STMT(BPF_RET | BPF_K, (action))
+#define ON_SYSCALL(nr, action) \
+    BPF_JUMP(BPF_JMP | BPF_JEQ | BPF_K, (nr), 0, 1), RETURN(action)
+
+#define ALLOW(name) ON_SYSCALL(__NR_##name, SECCOMP_RET_ALLOW)
+#define DENY(name) ON_SYSCALL(__NR_##name, SECCOMP_RET_ERRNO | EACCES)
+
+static struct sock_filter filter[] = {
+    /* system calls of other architectures (e.g., 32 bit ones) would have other numbers */
+    LOAD_FIELD(arch),
+    BPF_JUMP(BPF_JMP | BPF_JEQ | BPF_K, AUDIT_ARCH_X86_64, 1, 0),
+    RETURN(SECCOMP_RET_KILL),
+
+    LOAD_FIELD(nr),
+#ifdef __X32_SYSCALL_BIT
+    BPF_JUMP(BPF_JMP | BPF_JGE | BPF_K, __X32_SYSCALL_BIT, 0, 1),
+    RETURN(SECCOMP_RET_KILL),
+#endif
+
+    /* no need to specify arguments of read/write (there should not be any other readable/writable fd) */
+    ALLOW(read), ALLOW(write), ALLOW(readv), ALLOW(writev),
+    ALLOW(lseek), ALLOW(ioctl), ALLOW(fstat),
+    ALLOW(exit), ALLOW(exit_group), ALLOW(rt_sigreturn),
+    ALLOW(mmap), ALLOW(munmap), ALLOW(mremap), ALLOW(brk), ALLOW(mprotect),
+    ALLOW(futex),
+    ALLOW(execve),
+#ifdef __NR_arch_prctl
+    ALLOW(arch_prctl),
+#endif
+    ALLOW(uname), ALLOW(set_tid_address),
+#ifdef __NR_time
+    ALLOW(time),
+#endif
+    ALLOW(clock_gettime),
+
+#ifdef __NR_access
+    DENY(access),
+#endif
+    DENY(madvise),
+    DENY(getrandom), DENY(prlimit64), DENY(rseq), DENY(set_robust_list),
+#ifdef __NR_readlink
+    DENY(readlink),
+#endif
+
+    /*
+     * newfstatat only as fstat, i.e., on an open fd with AT_EMPTY_PATH (otherwise it fails with EACCES).
+     * Checked last, as the arguments replace the system call number in the accumulator.
+     */
+    BPF_JUMP(BPF_JMP | BPF_JEQ | BPF_K, __NR_newfstatat, 0, 6),
+    LOAD_ARG(0),
+    BPF_JUMP(BPF_JMP | BPF_JEQ | BPF_K, (__u32) AT_FDCWD, 3, 0),
+    LOAD_ARG(3),
+    BPF_JUMP(BPF_JMP | BPF_JEQ | BPF_K, AT_EMPTY_PATH, 0, 1),
+    RETURN(SECCOMP_RET_ALLOW),
+    RETURN(SECCOMP_RET_ERRNO | EACCES),
+
+    RETURN(SECCOMP_RET_TRAP),
+};
+
+int main(int argc, char **argv) {
+    if (argc != 2) {
+        fprintf(stderr, "usage: %s <executable>\n", argv[0]);
+        return 2;
+    }
+
+    struct sock_fprog program = {
+        .len = sizeof(filter) / sizeof(filter[0]),
+        .filter = filter,
+    };
+
+    if (prctl(PR_SET_NO_NEW_PRIVS, 1, 0, 0, 0) != 0 || prctl(PR_SET_SECCOMP, SECCOMP_MODE_FILTER, &program) != 0) {
+        perror("unable to install the seccomp filter");
+        return 2;
+    }
+
+    /* from here every system call that is not allowed results in SIGSYS */
+
+    char *const child_argv[] = {argv[1], NULL};
+    char *const child_envp[] = {NULL};
+    execve(argv[1], child_argv, child_envp);
+    return 2;
+}
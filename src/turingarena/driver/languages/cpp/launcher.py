@@ -0,0 +1,85 @@
+"""
+Launcher of the C/C++ executables (see launcher.c), replacing a Python trampoline installing the sandbox.
+
+The launcher is compiled the first time it is needed, and kept in a cache directory,
+so that it is shared by all the processes of the same user.
+A launcher in the cache is only used if it is owned by the current user and not writable by others,
+otherwise it is compiled again.
+"""
+
+import hashlib
+import logging
+import os
+import subprocess
+import tempfile
+from functools import lru_cache
+
+import pkg_resources
+
+logger = logging.getLogger(__name__)
+
+
+def launcher_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "turingarena", "launchers")
+
+
+@lru_cache()
+def launcher_path():
+    """
+    Path of the launcher executable, or None if it cannot be compiled.
+    The result is cached, so a failed compilation is not retried by every run.
+    """
+    source_path = pkg_resources.resource_filename(__name__, "launcher.c")
+    with open(source_path, "rb") as f:
+        key = hashlib.sha256(f.read()).hexdigest()
+
+    directory = launcher_dir()
+    try:
+        # only the current user can add launchers
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        if not _is_trusted(directory):
+            raise PermissionError(f"{directory} is writable by other users")
+    except OSError as e:
+        logger.warning(f"unable to use {directory}, compiling the launcher in a temporary directory: {e}")
+        directory = tempfile.mkdtemp(prefix="turingarena-launcher-")
+
+    path = os.path.join(directory, f"launcher-{key[:16]}")
+    if os.path.exists(path) and _is_trusted(path):
+        return path
+
+    try:
+        _compile(source_path, directory, path)
+    except (subprocess.CalledProcessError, OSError):
+        # OSError: e.g., gcc is not installed
+        logger.error("unable to compile the launcher", exc_info=True)
+        return None
+    return path
+
+
+def _is_trusted(path):
+    stat = os.stat(path)
+    return stat.st_uid == os.getuid() and not stat.st_mode & 0o022
+
+
+def _compile(source_path, directory, path):
+    # compiled to a temporary file and then renamed, so concurrent processes never run a partial executable
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    try:
+        try:
+            _run_gcc(["-static"], source_path, temp_path)
+        except subprocess.CalledProcessError:
+            # e.g., the static C library is not installed
+            logger.warning("unable to link the launcher statically, linking it dynamically")
+            _run_gcc([], source_path, temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def _run_gcc(options, source_path, output_path):
+    cli = ["gcc", "-O2", *options, "-o", output_path, source_path]
+    logger.debug("Compiling launcher: " + " ".join(cli))
+    subprocess.run(cli, universal_newlines=True, check=True)
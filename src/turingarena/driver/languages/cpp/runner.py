@@ -6,7 +6,7 @@ from contextlib import contextmanager
 from functools import lru_cache
 from subprocess import CalledProcessError
 
-import pkg_resources
+from turingarena.driver.languages.cpp.launcher import launcher_path
 from turingarena.driver.sandbox.connection import create_failed_connection
 from turingarena.driver.sandbox.popen import create_popen_process_connection
 from turingarena.driver.sandbox.rlimits import set_rlimits
@@ -26,12 +26,16 @@ class CppProgramRunner(ProgramRunner):
         except CalledProcessError:
             yield create_failed_connection("Compilation failed.")
         else:
-            sandbox_path = pkg_resources.resource_filename(__name__, "sandbox.py")
-
-            yield create_popen_process_connection(
-                ["python3", sandbox_path, self.executable_path],
-                preexec_fn=set_rlimits,
-            )
+            yield self.start_process()
+
+    def start_process(self):
+        launcher = launcher_path()
+        if launcher is None:
+            return create_failed_connection("Unable to compile the launcher.")
+        return create_popen_process_connection(
+            [launcher, self.executable_path],
+            preexec_fn=set_rlimits,
+        )
 
     @staticmethod
     @lru_cache()
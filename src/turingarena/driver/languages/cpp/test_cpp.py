@@ -1,8 +1,11 @@
+import os
 import signal
+import subprocess
 
 import pytest
 
 from turingarena.driver.client.exceptions import AlgorithmRuntimeError
+from turingarena.driver.languages.cpp import launcher
 from turingarena.driver.tests.test_utils import define_algorithm
 
 protocol_text = """
@@ -179,3 +182,50 @@ def test_get_time_memory_usage():
 
     # TODO: memory info is not that precise due to problem with fork() + exec()
     # assert 1024 * 1024 < info1.memory_usage < 1024 * 1024 * 40
+
+
+@pytest.fixture
+def launcher_cache(tmpdir, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmpdir))
+    launcher.launcher_path.cache_clear()
+    yield
+    launcher.launcher_path.cache_clear()
+
+
+def test_launcher_not_compiled(launcher_cache, monkeypatch):
+    attempts = []
+
+    def run_gcc(options, source_path, output_path):
+        attempts.append(options)
+        raise subprocess.CalledProcessError(1, "gcc")
+
+    monkeypatch.setattr(launcher, "_run_gcc", run_gcc)
+
+    with cpp_algorithm("int test() { return 0; }") as algo:
+        for _ in range(2):
+            with pytest.raises(AlgorithmRuntimeError) as excinfo:
+                with algo.run() as p:
+                    p.functions.test()
+            assert "Unable to compile the launcher." in str(excinfo.value)
+
+    # a static and then a dynamic link, only for the first run
+    assert attempts == [["-static"], []]
+
+
+def test_launcher_without_gcc(launcher_cache, monkeypatch):
+    def run_gcc(options, source_path, output_path):
+        raise FileNotFoundError("gcc")
+
+    monkeypatch.setattr(launcher, "_run_gcc", run_gcc)
+
+    assert launcher.launcher_path() is None
+    assert not [name for name in os.listdir(launcher.launcher_dir()) if name.endswith(".tmp")]
+
+
+def test_launcher_not_trusted(launcher_cache):
+    path = launcher.launcher_path()
+    os.chmod(path, 0o777)
+
+    launcher.launcher_path.cache_clear()
+    assert launcher.launcher_path() == path
+    assert not os.stat(path).st_mode & 0o022
@@ -2,6 +2,8 @@ from turingarena.driver.gen.generator import InterfaceCodeGen
 
 
 class JavaCodeGen(InterfaceCodeGen):
+    def int_from_condition(self, condition):
+        return f"({condition} ? 1 : 0)"
 
     def visit_Interface(self, n):
         self.line("import java.util.Scanner;")
@@ -123,8 +125,8 @@ class JavaCodeGen(InterfaceCodeGen):
             self.line(f"{self.visit(arg)} = in.nextInt();")
 
     def visit_If(self, statement):
-        condition = self.visit(statement.condition)
-        self.line(f"if ({condition} != 0) {{")
+        condition = self.condition(statement.condition)
+        self.line(f"if ({condition}) {{")
         with self.indent():
             self.visit(statement.branches.then_body)
         if statement.branches.else_body is not None:
@@ -1,4 +1,6 @@
+from turingarena.driver.common.nodes import ReadLoop
 from turingarena.driver.gen.generator import InterfaceCodeGen
+from turingarena.driver.gen.nodes import Alloc
 
 SKELETON_REAL_MAIN = r"""
 if __name__ == '__main__':
@@ -16,6 +18,11 @@ if __name__ == '__main__':
 
 
 class PythonCodeGen(InterfaceCodeGen):
+    logical_operators = {"&&": "and", "||": "or"}
+
+    def int_from_condition(self, condition):
+        return f"int({condition})"
+
     def visit_Interface(self, n):
         self.line('import os as _os')
         self.line()
@@ -28,6 +35,18 @@ class PythonCodeGen(InterfaceCodeGen):
         self.line()
         self.line(SKELETON_REAL_MAIN)
 
+    def visit_Block(self, n):
+        # arrays read by a whole loop are created by the loop (see visit_ReadLoop), so they are not allocated
+        read_arrays = {
+            c.arguments[0].array
+            for c in n.children
+            if isinstance(c, ReadLoop) and len(c.arguments) == 1
+        }
+        for child in n.children:
+            if isinstance(child, Alloc) and child.reference in read_arrays:
+                continue
+            self.visit(child)
+
     def visit_Prototype(self, func):
         arguments = ', '.join(
             [self.visit(p) for p in func.parameters] +
@@ -97,8 +116,16 @@ class PythonCodeGen(InterfaceCodeGen):
         arguments = ", ".join(self.visit(arg) for arg in n.arguments)
         self.line(f'[{arguments}] = map(int, input().split())')
 
+    def visit_ReadLoop(self, n):
+        if len(n.arguments) != 1:
+            return super().visit_ReadLoop(n)
+
+        [argument] = n.arguments
+        size = self.visit(n.loop.index.range)
+        self.line(f"{self.visit(argument.array)} = [int(input()) for _ in range({size})]")
+
     def visit_If(self, n):
-        condition = self.visit(n.condition)
+        condition = self.condition(n.condition)
         headers = [
             f"if {condition}:",
             f"else:"
@@ -1,12 +1,25 @@
+import array
+import ctypes
 import os
 import shutil
+import socket
+import subprocess
+import threading
+from collections import namedtuple
 from contextlib import contextmanager
 
 import pkg_resources
-from turingarena.driver.sandbox.popen import create_popen_process_connection
+from turingarena.driver.sandbox.connection import SandboxProcessConnection
+from turingarena.driver.sandbox.cgroup import Cgroup
+from turingarena.driver.sandbox.popen import create_popen_process_connection, create_process_manager
+from turingarena.driver.sandbox.reader import PipeReader
 from turingarena.driver.sandbox.rlimits import set_rlimits
 from turingarena.driver.sandbox.runner import ProgramRunner
 
+# see prctl(2)
+PR_SET_CHILD_SUBREAPER = 36
+PR_GET_CHILD_SUBREAPER = 37
+
 
 class PythonProgramRunner(ProgramRunner):
     __slots__ = []
@@ -22,9 +35,126 @@ class PythonProgramRunner(ProgramRunner):
         with open(self.skeleton_path, "w") as f:
             self.language.Generator().generate_to_file(self.interface, f)
 
-        sandbox_path = pkg_resources.resource_filename(__name__, "sandbox.py")
+        yield self.start_process()
 
-        yield create_popen_process_connection(
+    def start_process(self):
+        if Zygote.enabled:
+            return Zygote.get().start(self.program.source_path, self.skeleton_path)
+
+        sandbox_path = pkg_resources.resource_filename(__name__, "sandbox.py")
+        return create_popen_process_connection(
             ["python3", sandbox_path, self.program.source_path, self.skeleton_path],
             preexec_fn=set_rlimits,
         )
+
+
+class ZygoteProcess(namedtuple("ZygoteProcess", ["pid", "stdout"])):
+    """
+    Process forked by the zygote, used in place of a Popen object (see create_process_manager).
+    """
+
+    __slots__ = []
+
+    def send_signal(self, signal):
+        os.kill(self.pid, signal)
+
+
+class Zygote:
+    """
+    Client of the zygote (see zygote.py), started the first time a Python solution is run,
+    and then kept running, to start the processes of all the runs.
+
+    Processes forked by the zygote are adopted by the driver, which is a child subreaper (see prctl(2))
+    only while the zygote starts a process, so that other orphaned processes are adopted as usual.
+
+    The zygote is useful only if the process running the driver serves many runs (e.g., when the driver
+    runs in a thread of the client), so it is disabled in processes serving a single run
+    (e.g., the workers of the daemon), which start Python solutions with a new interpreter.
+    """
+
+    enabled = True
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self.owner = os.getpid()
+        self.lock = threading.Lock()
+
+        self.connection, zygote_connection = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        with zygote_connection:
+            zygote_path = pkg_resources.resource_filename(__name__, "zygote.py")
+            self.process = subprocess.Popen(
+                ["python3", zygote_path, str(zygote_connection.fileno())],
+                pass_fds=[zygote_connection.fileno()],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                # inherited by all the processes
+                preexec_fn=set_rlimits,
+            )
+
+    @classmethod
+    def get(cls):
+        with cls._instance_lock:
+            instance = cls._instance
+            # the processes can only be adopted by the process which started the zygote
+            if instance is None or instance.owner != os.getpid() or instance.process.poll() is not None:
+                instance = cls._instance = cls()
+            return instance
+
+    def start(self, source_path, skeleton_path):
+        # the process joins the cgroup before running the solution
+        cgroup = Cgroup.create()
+        cgroup_procs_path = cgroup.procs_path if cgroup is not None else ""
+
+        stdin_reader, stdin_writer = os.pipe()
+        stdout_reader, stdout_writer = os.pipe()
+        try:
+            with self.lock:
+                # the process is adopted when the intermediate process exits, before the zygote replies
+                was_subreaper = _get_child_subreaper()
+                _set_child_subreaper(True)
+                try:
+                    self.connection.sendmsg(
+                        [f"{source_path}\0{skeleton_path}\0{cgroup_procs_path}".encode()],
+                        [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array("i", [stdin_reader, stdout_writer]))],
+                    )
+                    reply = self.connection.recv(64)
+                finally:
+                    _set_child_subreaper(was_subreaper)
+            if not reply:
+                raise RuntimeError("the zygote of Python processes terminated")
+        except:
+            os.close(stdin_writer)
+            os.close(stdout_reader)
+            if cgroup is not None:
+                cgroup.remove()
+            raise
+        finally:
+            os.close(stdin_reader)
+            os.close(stdout_writer)
+
+        stdout = open(stdout_reader, "rb", buffering=0)
+        return SandboxProcessConnection(
+            downward=open(stdin_writer, "w", buffering=1),
+            # the output of the process is read directly from the pipe, with deadlines
+            upward=PipeReader(stdout.fileno()),
+            manager=create_process_manager(ZygoteProcess(int(reply), stdout), cgroup),
+        )
+
+
+def _get_child_subreaper():
+    value = ctypes.c_int()
+    _prctl(PR_GET_CHILD_SUBREAPER, ctypes.byref(value))
+    return bool(value.value)
+
+
+def _set_child_subreaper(enabled):
+    _prctl(PR_SET_CHILD_SUBREAPER, int(enabled))
+
+
+def _prctl(option, arg):
+    libc = ctypes.CDLL(None, use_errno=True)
+    if libc.prctl(option, arg, 0, 0, 0) != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
@@ -1,6 +1,6 @@
 import errno
-import sys
 import os
+import sys
 
 import seccomplite
 
@@ -22,9 +22,7 @@ def init_sandbox():
     filter.load()
 
 
-def main():
-    source_path, skeleton_path = sys.argv[1:]
-
+def run(source_path, skeleton_path):
     with open(source_path) as source_file:
         source_string = source_file.read()
     with open(skeleton_path) as skeleton_file:
@@ -46,5 +44,11 @@ def main():
     skeleton.main(source)
 
 
+def main():
+    # used when the zygote is not (see Zygote in runner.py)
+    source_path, skeleton_path = sys.argv[1:]
+    run(source_path, skeleton_path)
+
+
 if __name__ == "__main__":
     main()
@@ -1,3 +1,11 @@
+import io
+
+import pytest
+
+from turingarena.driver.compile.compile import Compiler
+from turingarena.driver.language import Language
+from turingarena.driver.languages.python import runner
+from turingarena.driver.languages.python.runner import Zygote
 from turingarena.driver.tests.test_utils import define_algorithm
 
 
@@ -10,14 +18,58 @@ interface_text = """
 """
 
 
-def test_sandbox_smoke():
-    with define_algorithm(
-            interface_text=interface_text,
-            language_name="Python",
-            source_text="""if True:
-                def test():
-                    return 3
-            """,
-    ) as algo:
+def python_algorithm():
+    return define_algorithm(
+        interface_text=interface_text,
+        language_name="Python",
+        source_text="""if True:
+            def test():
+                return 3
+        """,
+    )
+
+
+@pytest.mark.parametrize("zygote", [True, False])
+def test_sandbox_smoke(zygote, monkeypatch):
+    monkeypatch.setattr(Zygote, "enabled", zygote)
+    with python_algorithm() as algo:
         with algo.run() as p:
             assert p.functions.test() == 3
+
+
+def test_zygote_subreaper_only_when_starting():
+    # the driver runs in this process, which must not keep adopting orphaned processes
+    with python_algorithm() as algo:
+        with algo.run() as p:
+            assert not runner._get_child_subreaper()
+            assert p.functions.test() == 3
+    assert not runner._get_child_subreaper()
+
+
+def test_read_loop_not_allocated():
+    interface = Compiler.create().compile_interface_source("""
+        procedure p(n, a[], b[][]);
+        main {
+            read n;
+            for i to n {
+                read a[i];
+            }
+            for i to n {
+                for j to n {
+                    read b[i][j];
+                }
+            }
+            call p(n, a, b);
+        }
+    """)
+    skeleton = io.StringIO()
+    Language.from_name("Python").Generator().generate_to_file(interface, skeleton)
+    lines = [l.strip() for l in skeleton.getvalue().splitlines()]
+
+    # arrays read by a whole loop are created by the loop
+    assert "a = [int(input()) for _ in range(n)]" in lines
+    assert "b[i] = [int(input()) for _ in range(n)]" in lines
+    assert "a = [None] * n" not in lines
+    assert "b[i] = [None] * n" not in lines
+    # but not the outer dimensions
+    assert "b = [None] * n" in lines
@@ -0,0 +1,123 @@
+"""
+Zygote of the processes running Python solutions.
+
+Started once, with the interpreter initialized and the modules below already imported,
+it forks a process for each run, which installs the sandbox and runs the solution (see sandbox.py).
+Resource limits are set when starting the zygote, and inherited by the processes.
+
+Requests are received from the socket given as argument: each request contains the paths
+of the source and of the skeleton, the path of the cgroup.procs file of the cgroup to join (or an empty string),
+and the file descriptors to use as standard input and output.
+The zygote replies with the PID of the process.
+
+The process is forked twice, and the intermediate process exits immediately,
+so that the process is adopted by the driver, which is a child subreaper (see prctl(2))
+until the zygote replies, and can wait for it, and get its resource usage, as for any other child.
+
+Usage: python3 zygote.py <socket fd>
+"""
+
+import array
+import os
+import socket
+import sys
+import traceback
+
+import sandbox
+
+# modules commonly used by solutions, available even if the sandbox denies opening files
+import bisect
+import collections
+import functools
+import heapq
+import itertools
+import math
+import re
+import string
+
+MAX_REQUEST_SIZE = 64 * 1024
+
+
+def main():
+    _, fd = sys.argv
+    with socket.socket(fileno=int(fd)) as connection:
+        serve(connection)
+
+
+def serve(connection):
+    while True:
+        request = receive_request(connection)
+        if request is None:
+            break
+
+        paths, fds = request
+        pid_reader, pid_writer = os.pipe()
+        intermediate = os.fork()
+        if not intermediate:
+            connection.close()
+            os.close(pid_reader)
+            pid = os.fork()
+            if not pid:
+                os.close(pid_writer)
+                run_child(paths, fds)
+            os.write(pid_writer, b"%d\n" % pid)
+            os._exit(0)
+
+        os.close(pid_writer)
+        for fd in fds:
+            os.close(fd)
+        # once the intermediate process exits, the child is adopted by the driver
+        os.waitpid(intermediate, 0)
+        with os.fdopen(pid_reader, "rb") as f:
+            connection.sendall(f.read())
+
+
+def receive_request(connection):
+    fds = array.array("i")
+    data, ancillary, _, _ = connection.recvmsg(MAX_REQUEST_SIZE, socket.CMSG_SPACE(2 * fds.itemsize))
+    if not data:
+        return None
+    for level, type, payload in ancillary:
+        if level == socket.SOL_SOCKET and type == socket.SCM_RIGHTS:
+            fds.frombytes(payload[:len(payload) - len(payload) % fds.itemsize])
+    return data.decode().split("\0"), list(fds)
+
+
+def run_child(paths, fds):
+    status = 0
+    try:
+        stdin_fd, stdout_fd = fds
+        os.dup2(stdin_fd, 0)
+        os.dup2(stdout_fd, 1)
+        os.close(stdin_fd)
+        os.close(stdout_fd)
+
+        source_path, skeleton_path, cgroup_procs_path = paths
+        if cgroup_procs_path:
+            with open(cgroup_procs_path, "w") as f:
+                f.write("0")
+        sandbox.run(source_path, skeleton_path)
+    except SystemExit as e:
+        if e.code is None:
+            status = 0
+        elif isinstance(e.code, int):
+            status = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            status = 1
+    except BaseException:
+        traceback.print_exc()
+        status = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(status)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
@@ -66,6 +66,9 @@ class RustCodeGen(InterfaceCodeGen):
     def visit_Subscript(self, e):
         return f"{self.visit(e.array)}[{self.visit(e.index)} as usize]"
 
+    def int_from_condition(self, condition):
+        return f"(({condition}) as i64)"
+
     def visit_Prototype(self, n):
         return_type = "-> i64" if n.has_return_value else ""
         value_parameters = [self.visit(p) for p in n.parameters]
@@ -132,9 +135,9 @@ class RustCodeGen(InterfaceCodeGen):
         self.line(f"readln!({args});")
 
     def visit_If(self, n):
-        condition = self.visit(n.condition)
+        condition = self.condition(n.condition)
         headers = [
-            f"if {condition} != 0 {{",
+            f"if {condition} {{",
             f"}} else {{",
         ]
         for header, body in zip(headers, n.branches):
@@ -0,0 +1,197 @@
+"""
+Resource accounting and limits with cgroups v2.
+
+Each process is placed in a cgroup of its own, created under the cgroup given by TURINGARENA_CGROUP,
+which must be a cgroup v2 delegated to the user running the driver (see cgroups(7)),
+with the memory and pids controllers available, and without processes of its own.
+Resource usage is then read from the files of the cgroup, without stopping the process,
+and memory and number of processes are limited by the kernel (see also TURINGARENA_CGROUP_PIDS_LIMIT).
+
+If the variable is not set, or the cgroup cannot be used, processes are managed as before,
+with resource limits and wait4() (see PopenProcessManager).
+"""
+
+import logging
+import os
+import tempfile
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+CGROUP_VARIABLE = "TURINGARENA_CGROUP"
+
+CONTROLLERS = ["memory", "pids"]
+
+# maximum number of processes in each cgroup, see default_pids_limit()
+PIDS_LIMIT_VARIABLE = "TURINGARENA_CGROUP_PIDS_LIMIT"
+
+# same as the default of set_rlimits
+MEMORY_LIMIT = 256 * 1024 * 1024
+
+
+@lru_cache()
+def cgroup_root():
+    """
+    Path of the cgroup where the cgroups of the processes are created, or None if cgroups are not used.
+    """
+    path = os.environ.get(CGROUP_VARIABLE)
+    if not path:
+        return None
+
+    try:
+        with open(os.path.join(path, "cgroup.controllers")) as f:
+            available = f.read().split()
+        missing = [c for c in CONTROLLERS if c not in available]
+        if missing:
+            logger.warning(f"controllers {missing} not available in cgroup {path}, not using cgroups")
+            return None
+
+        with open(os.path.join(path, "cgroup.subtree_control")) as f:
+            enabled = f.read().split()
+        if any(c not in enabled for c in CONTROLLERS):
+            _write(os.path.join(path, "cgroup.subtree_control"), " ".join(f"+{c}" for c in CONTROLLERS))
+    except OSError as e:
+        logger.warning(f"cannot use cgroup {path}, not using cgroups: {e}")
+        return None
+
+    return path
+
+
+def default_pids_limit():
+    """
+    Maximum number of processes in each cgroup, given by TURINGARENA_CGROUP_PIDS_LIMIT.
+
+    Threads count as processes, and the JVM starts some for each CPU (e.g., for the garbage collector),
+    so by default the limit grows with the number of CPUs.
+    """
+    value = os.environ.get(PIDS_LIMIT_VARIABLE)
+    if value:
+        return int(value)
+    return 64 + 4 * (os.cpu_count() or 1)
+
+
+class Cgroup:
+    """
+    Cgroup containing a single process (and its threads).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._peak_fd = None
+
+    @classmethod
+    def create(cls, memory_limit=None, pids_limit=None):
+        """
+        Create a new cgroup with the given limits, or return None if cgroups are not used
+        or the cgroup cannot be created.
+        """
+        root = cgroup_root()
+        if root is None:
+            return None
+
+        if memory_limit is None:
+            memory_limit = MEMORY_LIMIT
+        if pids_limit is None:
+            pids_limit = default_pids_limit()
+
+        cgroup = None
+        try:
+            cgroup = cls(tempfile.mkdtemp(prefix="process-", dir=root))
+            cgroup._write("memory.max", str(memory_limit))
+            cgroup._write("pids.max", str(pids_limit))
+            if os.path.exists(cgroup._file("memory.swap.max")):
+                # swapped out memory would not be accounted in memory.current
+                cgroup._write("memory.swap.max", "0")
+        except OSError as e:
+            logger.warning(f"cannot create a cgroup in {root}, not using cgroups: {e}")
+            if cgroup is not None:
+                cgroup.remove()
+            return None
+        return cgroup
+
+    @property
+    def procs_path(self):
+        return self._file("cgroup.procs")
+
+    def join(self):
+        """
+        Move the calling process into this cgroup (e.g., in preexec_fn of Popen).
+        """
+        _write(self.procs_path, "0")
+
+    def time_usage(self):
+        """
+        User CPU time of the processes in this cgroup, in seconds, as ru_utime.
+        """
+        with open(self._file("cpu.stat")) as f:
+            stat = dict(line.split() for line in f)
+        return int(stat["user_usec"]) / 1e6
+
+    def memory_usage(self):
+        with open(self._file("memory.current")) as f:
+            return int(f.read())
+
+    def peak_memory_usage(self):
+        """
+        Peak memory usage since the previous call, or None if not supported by the kernel.
+
+        The peak is reset after each reading (supported since Linux 6.12),
+        otherwise it is the peak since the process started.
+        """
+        if self._peak_fd is None:
+            try:
+                self._peak_fd = os.open(self._file("memory.peak"), os.O_RDWR)
+            except FileNotFoundError:
+                return None
+
+        peak = int(os.pread(self._peak_fd, 64, 0))
+        try:
+            os.write(self._peak_fd, b"reset")
+        except OSError:
+            pass
+        return peak
+
+    def out_of_memory(self):
+        """
+        Whether a process in this cgroup was killed because the memory limit was exceeded.
+        """
+        with open(self._file("memory.events")) as f:
+            events = dict(line.split() for line in f)
+        return int(events.get("oom_kill", 0)) > 0
+
+    def kill(self):
+        """
+        Kill all the processes in this cgroup, return False if not supported by the kernel.
+        """
+        try:
+            self._write("cgroup.kill", "1")
+        except FileNotFoundError:
+            return False
+        return True
+
+    def remove(self):
+        """
+        Remove this cgroup, once all its processes terminated.
+        """
+        if self._peak_fd is not None:
+            os.close(self._peak_fd)
+            self._peak_fd = None
+        try:
+            os.rmdir(self.path)
+        except OSError as e:
+            logger.warning(f"cannot remove cgroup {self.path}: {e}")
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _write(self, name, value):
+        _write(self._file(name), value)
+
+
+def _write(path, value):
+    # cgroup files must be written with a single write()
+    fd = os.open(path, os.O_WRONLY)
+    try:
+        os.write(fd, value.encode())
+    finally:
+        os.close(fd)
@@ -1,8 +1,10 @@
 import io
+import time
 from abc import abstractmethod
 from collections import namedtuple
 
 from turingarena.driver.client.processinfo import SandboxProcessInfo
+from turingarena.driver.sandbox.reader import PipeReader
 
 SandboxProcessConnection = namedtuple("SandboxProcessConnection", [
     "downward",
@@ -12,9 +14,45 @@ SandboxProcessConnection = namedtuple("SandboxProcessConnection", [
 
 
 class ProcessManager:
+    # time usage (as in SandboxProcessInfo) at which the process must be killed, if any
+    time_usage_limit = None
+    # (monotonic time, time usage) when the time usage was last read by remaining_time_usage()
+    _time_usage_checked = None
+
     def get_status(self, kill_reason=None) -> SandboxProcessInfo:
         return self._do_get_status(kill_reason)
 
+    def set_time_usage_limit(self, time_usage_limit):
+        self.time_usage_limit = time_usage_limit
+        self._time_usage_checked = None
+
+    def remaining_time_usage(self):
+        """
+        Time usage left before the limit, or None if there is no limit.
+
+        The result may be underestimated: the time usage is read only when the previous estimate runs out,
+        assuming it does not grow faster than wall-clock time (true for single-threaded processes).
+        """
+        if self.time_usage_limit is None:
+            return None
+
+        now = time.monotonic()
+        if self._time_usage_checked is not None:
+            checked_at, time_usage = self._time_usage_checked
+            remaining = self.time_usage_limit - time_usage - (now - checked_at)
+            if remaining > 0:
+                return remaining
+
+        time_usage = self.get_time_usage()
+        self._time_usage_checked = (now, time_usage)
+        return self.time_usage_limit - time_usage
+
+    @abstractmethod
+    def get_time_usage(self):
+        """
+        Current time usage of the process, without stopping it.
+        """
+
     @abstractmethod
     def _do_get_status(self, kill_reason):
         pass
@@ -24,6 +62,9 @@ class FailedProcessManager(ProcessManager):
     def __init__(self, reason):
         self.reason = reason
 
+    def get_time_usage(self):
+        return 0.0
+
     def _do_get_status(self, kill_reason):
         return SandboxProcessInfo(
             time_usage=0.0,
@@ -35,7 +76,7 @@ class FailedProcessManager(ProcessManager):
 
 def create_failed_connection(reason):
     return SandboxProcessConnection(
-        upward=io.StringIO(),
+        upward=PipeReader.closed(),
         downward=io.StringIO(),
         manager=FailedProcessManager(reason),
     )
@@ -1,33 +1,76 @@
+import ctypes
 import logging
+import math
 import os
+import resource
+import select
 import signal
 import subprocess
 import time
 
 from turingarena.driver.client.processinfo import SandboxProcessInfo
+from turingarena.driver.sandbox.cgroup import Cgroup
 from turingarena.driver.sandbox.connection import SandboxProcessConnection, ProcessManager
+from turingarena.driver.sandbox.reader import PipeReader
 
+# see pidfd_open(2), the same on all architectures
+SYS_pidfd_open = 434
+
+# maximum time to wait for a process to reach the interruptible state (see _wait_for_interruptible)
+INTERRUPTIBLE_TIMEOUT = 0.5
+# first and maximum interval between checks of the state of a running process
+INTERRUPTIBLE_CHECK_INTERVALS = (20e-6, 10e-3)
+
+
+def create_popen_process_connection(*args, preexec_fn=None, **kwargs):
+    cgroup = Cgroup.create()
+    if cgroup is not None:
+        preexec_fn = _joining_cgroup(cgroup, preexec_fn)
+
+    try:
+        p = subprocess.Popen(
+            *args,
+            **kwargs,
+            preexec_fn=preexec_fn,
+            universal_newlines=True,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            bufsize=1,
+        )
+    except:
+        if cgroup is not None:
+            cgroup.remove()
+        raise
 
-def create_popen_process_connection(*args, **kwargs):
-    p = subprocess.Popen(
-        *args,
-        **kwargs,
-        universal_newlines=True,
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        bufsize=1,
-    )
     return SandboxProcessConnection(
         downward=p.stdin,
-        upward=p.stdout,
-        manager=PopenProcessManager(p),
+        # the output of the process is read directly from the pipe, with deadlines
+        upward=PipeReader(p.stdout.fileno()),
+        manager=create_process_manager(p, cgroup),
     )
 
 
+def create_process_manager(os_process, cgroup):
+    if cgroup is None:
+        return PopenProcessManager(os_process)
+    return CgroupProcessManager(os_process, cgroup)
+
+
+def _joining_cgroup(cgroup, preexec_fn):
+    def join_and_call():
+        cgroup.join()
+        if preexec_fn is not None:
+            preexec_fn()
+
+    return join_and_call
+
+
 class PopenProcessManager(ProcessManager):
     def __init__(self, os_process):
         self.os_process = os_process
         self.termination_info = None
+        self._stat_fd = None
+        self._pidfd = None
 
     def get_connection(self):
         return
@@ -48,6 +91,7 @@ class PopenProcessManager(ProcessManager):
             signal_message = {
                 signal.SIGSEGV: "Segmentation fault",
                 signal.SIGSYS: "Bad system call",
+                signal.SIGXCPU: "CPU time limit exceeded",
             }.get(signal_number, None)
             if signal_message is not None:
                 signal_explaination = f"{signal_name} - {signal_message}"
@@ -57,8 +101,10 @@ class PopenProcessManager(ProcessManager):
         assert False, "This should not be reached"
 
     def _read_proc_stat(self):
-        with open(f"/proc/{self.os_process.pid}/stat") as f:
-            line = f.read()
+        # kept open, as the state is read at every status query
+        if self._stat_fd is None:
+            self._stat_fd = os.open(f"/proc/{self.os_process.pid}/stat", os.O_RDONLY)
+        line = os.pread(self._stat_fd, 4096, 0).decode()
 
         pid, line = line.split(maxsplit=1)
 
@@ -71,16 +117,84 @@ class PopenProcessManager(ProcessManager):
         line = line[lookup_index:]
         return [pid, cmd, *line.split()]
 
+    def get_time_usage(self):
+        if self.termination_info is not None:
+            return self.termination_info.time_usage
+        # see man 5 proc
+        return int(self._read_proc_stat()[13]) / os.sysconf("SC_CLK_TCK")
+
+    def set_time_usage_limit(self, time_usage_limit):
+        """
+        Also enforced by the kernel, in case the driver is not waiting for the process when it exceeds the limit.
+        The kernel limit has a resolution of seconds, and counts system time as well
+        (see RLIMIT_CPU in getrlimit(2)), so it is one second higher.
+        """
+        super().set_time_usage_limit(time_usage_limit)
+
+        if time_usage_limit is None:
+            soft = resource.RLIM_INFINITY
+        else:
+            soft = math.ceil(time_usage_limit) + 1
+        try:
+            _, hard = resource.prlimit(self.os_process.pid, resource.RLIMIT_CPU)
+            resource.prlimit(self.os_process.pid, resource.RLIMIT_CPU, (soft, hard))
+        except ProcessLookupError:
+            pass  # already terminated
+
+    def _is_interruptible(self):
+        return self._read_proc_stat()[2] in ("S", "Z")
+
     def _wait_for_interruptible(self):
-        timeout = 0.5
-        trials = 10
-        for trial in range(trials):
-            status = self._read_proc_stat()[2]
-            if status in ("S", "Z"):
+        """
+        Wait until the process is sleeping (e.g., waiting for input) or terminated.
+
+        Usually the process is already waiting for the next request, so the state is checked immediately.
+        Otherwise, the process is finishing its computation, and the state is checked again
+        at increasing intervals, while waiting for the termination of the process (see _wait_for_termination).
+        """
+        if self._is_interruptible():
+            return
+
+        # let the process run, in case it is waiting for this CPU
+        os.sched_yield()
+
+        deadline = time.monotonic() + INTERRUPTIBLE_TIMEOUT
+        interval, max_interval = INTERRUPTIBLE_CHECK_INTERVALS
+        while not self._is_interruptible():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logging.debug(f"ProcessManager did not reach interruptible state in {INTERRUPTIBLE_TIMEOUT} s")
                 break
-            time.sleep(timeout / trials)
-        else:
-            logging.debug(f"ProcessManager did not reach interruptible state in {timeout} s")
+            self._wait_for_termination(min(interval, remaining))
+            interval = min(2 * interval, max_interval)
+
+    def _wait_for_termination(self, timeout):
+        """
+        Wait until the process terminates, or the timeout expires.
+
+        The pidfd of the process becomes readable as soon as it terminates,
+        but poll() has a resolution of milliseconds, so shorter timeouts are just slept.
+        """
+        if self._pidfd is None:
+            self._pidfd = _pidfd_open(self.os_process.pid)
+
+        if self._pidfd < 0 or timeout < 1e-3:
+            time.sleep(timeout)
+            return
+
+        poll = select.poll()
+        poll.register(self._pidfd, select.POLLIN)
+        poll.poll(timeout * 1e3)
+
+    def _release(self, info):
+        """
+        Record that the process terminated, with the given info, and release its resources.
+        """
+        self.termination_info = info
+        for fd in (self._stat_fd, self._pidfd):
+            if fd is not None and fd >= 0:
+                os.close(fd)
+        self._stat_fd = self._pidfd = None
 
     def _read_stat_resource_usage(self):
         fields = self._read_proc_stat()
@@ -139,11 +253,86 @@ class PopenProcessManager(ProcessManager):
                 logging.debug(f"killing process because {kill_reason}")
                 self.os_process.send_signal(signal.SIGKILL)
                 os.wait4(self.os_process.pid, 0)
-                self.termination_info = info
+                self._release(info)
             else:
                 # if process is not terminated, restart it with a SIGCONT
                 self.os_process.send_signal(signal.SIGCONT)
         else:
-            self.termination_info = info
+            self._release(info)
+
+        return info
+
+
+def _pidfd_open(pid):
+    """
+    File descriptor of the given process (see pidfd_open(2)), or -1 if not supported by the kernel.
+    """
+    libc = ctypes.CDLL(None, use_errno=True)
+    fd = libc.syscall(SYS_pidfd_open, pid, 0)
+    if fd < 0:
+        logging.debug(f"pidfd_open failed: {os.strerror(ctypes.get_errno())}")
+    return fd
+
+
+class CgroupProcessManager(PopenProcessManager):
+    """
+    Process placed in a cgroup of its own (see cgroup.py),
+    whose resource usage is read without stopping it.
+    """
+
+    def __init__(self, os_process, cgroup):
+        super().__init__(os_process)
+        self.cgroup = cgroup
+        # fallback if memory.peak is not supported
+        self.peak_memory_usage = 0
+
+    def get_time_usage(self):
+        if self.termination_info is not None:
+            return self.termination_info.time_usage
+        return self.cgroup.time_usage()
+
+    def _do_get_status(self, kill_reason):
+        if self.termination_info is not None:
+            return self.termination_info
+
+        self._wait_for_interruptible()
+
+        pid, exit_status, _ = os.wait4(self.os_process.pid, os.WNOHANG)
+        running = pid == 0
+
+        # the cgroup keeps the accounting of terminated processes, until removed
+        rss = self.cgroup.memory_usage()
+        maxrss = self.cgroup.peak_memory_usage()
+        if maxrss is None:
+            self.peak_memory_usage = max(self.peak_memory_usage, rss)
+            maxrss = self.peak_memory_usage
+
+        if running:
+            error = f"running normally"
+            if kill_reason is not None:
+                error += f", killed because: {kill_reason}"
+        else:
+            error = self._get_process_termination_message(exit_status)
+            if self.cgroup.out_of_memory():
+                error += " (memory limit exceeded)"
+            rss = 0
+
+        info = SandboxProcessInfo(
+            peak_memory_usage=maxrss,
+            current_memory_usage=rss,
+            time_usage=self.cgroup.time_usage(),
+            error=error,
+        )
+
+        if running and kill_reason is not None:
+            logging.debug(f"killing process because {kill_reason}")
+            if not self.cgroup.kill():
+                self.os_process.send_signal(signal.SIGKILL)
+            os.wait4(self.os_process.pid, 0)
+            running = False
+
+        if not running:
+            self._release(info)
+            self.cgroup.remove()
 
         return info
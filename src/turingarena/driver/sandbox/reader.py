@@ -0,0 +1,118 @@
+import os
+import select
+import time
+
+READ_SIZE = 2 ** 16
+
+
+class PipeReader:
+    """
+    Reads lines from the pipe connected to the output of a process,
+    without ever blocking past a deadline.
+
+    Instead of a watchdog thread, the pipe is polled with the remaining time as timeout.
+    Data is read in large chunks, and buffered.
+    """
+
+    __slots__ = ["_fd", "_poll", "_buffer", "_eof", "deadline"]
+
+    def __init__(self, fd):
+        self._fd = fd
+        self._buffer = bytearray()
+        self._eof = fd is None
+
+        if fd is not None:
+            self._poll = select.poll()
+            self._poll.register(fd, select.POLLIN)
+        else:
+            self._poll = None
+
+        # optional (monotonic) time after which no read can complete
+        self.deadline = None
+
+    @classmethod
+    def closed(cls):
+        return cls(None)
+
+    def set_budget(self, budget):
+        if budget is None:
+            self.deadline = None
+        else:
+            self.deadline = time.monotonic() + budget
+
+    def readline(self, max_size, timeout):
+        """
+        Read a line (including the trailing newline) of at most max_size bytes.
+
+        Returns b"" on EOF, a line without trailing newline if EOF is reached
+        or the line is too long, and None if no line is received within the timeout
+        (or before the deadline, if any).
+        """
+
+        deadline = time.monotonic() + timeout
+        if self.deadline is not None:
+            deadline = min(deadline, self.deadline)
+
+        while True:
+            index = self._buffer.find(b"\n", 0, max_size)
+            if index >= 0:
+                return self._consume(index + 1)
+            if self._eof or len(self._buffer) >= max_size:
+                return self._consume(max_size)
+
+            if not self._wait_readable(deadline):
+                return None
+            self._fill()
+
+    def readlines(self, count, max_size, timeout):
+        """
+        Read up to count lines, as readline, returning them all together.
+
+        Stops early, leaving the rest in the buffer, at the first line which cannot be read completely:
+        on EOF, if the line is too long, or if it is not received within the timeout
+        (counted from the last complete line).
+        """
+
+        end = 0
+        found = 0
+        deadline = None
+
+        while True:
+            while found < count:
+                index = self._buffer.find(b"\n", end, end + max_size)
+                if index < 0:
+                    break
+                end = index + 1
+                found += 1
+                deadline = None
+
+            if found == count or self._eof or len(self._buffer) - end >= max_size:
+                break
+
+            if deadline is None:
+                deadline = time.monotonic() + timeout
+                if self.deadline is not None:
+                    deadline = min(deadline, self.deadline)
+            if not self._wait_readable(deadline):
+                break
+            self._fill()
+
+        return self._consume(end)
+
+    def _consume(self, size):
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def _wait_readable(self, deadline):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        return bool(self._poll.poll(remaining * 1000))
+
+    def _fill(self):
+        data = os.read(self._fd, READ_SIZE)
+        if data:
+            self._buffer += data
+        else:
+            self._eof = True
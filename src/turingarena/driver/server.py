@@ -1,4 +1,5 @@
 import logging
+import os
 import sys
 from contextlib import ExitStack
 from tempfile import TemporaryDirectory
@@ -6,30 +7,45 @@ from tempfile import TemporaryDirectory
 from turingarena.logging_helper import init_logger
 from turingarena.driver.client.commands import DriverState
 from turingarena.driver.client.connection import DriverProcessConnection
+from turingarena.driver.cache import load_interface
 from turingarena.driver.client.program import Program
-from turingarena.driver.compile.compile import load_interface
-from turingarena.driver.drive.comm import CommunicationError, DriverStop, InterfaceExitReached, SandboxTee
+from turingarena.driver.drive.comm import (
+    CommunicationError, DriverStop, InterfaceExitReached, SandboxTee, TimeLimitReached,
+)
 from turingarena.driver.drive.execution import Executor
+from turingarena.driver.drive.interpreter import InstructionExecutor
 from turingarena.driver.language import Language
+from turingarena.driver.languages.python.runner import Zygote
 
 logger = logging.getLogger(__name__)
 
+# selects the executor of interfaces, among EXECUTORS (for testing and comparison purposes)
+EXECUTOR_VARIABLE = "TURINGARENA_DRIVER_EXECUTOR"
+
+EXECUTORS = {
+    "instructions": InstructionExecutor,
+    "tree": Executor,
+}
+
 
 def main():
     _, source_path, interface_path, downward_tee, upward_tee = sys.argv
 
     init_logger()
+    # each run is served by a new process, which would not reuse the zygote
+    Zygote.enabled = False
 
     run_server(DriverProcessConnection(
-        downward=sys.stdin,
-        upward=sys.stdout,
+        downward=sys.stdin.buffer,
+        upward=sys.stdout.buffer,
     ), source_path, interface_path, downward_tee, upward_tee)
 
 
-def run_server(driver_connection, source_path, interface_path, downward_tee, upward_tee):
+def run_server(driver_connection, source_path, interface_path, downward_tee, upward_tee, interface=None):
     program = Program(source_path=source_path, interface_path=interface_path)
     language = Language.from_source_path(program.source_path)
-    interface = load_interface(program.interface_path)
+    if interface is None:
+        interface = load_interface(program.interface_path)
 
     with ExitStack() as stack:
         temp_dir = stack.enter_context(TemporaryDirectory())
@@ -52,12 +68,14 @@ def run_server(driver_connection, source_path, interface_path, downward_tee, upw
             kill_reason="still running after communication end",
         ))
 
-        context = Executor(
+        executor_class = EXECUTORS[os.environ.get(EXECUTOR_VARIABLE, "instructions")]
+        context = executor_class(
             bindings={},
             phase=None,
+            resolution=None,
             process=connection.manager,
             request_lookahead=None,
-            driver_connection=driver_connection,
+            driver_channel=driver_connection.server_channel(),
             sandbox_connection=connection,
             sandbox_tee=sandbox_tee,
         )
@@ -72,12 +90,16 @@ def run_server(driver_connection, source_path, interface_path, downward_tee, upw
             assert False, f"driver was not explicitly stopped, got {request}"
         except CommunicationError as e:
             logging.debug(f"communication error", exc_info=True)
-            context.send_driver_state(DriverState.ERROR)  # error
+            if isinstance(e, TimeLimitReached):
+                context.send_driver_state(DriverState.TIME_LIMIT_EXCEEDED)
+            else:
+                context.send_driver_state(DriverState.ERROR)  # error
             info = connection.manager.get_status(kill_reason="communication error")
             message, = e.args
             context.send_driver_upward(f"{message} (process {info.error})")
         except DriverStop:
             context.send_driver_state(DriverState.READY)  # ok, no errors
+        context.driver_channel.flush()
 
 
 if __name__ == '__main__':
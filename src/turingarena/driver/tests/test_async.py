@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from turingarena.driver.client.exceptions import AlgorithmRuntimeError
+from turingarena.driver.tests.test_utils import define_algorithm
+
+pytestmark = pytest.mark.all_executors
+
+INTERFACE_TEXT = """
+    function f(a, b);
+    procedure p(a) callbacks {
+        function c(x);
+    }
+    main {
+        for i to 2 {
+            read a, b;
+            call c = f(a, b);
+            write c;
+            read d;
+            call p(d) callbacks {
+                function c(x) {
+                    write x;
+                    read y;
+                    return y;
+                }
+            }
+            checkpoint;
+        }
+    }
+"""
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test_async_process():
+    with define_algorithm(
+            interface_text=INTERFACE_TEXT,
+            language_name="Python",
+            source_text="""if True:
+                def f(a, b):
+                    return a + b
+
+                def p(a, c):
+                    assert c(a) == 2 * a
+            """,
+    ) as algo:
+        async def double(x):
+            await asyncio.sleep(0)
+            return 2 * x
+
+        async def play(offset):
+            async with algo.run_async() as p:
+                async with p.section(time_limit=1.0):
+                    results = [
+                        await p.functions.f(offset, 1),
+                        await p.procedures.p(offset, callbacks=[lambda x: 2 * x]),
+                    ]
+                    await p.checkpoint()
+                results.append(await p.functions.f(offset, 2))
+                await p.procedures.p(offset, callbacks=[double])
+                await p.checkpoint()
+            return results, p.time_usage
+
+        async def play_all():
+            return await asyncio.gather(*[play(i) for i in range(5)])
+
+        results = run(play_all())
+
+    for offset, (values, time_usage) in enumerate(results):
+        assert values == [offset + 1, None, offset + 2]
+        assert 0.0 <= time_usage < 1.0
+
+
+def test_async_process_error():
+    with define_algorithm(
+            interface_text=INTERFACE_TEXT,
+            language_name="Python",
+            source_text="""if True:
+                def f(a, b):
+                    raise SystemExit
+            """,
+    ) as algo:
+        async def play():
+            async with algo.run_async() as p:
+                await p.functions.f(1, 2)
+
+        with pytest.raises(AlgorithmRuntimeError):
+            run(play())
@@ -1,7 +1,33 @@
+import glob
+import io
+import os
+import subprocess
+import time
+
+import pytest
+
+from turingarena.driver.cache import CACHE_DIR_VARIABLE
+from turingarena.driver.client.protocol import ProtocolVersion
+from turingarena.driver.compile.compile import Compiler
+from turingarena.driver.drive.assembler import InstructionAssembler
+from turingarena.driver.drive.preprocess import ExecutionPreprocessor
+from turingarena.driver.language import Language
+from turingarena.driver.server import EXECUTORS, EXECUTOR_VARIABLE
 from turingarena.driver.tests.test_utils import define_algorithm
 
+EXAMPLES_DIR = os.path.join(os.path.dirname(__file__), *[os.pardir] * 4, "examples")
+
+TRANSPORTS = {
+    "in-memory": dict(in_memory=True),
+    **{
+        f"{version.name} protocol": dict(in_memory=False, protocol_version=version)
+        for version in ProtocolVersion
+    },
+}
 
-def test_single_call():
+
+@pytest.mark.parametrize("transport", list(TRANSPORTS))
+def test_single_call(transport):
     with define_algorithm(
             interface_text="""
                 procedure p(n, a[]);
@@ -19,11 +45,15 @@ def test_single_call():
     ) as algo:
         N = 100000
         print(f"Sending an array of {N} elements...")
-        with algo.run() as p:
+        with algo.run(**TRANSPORTS[transport]) as p:
+            start = time.perf_counter()
             p.procedures.p(N, [0] * N)
+            elapsed = time.perf_counter() - start
+        print(f"{transport}: {elapsed:.3f} s")
 
 
-def test_multiple_calls():
+@pytest.mark.parametrize("transport", list(TRANSPORTS))
+def test_multiple_calls(transport):
     with define_algorithm(
             interface_text="""
                 procedure p(x);
@@ -42,7 +72,376 @@ def test_multiple_calls():
     ) as algo:
         N = 10000
         print(f"Sending an array of {N} elements...")
-        with algo.run() as p:
+        with algo.run(**TRANSPORTS[transport]) as p:
+            start = time.perf_counter()
             p.procedures.p(N)
             for i in range(N):
                 p.procedures.p(0)
+            elapsed = time.perf_counter() - start
+        print(f"{transport}: {(N + 1) / elapsed:.0f} calls/s")
+
+
+def test_multiple_calls_batch():
+    with define_algorithm(
+            interface_text="""
+                procedure p(x);
+
+                main {
+                    read n;
+                    call p(n);
+                    for i to n {
+                        read a;
+                        call p(a);
+                    }
+                }
+            """,
+            language_name="C++",
+            source_text="void p(int) {}",
+    ) as algo:
+        N = 10000
+        print(f"Sending an array of {N} elements...")
+        with algo.run() as p:
+            start = time.perf_counter()
+            with p.batch():
+                p.procedures.p(N)
+                for i in range(N):
+                    p.procedures.p(0)
+            elapsed = time.perf_counter() - start
+        print(f"batch: {(N + 1) / elapsed:.0f} calls/s")
+
+
+@pytest.mark.parametrize("executor", list(EXECUTORS))
+def test_deep_loops(executor, monkeypatch):
+    monkeypatch.setenv(EXECUTOR_VARIABLE, executor)
+    with define_algorithm(
+            interface_text="""
+                function sum(n, a[][][]);
+
+                main {
+                    read n;
+                    for i to n {
+                        for j to n {
+                            for k to n {
+                                read a[i][j][k];
+                            }
+                        }
+                    }
+                    call s = sum(n, a);
+                    write s;
+                }
+            """,
+            language_name="C++",
+            source_text="""
+                int sum(int n, int ***a) {
+                    int s = 0;
+                    for (int i = 0; i < n; i++)
+                        for (int j = 0; j < n; j++)
+                            for (int k = 0; k < n; k++)
+                                s += a[i][j][k];
+                    return s;
+                }
+            """,
+    ) as algo:
+        N = 30
+        a = [[[i + j + k for k in range(N)] for j in range(N)] for i in range(N)]
+        with algo.run() as p:
+            start = time.perf_counter()
+            assert p.functions.sum(N, a) == sum(sum(sum(r) for r in m) for m in a)
+            elapsed = time.perf_counter() - start
+        print(f"{executor} executor: {elapsed:.3f} s")
+
+
+@pytest.mark.parametrize("executor", list(EXECUTORS))
+def test_many_values(executor, monkeypatch):
+    monkeypatch.setenv(EXECUTOR_VARIABLE, executor)
+    with define_algorithm(
+            interface_text="""
+                procedure p(n, a[]);
+
+                main {
+                    read n;
+                    for i to n {
+                        read a[i];
+                    }
+                    call p(n, a);
+                    checkpoint;
+                }
+            """,
+            language_name="C++",
+            source_text="void p(int, int[]) {}",
+    ) as algo:
+        # time per value should not grow with the number of values
+        for N in [10000, 40000]:
+            with algo.run() as p:
+                start = time.perf_counter()
+                p.procedures.p(N, list(range(N)))
+                p.checkpoint()
+                elapsed = time.perf_counter() - start
+            print(f"{executor} executor, {N} values: {elapsed / N * 1e6:.1f} us/value")
+
+
+@pytest.mark.parametrize("executor", list(EXECUTORS))
+def test_many_upward_values(executor, monkeypatch):
+    monkeypatch.setenv(EXECUTOR_VARIABLE, executor)
+    with define_algorithm(
+            interface_text="""
+                procedure init(n);
+                function g(i);
+                procedure p(x);
+
+                main {
+                    read n;
+                    call init(n);
+                    for i to n {
+                        call a[i] = g(i);
+                        write a[i];
+                    }
+                    for i to n {
+                        call p(a[i]);
+                    }
+                    checkpoint;
+                }
+            """,
+            language_name="C++",
+            source_text="""
+                void init(int n) {}
+                int g(int i) { return 2 * i; }
+                void p(int x) {}
+            """,
+    ) as algo:
+        N = 5000
+        with algo.run() as p:
+            start = time.perf_counter()
+            p.procedures.init(N)
+            for i in range(N):
+                assert p.functions.g(i) == 2 * i
+            for i in range(N):
+                p.procedures.p(2 * i)
+            p.checkpoint()
+            elapsed = time.perf_counter() - start
+        print(f"{executor} executor: {elapsed / N * 1e6:.1f} us/value")
+
+
+@pytest.mark.parametrize("executor", list(EXECUTORS))
+def test_write_loop(executor, monkeypatch):
+    monkeypatch.setenv(EXECUTOR_VARIABLE, executor)
+    with define_algorithm(
+            interface_text="""
+                procedure p(n, a[]);
+
+                main {
+                    read n;
+                    for i to n {
+                        read a[i];
+                    }
+                    call p(n, a);
+                    for i to n {
+                        write a[i];
+                    }
+                    checkpoint;
+                }
+            """,
+            language_name="C++",
+            source_text="void p(int n, int *a) { for (int i = 0; i < n; i++) a[i] *= 2; }",
+    ) as algo:
+        N = 40000
+        with algo.run() as p:
+            start = time.perf_counter()
+            p.procedures.p(N, list(range(N)))
+            p.checkpoint()
+            elapsed = time.perf_counter() - start
+        print(f"{executor} executor: {elapsed / N * 1e6:.1f} us/value")
+
+
+@pytest.mark.parametrize("language_name,source_text", [
+    ("C", "int f(int x) { return x; }"),
+    ("C++", "int f(int x) { return x; }"),
+    ("Python", "def f(x): return x"),
+])
+def test_process_spawn(language_name, source_text, tmpdir):
+    language = Language.from_name(language_name)
+    with define_algorithm(
+            interface_text="""
+                function f(x);
+
+                main {
+                    read x;
+                    call y = f(x);
+                    write y;
+                }
+            """,
+            language_name=language_name,
+            source_text=source_text,
+    ) as algo:
+        with open(algo.interface_path) as f:
+            interface = Compiler.create().compile_interface_source(f.read())
+        runner = language.ProgramRunner(
+            program=algo,
+            language=language,
+            interface=interface,
+            temp_dir=str(tmpdir),
+        )
+        # compiles the executable (or generates the skeleton)
+        with runner.run_in_process() as connection:
+            connection.manager.get_status(kill_reason="only compiling")
+
+        R = 20
+        elapsed = 0
+        for _ in range(R):
+            start = time.perf_counter()
+            connection = runner.start_process()
+            connection.downward.write("1\n")
+            connection.downward.close()
+            output = b""
+            while True:
+                line = connection.upward.readline(1024, timeout=1.0)
+                if not line:
+                    break
+                output += line
+            elapsed += time.perf_counter() - start
+            assert output.split()[-1] == b"1"
+            assert connection.manager.get_status().error == "exited normally"
+        print(f"{language_name}: {elapsed / R * 1e3:.2f} ms/process")
+
+
+@pytest.mark.parametrize("language_name,source_text", [
+    ("C++", "int f(int x) { return x; }"),
+    ("Python", "def f(x): return x"),
+])
+def test_status_query(language_name, source_text, tmpdir):
+    language = Language.from_name(language_name)
+    with define_algorithm(
+            interface_text="""
+                function f(x);
+
+                main {
+                    for i to 1000 {
+                        read x;
+                        call y = f(x);
+                        write y;
+                    }
+                }
+            """,
+            language_name=language_name,
+            source_text=source_text,
+    ) as algo:
+        with open(algo.interface_path) as f:
+            interface = Compiler.create().compile_interface_source(f.read())
+        runner = language.ProgramRunner(
+            program=algo,
+            language=language,
+            interface=interface,
+            temp_dir=str(tmpdir),
+        )
+        with runner.run_in_process() as connection:
+            # the status is queried right after the answer, while the process goes back to read
+            R = 100
+            elapsed = 0
+            for _ in range(R):
+                connection.downward.write("1\n")
+                # the answer follows the other lines of the protocol (e.g., no callbacks)
+                line = None
+                while line != b"1\n":
+                    line = connection.upward.readline(1024, timeout=1.0)
+                    assert line
+                start = time.perf_counter()
+                info = connection.manager.get_status()
+                elapsed += time.perf_counter() - start
+                assert info.error == "running normally"
+            connection.manager.get_status(kill_reason="benchmark completed")
+        print(f"{language_name}: {elapsed / R * 1e6:.1f} us/query")
+
+
+def test_interface_processing():
+    paths = sorted(glob.glob(os.path.join(EXAMPLES_DIR, "*", "interface.txt")))
+    if not paths:
+        pytest.skip("examples not found")
+
+    texts = []
+    for path in paths:
+        with open(path) as f:
+            texts.append(f.read())
+    languages = Language.languages()
+
+    def compile_all():
+        return [Compiler.create().compile_interface_source(text) for text in texts]
+
+    interfaces = compile_all()
+
+    def generate_all():
+        for interface in interfaces:
+            for language in languages:
+                language.Generator().generate_to_file(interface, io.StringIO())
+
+    def preprocess_all():
+        for interface in interfaces:
+            ExecutionPreprocessor().transform(interface.main)
+            InstructionAssembler().assemble_interface(interface)
+
+    R = 5
+    for name, stage in [
+        ("compile", compile_all),
+        ("generate skeletons", generate_all),
+        ("preprocess for execution", preprocess_all),
+    ]:
+        start = time.perf_counter()
+        for _ in range(R):
+            stage()
+        elapsed = time.perf_counter() - start
+        print(f"{name}: {elapsed / R / len(texts) * 1e3:.2f} ms/interface")
+
+
+def large_interface(n):
+    methods = "".join(
+        f"function f{k}(a, b[]);\n"
+        for k in range(n // 10)
+    )
+    statements = "".join(
+        f"read n{k}; for i to n{k} {{ read a{k}[i]; }} call r{k} = f{k // 10}(n{k}, a{k}); write r{k};\n"
+        for k in range(n)
+    )
+    return f"{methods}\nmain {{\n{statements}}}\n"
+
+
+@pytest.mark.parametrize("n", [100, 200, 400])
+def test_large_interface_compile(n):
+    text = large_interface(n)
+    compiler = Compiler.create()
+    start = time.perf_counter()
+    compiler.compile_interface_source(text)
+    elapsed = time.perf_counter() - start
+    assert not compiler.diagnostics
+    print(f"{n} statement groups: {elapsed:.3f} s, {elapsed / n * 1e3:.2f} ms/group")
+
+
+@pytest.mark.parametrize("interface_cache", ["enabled", "disabled"])
+def test_server_startup(interface_cache, monkeypatch):
+    if interface_cache == "disabled":
+        monkeypatch.setenv(CACHE_DIR_VARIABLE, "")
+
+    with define_algorithm(
+            interface_text="""
+                procedure p();
+
+                main {
+                    call p();
+                }
+            """,
+            language_name="Python",
+            source_text="def p(): pass",
+    ) as algo:
+        R = 5
+        start = time.perf_counter()
+        for _ in range(R):
+            # no requests are sent, so the server stops as soon as it is ready to receive the first one
+            subprocess.run(
+                [
+                    "python3", "-m", "turingarena.driver.server",
+                    algo.source_path, algo.interface_path, os.devnull, os.devnull,
+                ],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        elapsed = time.perf_counter() - start
+        print(f"interface cache {interface_cache}: {elapsed / R * 1e3:.0f} ms/run")
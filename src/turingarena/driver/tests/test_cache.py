@@ -0,0 +1,120 @@
+import os
+import sys
+import threading
+
+from turingarena.driver import cache
+from turingarena.driver.cache import CACHE_DIR_VARIABLE, compile_interface, preprocessed
+from turingarena.driver.compile.compile import Compiler
+from turingarena.driver.drive.preprocess import ExecutionPreprocessor
+from turingarena.driver.gen.preprocess import SkeletonPreprocessor
+
+INTERFACE_TEXT = """
+    procedure p(n, a[]);
+    function f(x);
+
+    main {
+        read n;
+        for i to n {
+            read a[i];
+        }
+        call p(n, a);
+        for i to n {
+            call b[i] = f(a[i]);
+            write b[i];
+        }
+    }
+"""
+
+
+def test_cache_entry_reused(tmpdir, monkeypatch):
+    monkeypatch.setenv(CACHE_DIR_VARIABLE, str(tmpdir))
+
+    interface = compile_interface(INTERFACE_TEXT)
+    [entry] = os.listdir(str(tmpdir))
+
+    cached_interface = compile_interface(INTERFACE_TEXT)
+    assert cached_interface is not interface
+    assert os.listdir(str(tmpdir)) == [entry]
+
+    expected = Compiler.create().compile_interface_source(INTERFACE_TEXT)
+    assert cached_interface == expected
+    assert preprocessed(cached_interface).execution_main == ExecutionPreprocessor().transform(expected.main)
+    assert preprocessed(cached_interface).skeleton == SkeletonPreprocessor.create().transform(expected)
+
+
+def test_cache_entry_invalid(tmpdir, monkeypatch):
+    monkeypatch.setenv(CACHE_DIR_VARIABLE, str(tmpdir))
+
+    tmpdir.join(f"{cache.cache_key(INTERFACE_TEXT)}.pickle").write("truncated")
+
+    interface = compile_interface(INTERFACE_TEXT)
+    assert interface == Compiler.create().compile_interface_source(INTERFACE_TEXT)
+    assert compile_interface(INTERFACE_TEXT) == interface
+
+
+def test_cache_disabled(monkeypatch):
+    monkeypatch.setenv(CACHE_DIR_VARIABLE, "")
+
+    interface = compile_interface(INTERFACE_TEXT)
+    assert preprocessed(interface).interface is interface
+
+
+def test_cache_entry_not_trusted(tmpdir, monkeypatch):
+    monkeypatch.setenv(CACHE_DIR_VARIABLE, str(tmpdir))
+
+    compile_interface(INTERFACE_TEXT)
+    [entry] = tmpdir.listdir()
+    # anyone could have written it
+    entry.chmod(0o666)
+
+    compiled = []
+    original_compile = cache._compile
+    monkeypatch.setattr(cache, "_compile", lambda text: compiled.append(text) or original_compile(text))
+    assert compile_interface(INTERFACE_TEXT) == Compiler.create().compile_interface_source(INTERFACE_TEXT)
+    assert compiled == [INTERFACE_TEXT]
+
+
+def test_cache_old_entries_removed(tmpdir, monkeypatch):
+    monkeypatch.setenv(CACHE_DIR_VARIABLE, str(tmpdir))
+    monkeypatch.setattr(cache, "MAX_CACHE_ENTRIES", 2)
+
+    texts = [INTERFACE_TEXT + "\n" * i for i in range(3)]
+    for i, text in enumerate(texts):
+        compile_interface(text)
+        # entries are ordered by modification time
+        os.utime(str(tmpdir.join(f"{cache.cache_key(text)}.pickle")), (i, i))
+
+    assert sorted(os.listdir(str(tmpdir))) == sorted(f"{cache.cache_key(t)}.pickle" for t in texts[1:])
+
+
+def test_loaded_interfaces_from_many_threads(monkeypatch):
+    monkeypatch.setattr(cache, "MAX_LOADED_INTERFACES", 2)
+
+    interface = Compiler.create().compile_interface_source(INTERFACE_TEXT)
+    compiled = preprocessed(interface)
+    # same trees, different interfaces
+    entries = [compiled._replace(interface=interface._replace()) for _ in range(4)]
+    errors = []
+
+    def load():
+        try:
+            for _ in range(10000):
+                for entry in entries:
+                    cache._register(entry)
+                    assert preprocessed(entry.interface).interface is entry.interface
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=load) for _ in range(8)]
+    # switch between threads as often as possible
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    assert not errors
@@ -1,7 +1,11 @@
 from collections import deque
 
+import pytest
+
 from turingarena.driver.tests.test_utils import define_algorithms
 
+pytestmark = pytest.mark.all_executors
+
 
 def callback_mock(calls, return_values=None):
     if return_values is not None:
@@ -1,5 +1,8 @@
+import pytest
+
+from turingarena.driver.client.protocol import ProtocolVersion
 from turingarena.driver.compile.diagnostics import *
-from turingarena.driver.tests.test_utils import assert_interface_error
+from turingarena.driver.tests.test_utils import assert_interface_error, define_algorithm
 
 
 def test_call_not_defined():
@@ -60,3 +63,89 @@ def test_call_extra_return_expression():
             call a = f();
         }
     """, NoReturnValue(name="f"))
+
+
+def call_algo():
+    return define_algorithm(
+        interface_text="""
+            function f(a);
+            main {
+                read a;
+                call b = f(a);
+                write b;
+            }
+        """,
+        language_name="Python",
+        source_text="def f(a): return a + 1",
+    )
+
+
+@pytest.mark.all_executors
+@pytest.mark.parametrize("protocol_version", list(ProtocolVersion))
+def test_call_with_protocol_version(protocol_version):
+    # values are sent through pipes, using the given protocol
+    with call_algo() as algo:
+        with algo.run(protocol_version=protocol_version) as p:
+            assert p.functions.f(1) == 2
+
+
+@pytest.mark.all_executors
+def test_call_protocol_version_in_memory():
+    with call_algo() as algo:
+        with pytest.raises(ValueError):
+            with algo.run(protocol_version=ProtocolVersion.TEXT, in_memory=True):
+                pass
+
+
+@pytest.mark.all_executors
+@pytest.mark.parametrize("protocol_version", [None, *ProtocolVersion])
+def test_call_with_empty_array(protocol_version):
+    with define_algorithm(
+            interface_text="""
+                function g(n, a[]);
+                main {
+                    read n;
+                    for i to n {
+                        read a[i];
+                    }
+                    call r = g(n, a);
+                    write r;
+                }
+            """,
+            language_name="Python",
+            source_text="def g(n, a): return len(a) + 1",
+    ) as algo:
+        with algo.run(protocol_version=protocol_version) as p:
+            assert p.functions.g(0, []) == 1
+
+
+@pytest.mark.all_executors
+@pytest.mark.parametrize("protocol_version", [None, *ProtocolVersion])
+def test_call_with_big_integers(protocol_version):
+    # out of the range of 64-bit integers
+    with call_algo() as algo:
+        for value in [2 ** 64, -2 ** 63 - 2]:
+            with algo.run(protocol_version=protocol_version) as p:
+                assert p.functions.f(value) == value + 1
+
+
+@pytest.mark.all_executors
+@pytest.mark.parametrize("protocol_version", [None, *ProtocolVersion])
+def test_call_with_big_array_elements(protocol_version):
+    with define_algorithm(
+            interface_text="""
+                function g(n, a[]);
+                main {
+                    read n;
+                    for i to n {
+                        read a[i];
+                    }
+                    call r = g(n, a);
+                    write r;
+                }
+            """,
+            language_name="Python",
+            source_text="def g(n, a): return sum(a)",
+    ) as algo:
+        with algo.run(protocol_version=protocol_version) as p:
+            assert p.functions.g(2, [2 ** 63, 1]) == 2 ** 63 + 1
@@ -0,0 +1,107 @@
+import pytest
+
+from turingarena.driver.client.exceptions import AlgorithmRuntimeError
+from turingarena.driver.sandbox import cgroup
+from turingarena.driver.sandbox.cgroup import CGROUP_VARIABLE, Cgroup, cgroup_root
+from turingarena.driver.tests.test_utils import define_algorithm
+
+
+@pytest.fixture(autouse=True)
+def clear_cgroup_root():
+    cgroup_root.cache_clear()
+    yield
+    cgroup_root.cache_clear()
+
+
+def my_algo(language_name):
+    return define_algorithm(
+        interface_text="""
+            function f(x);
+            main {
+                read x;
+                call y = f(x);
+                write y;
+                checkpoint;
+            }
+        """,
+        language_name=language_name,
+        source_text={
+            "C++": """
+                #include <cstdlib>
+                #include <cstring>
+                int f(int x) {
+                    char *p = (char *) malloc(50000000);
+                    memset(p, x, 50000000);
+                    return p[x];
+                }
+            """,
+            "Python": """if True:
+                def f(x):
+                    return len(bytearray([x]) * 50000000)
+            """,
+        }[language_name],
+    )
+
+
+@pytest.mark.parametrize("language_name", ["C++", "Python"])
+def test_cgroup_not_available(language_name, tmpdir, monkeypatch):
+    monkeypatch.setenv(CGROUP_VARIABLE, str(tmpdir))
+    assert cgroup_root() is None
+    assert Cgroup.create() is None
+
+    with my_algo(language_name) as algo:
+        with algo.run() as p:
+            p.functions.f(1)
+            p.checkpoint()
+
+
+def require_cgroups():
+    if cgroup_root() is None:
+        pytest.skip(f"cgroups not available, set {CGROUP_VARIABLE} to a delegated cgroup v2")
+
+
+def test_cgroup_not_created(tmpdir, monkeypatch):
+    root = tmpdir.mkdir("root")
+    root.join("cgroup.controllers").write(" ".join(cgroup.CONTROLLERS))
+    root.join("cgroup.subtree_control").write(" ".join(cgroup.CONTROLLERS))
+    monkeypatch.setenv(CGROUP_VARIABLE, str(root))
+    assert cgroup_root() == str(root)
+
+    # e.g., the cgroup was removed, or is no longer writable
+    root.remove()
+    assert Cgroup.create() is None
+
+
+@pytest.mark.parametrize("language_name", ["C++", "Python"])
+def test_cgroup_resource_usage(language_name):
+    require_cgroups()
+
+    with my_algo(language_name) as algo:
+        with algo.run() as p:
+            with p.section() as s:
+                p.functions.f(1)
+                p.checkpoint()
+            assert s.peak_memory_usage > 50e6
+            assert s.time_usage > 0.0
+
+
+@pytest.mark.parametrize("language_name", ["C++", "Python"])
+def test_cgroup_memory_limit_exceeded(language_name, monkeypatch):
+    require_cgroups()
+    # lower than the resource limits, so that the process is killed by the cgroup
+    monkeypatch.setattr(cgroup, "MEMORY_LIMIT", 32 * 1024 * 1024)
+
+    with my_algo(language_name) as algo:
+        with pytest.raises(AlgorithmRuntimeError) as exc_info:
+            with algo.run() as p:
+                p.functions.f(1)
+                p.checkpoint()
+    assert "(memory limit exceeded)" in exc_info.value.message
+
+
+def test_cgroup_pids_limit(monkeypatch):
+    monkeypatch.setenv(cgroup.PIDS_LIMIT_VARIABLE, "500")
+    assert cgroup.default_pids_limit() == 500
+
+    monkeypatch.delenv(cgroup.PIDS_LIMIT_VARIABLE)
+    assert cgroup.default_pids_limit() >= 64
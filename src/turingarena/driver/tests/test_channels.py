@@ -0,0 +1,69 @@
+import io
+
+import pytest
+
+from turingarena.driver.client.commands import MetaType, deserialize_data, serialize_data
+from turingarena.driver.client.objectchannel import ObjectChannel, ObjectQueue
+from turingarena.driver.client.protocol import BinaryProtocol
+
+VALUES = [
+    [],
+    [[], []],
+    [1, 2, 3],
+    [[1, 2], [3, 4]],
+    [1, 2 ** 63],
+    [[1], [-2 ** 63 - 1]],
+]
+
+
+def in_memory_channels():
+    queue = ObjectQueue()
+    return ObjectChannel(input=ObjectQueue(), output=queue), ObjectChannel(input=queue, output=ObjectQueue())
+
+
+@pytest.mark.parametrize("value", VALUES)
+def test_in_memory_round_trip(value):
+    sender, receiver = in_memory_channels()
+    # followed by another value, which must not be consumed with the first one
+    sender.send_all(serialize_data(value))
+    sender.send_all(serialize_data(42))
+    sender.flush()
+
+    assert _as_lists(deserialize_data(receiver.receive, receiver.receive_array)) == value
+    assert deserialize_data(receiver.receive, receiver.receive_array) == 42
+
+
+@pytest.mark.parametrize("value", [[1, 2 ** 63], [[1], [-2 ** 63 - 1]]])
+def test_big_integers_not_packed(value):
+    # sent as nested arrays of scalars, as packed arrays only contain 64-bit integers
+    assert next(serialize_data(value)) == MetaType.ARRAY
+
+
+@pytest.mark.parametrize("value", VALUES)
+def test_binary_round_trip(value):
+    output = io.BytesIO()
+    BinaryProtocol().write_all(output, serialize_data(value))
+
+    input = io.BytesIO(output.getvalue())
+    protocol = BinaryProtocol()
+    assert _as_lists(deserialize_data(
+        lambda: protocol.read(input),
+        lambda size: protocol.read_array(input, size),
+    )) == value
+
+
+def test_binary_big_integers():
+    values = [1, 2 ** 63, -2 ** 63, 2 ** 63 - 1, -2 ** 63 - 1, 2 ** 100, "call", 3]
+    output = io.BytesIO()
+    BinaryProtocol().write_all(output, values)
+
+    input = io.BytesIO(output.getvalue())
+    protocol = BinaryProtocol()
+    assert [protocol.read(input) for _ in values] == values
+    assert protocol.read(input) is None
+
+
+def _as_lists(value):
+    if isinstance(value, int):
+        return value
+    return [_as_lists(v) for v in value]
@@ -1,5 +1,9 @@
+import pytest
+
 from turingarena.driver.tests.test_utils import define_algorithms
 
+pytestmark = pytest.mark.all_executors
+
 
 def test_constant():
     for algo in define_algorithms(
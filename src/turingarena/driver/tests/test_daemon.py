@@ -0,0 +1,157 @@
+import asyncio
+import os
+import socket
+import stat
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from turingarena.driver.client.exceptions import AlgorithmRuntimeError
+from turingarena.driver.tests.test_utils import define_algorithm
+
+INTERFACE_TEXT = """
+    function f(a);
+    main {
+        read a;
+        call b = f(a);
+        write b;
+    }
+"""
+
+
+@contextmanager
+def start_daemon(socket_path):
+    with subprocess.Popen([sys.executable, "-m", "turingarena.driver.daemon", socket_path]) as daemon:
+        try:
+            # the socket file exists before the daemon listens, so wait until it accepts connections
+            for _ in range(100):
+                if daemon.poll() is not None:
+                    pytest.fail(f"daemon exited with status {daemon.returncode}")
+                try:
+                    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                        probe.connect(socket_path)
+                    break
+                except (FileNotFoundError, ConnectionRefusedError):
+                    time.sleep(0.05)
+            else:
+                pytest.fail("daemon not listening")
+            yield daemon
+        finally:
+            daemon.terminate()
+
+
+@pytest.fixture
+def daemon_socket():
+    with TemporaryDirectory() as temp_dir:
+        socket_path = os.path.join(temp_dir, "driver.sock")
+        with start_daemon(socket_path):
+            yield socket_path
+
+
+@pytest.mark.all_executors
+def test_daemon_runs(daemon_socket):
+    with define_algorithm(
+            interface_text=INTERFACE_TEXT,
+            language_name="Python",
+            source_text="""if True:
+                def f(a):
+                    return a * 2
+            """,
+    ) as algo:
+        for i in range(3):
+            with algo.run(daemon_socket=daemon_socket) as p:
+                assert p.functions.f(i) == 2 * i
+
+
+@pytest.mark.all_executors
+def test_daemon_stalled_client(daemon_socket):
+    with define_algorithm(
+            interface_text=INTERFACE_TEXT,
+            language_name="Python",
+            source_text="""if True:
+                def f(a):
+                    return a * 2
+            """,
+    ) as algo:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stalled:
+            # connects, but never sends its run request
+            stalled.connect(daemon_socket)
+            with algo.run(daemon_socket=daemon_socket) as p:
+                assert p.functions.f(1) == 2
+
+
+@pytest.mark.all_executors
+def test_daemon_error(daemon_socket):
+    with define_algorithm(
+            interface_text=INTERFACE_TEXT,
+            language_name="Python",
+            source_text="""if True:
+                def f(a):
+                    raise SystemExit
+            """,
+    ) as algo:
+        with pytest.raises(AlgorithmRuntimeError):
+            with algo.run(daemon_socket=daemon_socket) as p:
+                p.functions.f(1)
+
+
+@pytest.mark.all_executors
+def test_daemon_async_runs(daemon_socket):
+    with define_algorithm(
+            interface_text=INTERFACE_TEXT,
+            language_name="Python",
+            source_text="""if True:
+                def f(a):
+                    return a * 2
+            """,
+    ) as algo:
+        async def play(i):
+            async with algo.run_async(daemon_socket=daemon_socket) as p:
+                return await p.functions.f(i)
+
+        async def play_all():
+            return await asyncio.gather(*[play(i) for i in range(4)])
+
+        loop = asyncio.new_event_loop()
+        try:
+            assert loop.run_until_complete(play_all()) == [0, 2, 4, 6]
+        finally:
+            loop.close()
+
+
+def test_daemon_socket_permissions(daemon_socket):
+    assert stat.S_IMODE(os.stat(daemon_socket).st_mode) == 0o600
+
+
+def test_daemon_stale_socket():
+    with TemporaryDirectory() as temp_dir:
+        socket_path = os.path.join(temp_dir, "driver.sock")
+        # left by a daemon which was killed
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale:
+            stale.bind(socket_path)
+
+        with start_daemon(socket_path):
+            with define_algorithm(
+                    interface_text=INTERFACE_TEXT,
+                    language_name="Python",
+                    source_text="""if True:
+                        def f(a):
+                            return a * 2
+                    """,
+            ) as algo:
+                with algo.run(daemon_socket=socket_path) as p:
+                    assert p.functions.f(1) == 2
+
+
+def test_daemon_already_running(daemon_socket):
+    second = subprocess.run(
+        [sys.executable, "-m", "turingarena.driver.daemon", daemon_socket],
+        stderr=subprocess.DEVNULL,
+    )
+    assert second.returncode != 0
+    # the socket of the first daemon is still there
+    assert stat.S_ISSOCK(os.stat(daemon_socket).st_mode)
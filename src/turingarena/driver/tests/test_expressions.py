@@ -0,0 +1,98 @@
+import pytest
+
+from turingarena.driver.common.nodes import If, IntLiteral, Operation, Variable
+from turingarena.driver.compile.compile import Compiler
+from turingarena.driver.tests.test_utils import define_algorithms
+
+
+@pytest.mark.all_executors
+def test_arithmetic_expressions():
+    for algo in define_algorithms(
+            interface_text="""
+                procedure p(a, b);
+                function f(x, y);
+
+                main {
+                    read a, b;
+                    call p(a, b);
+                    call r = f(a + 2 * b, -a - (b - 1) * 3);
+                    write r;
+                }
+            """,
+            sources={
+                'C++': """
+                    void p(int a, int b) {}
+                    int f(int x, int y) { return x * y; }
+                """,
+                'Python': """if True:
+                    def p(a, b): pass
+                    def f(x, y): return x * y
+                """,
+            }
+    ):
+        for a, b in [(3, 4), (-5, 0)]:
+            with algo.run() as p:
+                p.procedures.p(a, b)
+                x, y = a + 2 * b, -a - (b - 1) * 3
+                assert p.functions.f(x, y) == x * y
+
+
+@pytest.mark.all_executors
+def test_condition_expressions():
+    for algo in define_algorithms(
+            interface_text="""
+                procedure p(a, b);
+                function f1();
+                function f2(c);
+
+                main {
+                    read a, b;
+                    call p(a, b);
+                    if a < b && (a + b == 5 || b > 10) {
+                        call r = f1();
+                        write r;
+                    } else {
+                        call r = f2(a >= b);
+                        write r;
+                    }
+                }
+            """,
+            sources={
+                'C++': """
+                    void p(int a, int b) {}
+                    int f1() { return 1; }
+                    int f2(int c) { return 2 + c; }
+                """,
+                'Python': """if True:
+                    def p(a, b): pass
+                    def f1(): return 1
+                    def f2(c): return 2 + c
+                """,
+            }
+    ):
+        for a, b in [(1, 4), (1, 20), (4, 1), (2, 4)]:
+            with algo.run() as p:
+                p.procedures.p(a, b)
+                if a < b and (a + b == 5 or b > 10):
+                    assert p.functions.f1() == 1
+                else:
+                    c = int(a >= b)
+                    assert p.functions.f2(c) == 2 + c
+
+
+def test_constant_folding():
+    interface = Compiler.create().compile_interface_source("""
+        const n = 2 * 3 + 1;
+        const m = (1 - 3) * 4 < 0 - 7;
+        main {
+            read a;
+            if a * (2 + 1) {}
+        }
+    """)
+
+    [n, m] = interface.constants
+    assert n.value == IntLiteral(7)
+    assert m.value == IntLiteral(1)
+
+    [if_statement] = [c for c in interface.main.children if isinstance(c, If)]
+    assert if_statement.condition == Operation("*", (Variable("a"), IntLiteral(3)))
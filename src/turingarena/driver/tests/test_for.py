@@ -1,4 +1,8 @@
-from .test_utils import define_algorithm
+import pytest
+
+from .test_utils import define_algorithm, define_algorithms
+
+pytestmark = pytest.mark.all_executors
 
 
 def test_simple_for():
@@ -74,4 +78,104 @@ def test_double_for():
             assert p.functions.f(n, m, a) == 42
             for i in range(n):
                 for j in range(m):
-                    assert p.functions.g(i, j) == i * j
\ No newline at end of file
+                    assert p.functions.g(i, j) == i * j
+
+
+def test_for_read_arrays():
+    for algorithm in define_algorithms(
+            interface_text="""
+            function f(n, a[], b[], c[][]);
+            function g(i, j);
+
+            main {
+                read n;
+                for i to n {
+                    read a[i], b[i];
+                }
+                for i to n {
+                    for j to n {
+                        read c[i][j];
+                    }
+                }
+
+                call r = f(n, a, b, c);
+                write r;
+
+                for i to n {
+                    for j to n {
+                        call s = g(i, j);
+                        write s;
+                    }
+                }
+            }
+        """,
+            sources={
+                "C++": """
+                    int *A, *B, **C;
+                    int f(int n, int *a, int *b, int **c) { A = a; B = b; C = c; return 42; }
+                    int g(int i, int j) { return A[i] * B[j] + C[i][j]; }
+                """,
+                "Python": """if True:
+                    def f(n, a, b, c):
+                        global A, B, C
+                        A, B, C = a, b, c
+                        return 42
+                    def g(i, j):
+                        return A[i] * B[j] + C[i][j]
+                """,
+            },
+    ):
+        with algorithm.run() as p:
+            n = 4
+            a = [i + 1 for i in range(n)]
+            b = [2 * i for i in range(n)]
+            c = [[10 * i + j for j in range(n)] for i in range(n)]
+            assert p.functions.f(n, a, b, c) == 42
+            for i in range(n):
+                for j in range(n):
+                    assert p.functions.g(i, j) == a[i] * b[j] + c[i][j]
+
+
+def test_for_write_array():
+    for algorithm in define_algorithms(
+            interface_text="""
+            procedure sort(n, a[]);
+            function get(i);
+
+            main {
+                read n;
+                for i to n {
+                    read a[i];
+                }
+                call sort(n, a);
+                for i to n {
+                    write a[i];
+                }
+                for i to n {
+                    call x = get(i);
+                    write x;
+                }
+            }
+        """,
+            sources={
+                "C++": """
+                    #include <algorithm>
+                    int *A;
+                    void sort(int n, int *a) { std::sort(a, a + n); A = a; }
+                    int get(int i) { return 10 * A[i]; }
+                """,
+                "Python": """if True:
+                    def sort(n, a):
+                        global A
+                        a.sort()
+                        A = a
+                    def get(i):
+                        return 10 * A[i]
+                """,
+            },
+    ):
+        with algorithm.run() as p:
+            a = [5, 3, 8, 1]
+            p.procedures.sort(len(a), a)
+            for i, x in enumerate(sorted(a)):
+                assert p.functions.get(i) == 10 * x
@@ -1,5 +1,9 @@
+import pytest
+
 from turingarena.driver.tests.test_utils import define_algorithm
 
+pytestmark = pytest.mark.all_executors
+
 
 def test_if_else_calls():
     with define_algorithm(
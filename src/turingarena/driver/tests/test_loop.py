@@ -1,7 +1,10 @@
+import pytest
+
 from turingarena.driver.compile.diagnostics import *
 from .test_utils import assert_interface_error, define_algorithm
 
 
+@pytest.mark.all_executors
 def test_loop_switch_functions():
     with define_algorithm(
         interface_text="""
@@ -41,6 +44,7 @@ def test_loop_switch_functions():
             p.checkpoint()
 
 
+@pytest.mark.all_executors
 def test_loop_switch_procedures():
     with define_algorithm(
             interface_text="""
@@ -78,6 +82,7 @@ def test_loop_switch_procedures():
             p.checkpoint()
 
 
+@pytest.mark.all_executors
 def test_loop_and_if_functions():
     with define_algorithm(
         interface_text="""
@@ -102,6 +107,7 @@ def test_loop_and_if_functions():
             assert p.functions.f() == 42
 
 
+@pytest.mark.all_executors
 def test_loop_and_if_procedures():
     with define_algorithm(
         interface_text="""
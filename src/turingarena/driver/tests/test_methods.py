@@ -1,7 +1,10 @@
+import pytest
+
 from turingarena.driver.compile.diagnostics import *
 from turingarena.driver.tests.test_utils import define_algorithms, assert_interface_error, define_algorithm
 
 
+@pytest.mark.all_executors
 def test_method_no_arguments():
     for algo in define_algorithms(
             interface_text="""
@@ -27,6 +30,7 @@ def test_method_no_arguments():
             p.checkpoint()
 
 
+@pytest.mark.all_executors
 def test_method_with_arguments():
     for algo in define_algorithms(
             interface_text="""
@@ -55,6 +59,7 @@ def test_method_with_arguments():
             p.checkpoint()
 
 
+@pytest.mark.all_executors
 def test_method_return_value():
     for algo in define_algorithms(
             interface_text="""
@@ -85,6 +90,7 @@ def test_method_return_value():
             assert p.functions.f(1) == 2
 
 
+@pytest.mark.all_executors
 def test_multiple_call_function_no_args():
     with define_algorithm(
             interface_text="""
@@ -104,6 +110,7 @@ def test_multiple_call_function_no_args():
                 assert p.functions.f() == i
 
 
+@pytest.mark.all_executors
 def test_multiple_call_function_args():
     with define_algorithm(
             interface_text="""
@@ -131,6 +138,7 @@ def test_multiple_call_function_args():
                 assert p.functions.f(2) == i
 
 
+@pytest.mark.all_executors
 def test_multiple_call_procedure_no_args():
     with define_algorithm(
             interface_text="""
@@ -152,6 +160,7 @@ def test_multiple_call_procedure_no_args():
 
 
 
+@pytest.mark.all_executors
 def test_multiple_call_procedure_args():
     with define_algorithm(
             interface_text="""
@@ -176,6 +185,7 @@ def test_multiple_call_procedure_args():
             p.checkpoint()
 
 
+@pytest.mark.all_executors
 def test_multiple_function_return_value():
     with define_algorithm(
             interface_text="""
@@ -199,6 +209,50 @@ def test_multiple_function_return_value():
                 assert p.functions.sum(i, i) == 2 * i
 
 
+@pytest.mark.all_executors
+def test_batch_procedure_calls():
+    with define_algorithm(
+            interface_text="""
+            procedure add(x);
+            function total();
+
+            main {
+                loop {
+                    read c;
+                    switch c {
+                        case 1 {
+                            read x;
+                            call add(x);
+                        }
+                        case 2 {
+                            call t = total();
+                            write t;
+                        }
+                        case 0 {
+                            break;
+                        }
+                    }
+                }
+            }
+            """,
+            language_name="C++",
+            source_text="""
+            int s = 0;
+            void add(int x) { s += x; }
+            int total() { return s; }
+        """,
+    ) as algo:
+        with algo.run() as p:
+            with p.batch():
+                for i in range(300):
+                    p.procedures.add(i)
+                assert p.functions.total() == sum(range(300))
+                for i in range(300):
+                    p.procedures.add(i)
+            assert p.functions.total() == 2 * sum(range(300))
+            p.exit()
+
+
 def test_callback_accept_scalars():
     assert_interface_error("""
         procedure f() callbacks {
@@ -1,3 +1,7 @@
+import tatsu
+
+from turingarena.driver.compile.grammar import grammar_ebnf
+from turingarena.driver.compile.parser import parse_interface
 from .test_utils import assert_no_interface_errors
 
 interface = '''
@@ -55,3 +59,35 @@ interface = '''
 
 def test_parsing():
     assert_no_interface_errors(interface)
+
+
+expressions_interface = '''
+    const N = -5;
+
+    main {
+        read a, b[1 + 2], c; /* comment */
+        write (a), a * b * (c), a + b - c, - a + b, -a - b + c, a - -1;
+        write a || b && c, a == b, a < b + c != c, a <= b, a >= b > c;
+        if a { checkpoint; }
+        switch a { case 1, 2 { exit; } case 3 {} }
+        loop { break; }
+    }
+'''
+
+
+def dump_ast(ast):
+    if isinstance(ast, dict):
+        return {
+            **{k: dump_ast(v) for k, v in ast.items() if k != "parseinfo"},
+            "parseinfo": (ast.parseinfo.rule, ast.parseinfo.pos, ast.parseinfo.endpos),
+        }
+    if isinstance(ast, (list, tuple)):
+        return [dump_ast(a) for a in ast]
+    return ast
+
+
+def test_same_ast_as_grammar():
+    grammar = tatsu.compile(grammar_ebnf)
+    for text in [interface, expressions_interface]:
+        expected = grammar.parse(text, start="interface", asmodel=False, parseinfo=True)
+        assert dump_ast(parse_interface(text)) == dump_ast(expected)
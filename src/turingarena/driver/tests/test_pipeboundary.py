@@ -0,0 +1,78 @@
+import threading
+import time
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from turingarena.driver.client.pipeboundary import (
+    PipeBoundary, PipeBoundarySide, PipeDescriptor, PipeSynchronousQueueDescriptor,
+)
+
+QUEUE = PipeSynchronousQueueDescriptor(
+    request_pipes=dict(
+        command=PipeDescriptor("command.pipe", ("w", "r")),
+        data=PipeDescriptor("data.pipe", ("wb", "rb")),
+    ),
+    response_pipes=dict(
+        result=PipeDescriptor("result.pipe", ("r", "w")),
+    ),
+)
+
+
+def handler(command, data):
+    if command is None:
+        return dict(result=None)
+    return dict(result=f"{command} {len(data or b'')}")
+
+
+@pytest.fixture
+def boundary():
+    with TemporaryDirectory() as directory:
+        boundary = PipeBoundary(directory)
+        boundary.create_queue(QUEUE)
+        yield boundary
+
+
+def serve_persistent(boundary):
+    with boundary.open_queue(QUEUE, PipeBoundarySide.SERVER) as queue:
+        while queue.handle_request(handler):
+            pass
+
+
+def serve_per_payload(boundary, count):
+    for _ in range(count):
+        boundary.handle_request(QUEUE, handler)
+
+
+def test_persistent_queue(boundary):
+    server = threading.Thread(target=serve_persistent, args=(boundary,))
+    server.start()
+    with boundary.open_queue(QUEUE, PipeBoundarySide.CLIENT) as queue:
+        assert queue.send_request(command="size", data=b"12345") == dict(result="size 5")
+        assert queue.send_request(command="size", data=None) == dict(result="size 0")
+        assert queue.send_empty_request() == dict(result=None)
+    server.join()
+
+
+@pytest.mark.parametrize("persistent", [False, True])
+def test_request_latency(boundary, persistent):
+    N = 1000
+    if persistent:
+        server = threading.Thread(target=serve_persistent, args=(boundary,))
+    else:
+        server = threading.Thread(target=serve_per_payload, args=(boundary, N))
+    server.start()
+
+    start = time.perf_counter()
+    if persistent:
+        with boundary.open_queue(QUEUE, PipeBoundarySide.CLIENT) as queue:
+            for i in range(N):
+                assert queue.send_request(command="size", data=b"x") == dict(result="size 1")
+    else:
+        for i in range(N):
+            assert boundary.send_request(QUEUE, command="size", data=b"x") == dict(result="size 1")
+    elapsed = time.perf_counter() - start
+    server.join()
+
+    mode = "persistent" if persistent else "open per payload"
+    print(f"{mode}: {elapsed / N * 1e6:.1f} us/request")
@@ -0,0 +1,76 @@
+from turingarena.driver.common.nodes import For, Variable
+from turingarena.driver.compile.compile import Compiler
+from turingarena.driver.drive.analysis import ExecutionPhase
+from turingarena.driver.drive.nodes import CallAccept
+from turingarena.driver.drive.preprocess import ExecutionPreprocessor
+from turingarena.driver.drive.resolution import ResolutionAnalyzer, LoopResolution
+
+
+def nodes(n):
+    yield n
+    if isinstance(n, tuple):
+        for child in n:
+            yield from nodes(child)
+
+
+def annotations(interface_text, node_type):
+    interface = Compiler.create().compile_interface_source(interface_text)
+    main = ExecutionPreprocessor().transform(interface.main)
+    resolution = ResolutionAnalyzer().analyze(main, interface.constants)
+
+    return [
+        (phase, resolution.of(n, phase))
+        for n in nodes(main)
+        if isinstance(n, node_type)
+        for phase in [None, *ExecutionPhase]
+        if (id(n), phase) in resolution.annotations
+    ]
+
+
+def test_call_arguments():
+    assert annotations("""
+        const K = 3;
+        function f(n, a[], k);
+        function g(x);
+
+        main {
+            read n;
+            for i to n {
+                read a[i];
+            }
+            call x = f(n, a, K);
+            write x;
+            call y = g(x);
+            write y;
+        }
+    """, CallAccept) == [
+        (ExecutionPhase.REQUEST, (False, False, True)),
+        (ExecutionPhase.REQUEST, (True,)),
+    ]
+
+
+def test_for_references():
+    assert annotations("""
+        procedure p(n);
+        function f(i);
+
+        main {
+            read n;
+            call p(n);
+            for i to n {
+                call b[i] = f(i);
+                write b[i];
+            }
+            for i to n {
+                call c = f(b[i]);
+                write c;
+            }
+        }
+    """, For) == [
+        # resolved by the loop in the upward phase, then already resolved in the other phases
+        (ExecutionPhase.UPWARD, LoopResolution(range=True, references=((Variable("b"), False),))),
+        (ExecutionPhase.REQUEST, LoopResolution(range=True, references=((Variable("b"), True),))),
+        (ExecutionPhase.DOWNWARD, LoopResolution(range=True, references=((Variable("b"), True),))),
+        # not grouped in a step, because of c
+        (None, LoopResolution(range=True, references=())),
+    ]
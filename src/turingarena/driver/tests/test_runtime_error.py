@@ -3,6 +3,8 @@ import pytest
 from turingarena.driver.client.exceptions import AlgorithmRuntimeError
 from turingarena.driver.tests.test_utils import define_algorithm
 
+pytestmark = pytest.mark.all_executors
+
 INTERFACE_TEXT = """
     procedure p();
     main {
@@ -60,3 +62,63 @@ def test_io_garbage():
                 p.procedures.p()
                 p.checkpoint()
         assert "sent invalid data" in exc_info.value.message
+
+
+def test_invalid_write_loop():
+    with define_algorithm(
+            interface_text="""
+                procedure p(n, a[]);
+                main {
+                    read n;
+                    for i to n {
+                        read a[i];
+                    }
+                    call p(n, a);
+                    for i to n {
+                        write a[i];
+                    }
+                    checkpoint;
+                }
+            """,
+            language_name="C++",
+            source_text="""
+                #include <cstdio>
+                void p(int n, int *a) { printf("x\\n"); }
+            """,
+    ) as algo:
+        with pytest.raises(AlgorithmRuntimeError) as exc_info:
+            with algo.run() as p:
+                p.procedures.p(3, [1, 2, 3])
+                p.checkpoint()
+        assert "invalid data 'x" in exc_info.value.message
+
+
+@pytest.mark.parametrize("output", [r"\n5 6\n", r"5 6\n\n"])
+def test_write_loop_wrong_lines(output):
+    # as many lines and values as expected, but not one value per line
+    with define_algorithm(
+            interface_text="""
+                procedure p(n, a[]);
+                main {
+                    read n;
+                    for i to n {
+                        read a[i];
+                    }
+                    call p(n, a);
+                    for i to n {
+                        write a[i];
+                    }
+                    checkpoint;
+                }
+            """,
+            language_name="C++",
+            source_text=f"""
+                #include <cstdio>
+                void p(int n, int *a) {{ printf("{output}"); }}
+            """,
+    ) as algo:
+        with pytest.raises(AlgorithmRuntimeError) as exc_info:
+            with algo.run() as p:
+                p.procedures.p(2, [1, 2])
+                p.checkpoint()
+        assert "stopped sending data" in exc_info.value.message
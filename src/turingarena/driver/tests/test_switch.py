@@ -1,5 +1,9 @@
+import pytest
+
 from turingarena.driver.tests.test_utils import define_algorithm
 
+pytestmark = pytest.mark.all_executors
+
 interface_text = """
     function f1();
     function f2();
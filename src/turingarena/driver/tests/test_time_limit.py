@@ -1,6 +1,11 @@
+import time
+
+import pytest
 from pytest import raises, approx
 
-from turingarena import TimeLimitExceeded
+from turingarena import AlgorithmRuntimeError, TimeLimitExceeded
+from turingarena.driver.drive.comm import UPWARD_TIMEOUT
+from turingarena.driver.sandbox.popen import create_popen_process_connection
 from turingarena.driver.tests.test_utils import define_algorithm
 
 
@@ -40,7 +45,7 @@ def test_time_usage():
             with p.section() as slow:
                 p.procedures.slow(0)
                 p.checkpoint()
-    assert 0.0 < fast.time_usage < 0.001
+    assert 0.0 <= fast.time_usage < 0.001
     assert 0.005 < slow.time_usage < 1.0
     assert p.time_usage == approx(fast.time_usage + slow.time_usage)
 
@@ -76,3 +81,136 @@ def test_time_limit_process_exceeded():
                 p.checkpoint()
                 p.procedures.slow(0)
                 p.checkpoint()
+
+
+def test_time_usage_sampled():
+    with define_algorithm(
+            interface_text="""
+                function slow(a);
+                main {
+                    read a;
+                    call b = slow(a);
+                    write b;
+                }
+            """,
+            language_name="Python",
+            source_text="""if True:
+                def slow(x):
+                    for i in range(1000000):
+                        pass
+                    return x
+            """,
+    ) as algo:
+        with algo.run() as p:
+            before = p.sample_usage()
+            assert p.sample_usage() is before
+            assert p.functions.slow(0) == 0
+            after = p.sample_usage()
+    assert 0.005 < after.time_usage - before.time_usage < 1.0
+
+
+def test_wall_time_limit_exceeded():
+    with define_algorithm(
+            interface_text="""
+                function wait(a);
+                main {
+                    read a;
+                    call b = wait(a);
+                    write b;
+                    read c;
+                    call d = wait(c);
+                    write d;
+                }
+            """,
+            language_name="Python",
+            source_text="""if True:
+                import time
+
+                def wait(x):
+                    time.sleep(x / 10)
+                    return x
+            """,
+    ) as algo:
+        with raises(AlgorithmRuntimeError) as exc_info:
+            with algo.run() as p:
+                with p.section(wall_time_limit=1.0):
+                    assert p.functions.wait(1) == 1
+                with p.section(wall_time_limit=0.5):
+                    p.functions.wait(10)
+    assert "wall time limit exceeded" in exc_info.value.message
+
+
+def runaway_algo(language_name):
+    return define_algorithm(
+        interface_text="""
+            procedure loop(a);
+            main {
+                read a;
+                call loop(a);
+                checkpoint;
+                read b;
+                call loop(b);
+                checkpoint;
+            }
+        """,
+        language_name=language_name,
+        source_text={
+            "C++": """
+                void loop(int x) {
+                    for (volatile int i = 0; x == 0 || i < x; i++) {
+                    }
+                }
+            """,
+            "Python": """if True:
+                def loop(x):
+                    while x == 0:
+                        pass
+            """,
+        }[language_name],
+    )
+
+
+@pytest.mark.parametrize("language_name", ["C++", "Python"])
+def test_time_limit_kills_runaway_process(language_name):
+    with runaway_algo(language_name) as algo:
+        start = time.monotonic()
+        with raises(TimeLimitExceeded) as exc_info:
+            with algo.run(time_limit=0.2) as p:
+                p.procedures.loop(0)
+                p.checkpoint()
+        # killed at the limit, not when the driver stops waiting
+        assert time.monotonic() - start < UPWARD_TIMEOUT
+    assert "time limit exceeded" in exc_info.value.message
+
+
+def test_time_limit_section_kills_process():
+    with runaway_algo("C++") as algo:
+        with raises(TimeLimitExceeded):
+            with algo.run() as p:
+                with p.section(time_limit=1.0):
+                    p.procedures.loop(1000)
+                    p.checkpoint()
+                with p.section(time_limit=0.2, kill_on_time_limit=True):
+                    p.procedures.loop(0)
+                    p.checkpoint()
+
+
+def test_time_limit_section_relaxed_on_error():
+    with runaway_algo("C++") as algo:
+        with algo.run() as p:
+            with raises(ValueError):
+                with p.section(time_limit=0.1, kill_on_time_limit=True):
+                    raise ValueError
+            p.procedures.loop(1)
+            p.checkpoint()
+            # no longer limited by the section
+            p.procedures.loop(300000000)
+            p.checkpoint()
+
+
+def test_time_limit_enforced_by_kernel():
+    # the process is killed even if the driver is not waiting for it
+    connection = create_popen_process_connection(["python3", "-c", "while True: pass"])
+    connection.manager.set_time_usage_limit(0.5)
+    assert connection.upward.readline(1024, timeout=5.0) == b""
+    assert "SIGXCPU" in connection.manager.get_status().error
@@ -0,0 +1,60 @@
+import pytest
+
+from turingarena.util.visitor import visitormethod
+
+
+class Base:
+    pass
+
+
+class Middle(Base):
+    pass
+
+
+class Leaf(Middle):
+    pass
+
+
+def test_methods_changed_after_use():
+    class Visitor:
+        @visitormethod
+        def visit(self, node):
+            pass
+
+        def visit_Base(self, node):
+            return "base"
+
+    visitor = Visitor()
+    assert visitor.visit(Leaf()) == "base"
+
+    Visitor.visit_Leaf = lambda self, node: "leaf"
+    assert visitor.visit(Leaf()) == "leaf"
+
+    Visitor.visit_Leaf = lambda self, node: NotImplemented
+    Visitor.visit_Middle = lambda self, node: "middle"
+    assert visitor.visit(Leaf()) == "middle"
+
+    del Visitor.visit_Middle
+    assert visitor.visit(Leaf()) == "base"
+
+    del Visitor.visit_Base
+    with pytest.raises(NotImplementedError):
+        visitor.visit(Leaf())
+
+
+def test_methods_added_to_base_visitor():
+    class BaseVisitor:
+        @visitormethod
+        def visit(self, node):
+            pass
+
+        def visit_object(self, node):
+            return "object"
+
+    class Visitor(BaseVisitor):
+        pass
+
+    assert Visitor().visit(Leaf()) == "object"
+
+    BaseVisitor.visit_Middle = lambda self, node: "middle"
+    assert Visitor().visit(Leaf()) == "middle"
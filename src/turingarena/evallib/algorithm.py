@@ -4,6 +4,14 @@ from turingarena.driver.client.program import Program
 
 
 def run_algorithm(source_path, interface_path=None, **kwargs):
+    return _get_program(source_path, interface_path).run(**kwargs)
+
+
+def run_algorithm_async(source_path, interface_path=None, **kwargs):
+    return _get_program(source_path, interface_path).run_async(**kwargs)
+
+
+def _get_program(source_path, interface_path):
     if interface_path is None:
         interface_path = os.path.abspath("interface.txt")
 
@@ -12,4 +20,4 @@ def run_algorithm(source_path, interface_path=None, **kwargs):
     return Program(
         source_path=source_path,
         interface_path=interface_path,
-    ).run(**kwargs)
+    )
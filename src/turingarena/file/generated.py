@@ -1,7 +1,7 @@
 import os
 from functools import lru_cache
 
-from turingarena.driver.compile.compile import compile_interface
+from turingarena.driver.cache import compile_interface
 from turingarena.driver.language import Language
 from turingarena.text.parser import TextParser
 
@@ -1,20 +1,74 @@
+"""
+Methods dispatched on the class of their argument (see visitormethod).
+
+The dispatch is resolved once for each pair of visitor class and node class, and then remembered,
+together with the names of the methods that the visitor did not define,
+which are looked up again in the classes of the visitor at every call, so that methods added later are not missed.
+Usually there are none of them to look up, as the first method tried is the one for the class of the node.
+"""
+
 import functools
 from functools import partial
 
 
+def _defines(class_dicts, name):
+    for d in class_dicts:
+        if name in d:
+            return True
+    return False
+
+
 def visitormethod(f, *, meta=False, static=False):
+    """
+    Method which calls the first of f_<C> defined by the visitor, for C in the MRO of the class of the node.
+    """
+    # (visitor class, node class) -> (dicts of the classes of the visitor, steps), where every step is
+    # the names of the methods not defined (to check again), and then the name of the method to try (or None)
+    dispatch_table = {}
+
+    def find_methods(visitor_class, node_class):
+        # built-in classes (e.g., object) cannot be changed, and do not define methods of visitors
+        class_dicts = tuple(vars(cls) for cls in visitor_class.__mro__ if cls.__module__ != "builtins")
+        steps = []
+        missing = []
+        for name in (f"{f.__name__}_{cls.__name__}" for cls in node_class.__mro__):
+            if _defines(class_dicts, name):
+                steps.append((tuple(missing), name))
+                missing = []
+            else:
+                missing.append(name)
+        steps.append((tuple(missing), None))
+        return class_dicts, tuple(steps)
+
     @functools.wraps(f)
     def visitor_method(self, node, *args, **kwargs):
         if meta:
-            mro = node.__mro__
+            node_class = node
         else:
-            mro = node.__class__.__mro__
+            node_class = node.__class__
+
+        key = (self.__class__, node_class)
+        try:
+            class_dicts, steps = dispatch_table[key]
+        except KeyError:
+            class_dicts, steps = dispatch_table[key] = find_methods(*key)
+
+        for missing, name in steps:
+            for m in missing:
+                if _defines(class_dicts, m):
+                    # a method was added after the table was filled
+                    del dispatch_table[key]
+                    return visitor_method(self, node, *args, **kwargs)
+
+            if name is None:
+                break
 
-        for cls in mro:
             try:
-                method = getattr(self, f"{f.__name__}_{cls.__name__}")
+                method = getattr(self, name)
             except AttributeError:
-                continue
+                # a method was removed after the table was filled
+                del dispatch_table[key]
+                return visitor_method(self, node, *args, **kwargs)
 
             if static:
                 ans = method(*args, **kwargs)
@@ -24,7 +78,7 @@ def visitormethod(f, *, meta=False, static=False):
             if ans is not NotImplemented:
                 return ans
 
-        options = ", ".join(cls.__name__ for cls in mro)
+        options = ", ".join(cls.__name__ for cls in node_class.__mro__)
         raise NotImplementedError(f"{f.__name__} for [{options}]")
 
     return visitor_method